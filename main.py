@@ -17,10 +17,13 @@ Imports:
 - AuthorizationMiddleware: Custom middleware for authorization.
 - AuditMiddleware: Custom middleware for auditing.
 - v1_routes: API routes for version 1 of the Tarchia API.
+- providers: The catalog and storage providers, created when the application starts.
 
 Usage:
 - To run the application, execute this module directly. The application will start and listen
   on the specified port (default is 8080).
+- Set WORKERS to serve requests from more than one process, the workers share a cache of
+  decoded manifests and commits in shared memory (see tarchia.utils.shared_cache).
 
 Example:
     $ python main.py
@@ -31,21 +34,37 @@ Notes:
 - Basic error handling is included for the environment variable conversion.
 """
 
+from contextlib import asynccontextmanager
 from os import environ
 
 from fastapi import FastAPI
 from uvicorn import run
 
 from tarchia import __version__
+from tarchia.api.metrics import router as metrics_router
 from tarchia.api.middlewares import audit_middleware
 from tarchia.api.middlewares import authorization_middleware
 from tarchia.api.middlewares import brotli_middleware
 from tarchia.api.middlewares import cors_middleware
 from tarchia.api.v1 import v1_router
+from tarchia.interfaces.providers import providers
+from tarchia.utils import config
 
-application = FastAPI(title="Tarchia Metastore", version=__version__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # create the catalog and storage providers (and their clients) before we
+    # serve requests, rather than in the first requests
+    providers.start()
+    yield
+    audit_middleware.audit_log.flush()
+    providers.close()
+
+
+application = FastAPI(title="Tarchia Metastore", version=__version__, lifespan=lifespan)
 
 application.include_router(v1_router)
+application.include_router(metrics_router, tags=["Metrics"])
 brotli_middleware.bind(application)
 audit_middleware.bind(application)
 authorization_middleware.bind(application)
@@ -57,4 +76,4 @@ if __name__ == "__main__":  # pragma: no cover
     except ValueError:
         port = 8080  # default to 8080 if environment variable is invalid
 
-    run("main:application", host="0.0.0.0", port=port)  # nosec
+    run("main:application", host="0.0.0.0", port=port, workers=config.WORKERS)  # nosec
@@ -0,0 +1,29 @@
+"""
+Handler Dependencies
+
+The catalog and storage providers are given to the handlers as FastAPI
+dependencies, e.g.
+
+    async def get_table(
+        ...,
+        catalog_provider: CatalogProvider = Depends(get_catalog),
+    ):
+
+so every request shares the application's providers (and their clients and
+connection pools), and tests can replace them with
+`application.dependency_overrides`.
+"""
+
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.interfaces.providers import providers
+from tarchia.interfaces.storage.storage_provider import StorageProvider
+
+
+def get_catalog() -> CatalogProvider:
+    """The application's catalog provider"""
+    return providers.catalog()
+
+
+def get_storage() -> StorageProvider:
+    """The application's storage provider"""
+    return providers.storage()
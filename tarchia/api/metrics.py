@@ -0,0 +1,68 @@
+"""
+Prometheus Metrics
+
+The storage request counters and latency histograms, the outcomes of reads
+from the metadata cache and the shared cache, and of audit records, in the Prometheus text exposition
+format.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    from tarchia.api.middlewares.audit_middleware import audit_log
+    from tarchia.interfaces.storage import caching_storage
+    from tarchia.interfaces.storage import instrumented_storage
+    from tarchia.utils.shared_cache import shared_cache
+
+    lines = instrumented_storage.metrics.to_prometheus()
+
+    cache = caching_storage.statistics.as_dict()
+    lines.append(
+        "# HELP tarchia_storage_cache_reads_total Metadata reads, by where they were served from."
+    )
+    lines.append("# TYPE tarchia_storage_cache_reads_total counter")
+    for outcome in ("memory_hits", "disk_hits", "misses", "bypassed"):
+        lines.append(f'tarchia_storage_cache_reads_total{{outcome="{outcome}"}} {cache[outcome]}')
+    lines.append(
+        "# HELP tarchia_storage_cache_hit_ratio Share of cacheable reads served from the cache."
+    )
+    lines.append("# TYPE tarchia_storage_cache_hit_ratio gauge")
+    lines.append(f"tarchia_storage_cache_hit_ratio {cache['hit_ratio']}")
+    lines.append(
+        "# HELP tarchia_storage_cache_write_errors_total Blobs which couldn't be written to the"
+        " disk cache."
+    )
+    lines.append("# TYPE tarchia_storage_cache_write_errors_total counter")
+    lines.append(f"tarchia_storage_cache_write_errors_total {cache['write_errors']}")
+
+    shared = shared_cache()
+    if shared is not None:
+        lines.append(
+            "# HELP tarchia_shared_cache_reads_total Reads of decoded manifests and commits from"
+            " the cache shared by the workers."
+        )
+        lines.append("# TYPE tarchia_shared_cache_reads_total counter")
+        for outcome, count in shared.as_dict().items():
+            lines.append(f'tarchia_shared_cache_reads_total{{outcome="{outcome}"}} {count}')
+        lines.append(
+            "# HELP tarchia_shared_cache_write_errors_total Entries which couldn't be written to"
+            " the cache shared by the workers."
+        )
+        lines.append("# TYPE tarchia_shared_cache_write_errors_total counter")
+        lines.append(f"tarchia_shared_cache_write_errors_total {shared.write_errors}")
+
+    lines.append("# HELP tarchia_audit_records_total Audit records, by what happened to them.")
+    lines.append("# TYPE tarchia_audit_records_total counter")
+    for outcome in ("written", "dropped", "failed"):
+        lines.append(
+            f'tarchia_audit_records_total{{outcome="{outcome}"}} {getattr(audit_log, outcome)}'
+        )
+
+    return PlainTextResponse(
+        "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
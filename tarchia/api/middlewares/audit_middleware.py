@@ -6,76 +6,227 @@ Record request information and handle error responses.
 AuthenicationError -> 403
 AuthorizationError -> 401
 NotFoundError -> 404
+AlreadyExistsError -> 409
 InvalidEntryError -> 422
+
+Writing the audit records is kept out of the path of the request, records are
+added to a bounded buffer and written in batches by a background thread. If the
+buffer fills (e.g. the sink is slow) new records are dropped and counted rather
+than holding up requests.
+
+The sink is set by AUDIT_LOG_SINK:
+
+- STDOUT: one JSON record per line (default)
+- FILE: appended to AUDIT_LOG_FILE
+- STORAGE: a blob per batch under [metadata_root]/audit
+- NONE: records are discarded
 """
 
+import atexit
+import sys
+import threading
 import time
-from typing import Awaitable
+from collections import deque
 from typing import Callable
+from typing import Deque
+from typing import List
+from typing import Optional
 
 import orjson
 from fastapi import FastAPI
-from fastapi import HTTPException
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
 
 from tarchia.exceptions import AlreadyExistsError
 from tarchia.exceptions import DataEntryError
+from tarchia.exceptions import InvalidConfigurationError
 from tarchia.exceptions import NotFoundError
+from tarchia.interfaces.storage.instrumented_storage import start_request_io
+from tarchia.utils import config
+
+AuditWriter = Callable[[List[dict]], None]
+
+
+class AuditLog:
+    def __init__(self, writer: AuditWriter, capacity: int, flush_interval_seconds: float):
+        """
+        Parameters:
+            writer: Callable
+                Writes a batch of records to the sink
+            capacity: int
+                The most records to hold waiting to be written
+            flush_interval_seconds: float
+                The longest a record waits before it is written
+        """
+        self.writer = writer
+        self.capacity = capacity
+        self.flush_interval_seconds = flush_interval_seconds
+        self.buffer: Deque[dict] = deque()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def record(self, audit_record: dict):
+        """Add a record to the buffer, this never blocks."""
+        if len(self.buffer) >= self.capacity:
+            self.dropped += 1
+            return
+        self.buffer.append(audit_record)
+        if self._thread is None:
+            self._start()
+        if len(self.buffer) >= self.capacity // 2:
+            self._wake.set()
+
+    def _start(self):
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tarchia-audit", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records."""
+        with self._flush_lock:
+            batch = []
+            while self.buffer:
+                batch.append(self.buffer.popleft())
+            if not batch:
+                return
+            try:
+                self.writer(batch)
+                self.written += len(batch)
+            except Exception as err:  # pragma: no cover
+                # the audit log mustn't take the service down
+                self.failed += len(batch)
+                print(f"Unable to write {len(batch)} audit records - {err}", file=sys.stderr)
+
+
+def _write_stdout(batch: List[dict]):
+    sys.stdout.write("".join(orjson.dumps(record).decode() + "\n" for record in batch))
+    sys.stdout.flush()
+
+
+def _write_file(batch: List[dict]):
+    with open(config.AUDIT_LOG_FILE, "ab") as audit_file:
+        audit_file.write(b"".join(orjson.dumps(record) + b"\n" for record in batch))
+
+
+def _write_storage(batch: List[dict]):
+    from tarchia.interfaces.providers import providers
+    from tarchia.utils import generate_uuid
+
+    day = time.strftime("%Y-%m-%d", time.gmtime())
+    location = f"{config.METADATA_ROOT}/audit/{day}/audit-{generate_uuid()}.jsonl"
+    providers.storage().write_blob(
+        location, b"".join(orjson.dumps(record) + b"\n" for record in batch)
+    )
+
+
+def _discard(batch: List[dict]):
+    pass
+
 
+def _create_writer(sink: Optional[str] = None) -> AuditWriter:
+    sink = (sink or config.AUDIT_LOG_SINK or "STDOUT").upper()
+    if sink == "STDOUT":
+        return _write_stdout
+    if sink == "FILE":
+        if not config.AUDIT_LOG_FILE:
+            raise InvalidConfigurationError(setting="AUDIT_LOG_FILE")
+        return _write_file
+    if sink == "STORAGE":
+        return _write_storage
+    if sink == "NONE":
+        return _discard
+    raise InvalidConfigurationError(setting="AUDIT_LOG_SINK")
+
+
+audit_log = AuditLog(
+    writer=_create_writer(),
+    capacity=config.AUDIT_LOG_BUFFER_SIZE,
+    flush_interval_seconds=config.AUDIT_LOG_FLUSH_MS / 1000,
+)
+atexit.register(audit_log.flush)
+
+
+def _error_response(error: Exception) -> Optional[Response]:
+    if isinstance(error, DataEntryError):
+        return Response(
+            status_code=422,
+            content=orjson.dumps({"fields": error.fields, "message": error.message}),
+        )
+    if isinstance(error, NotFoundError):
+        return Response(status_code=404, content=str(error))
+    if isinstance(error, AlreadyExistsError):
+        return Response(status_code=409, content=str(error))
+    return None
+
+
+class AuditMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-class AuditMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
         audit_record = {
             "service": "tarchia",
-            "end_point": request.url.path,
-            "method": request.method,
+            "end_point": scope["path"],
+            "method": scope["method"],
         }
 
         outcome = "unknown"
+        status_code = None
+        # the storage requests made while serving this request
+        request_io = start_request_io()
         start = time.monotonic_ns()
-        try:
-            result = await call_next(request)
-            outcome = "success"
 
-            return result
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
-        except HTTPException as error:
-            outcome = "error"
-            audit_record["message"] = str(error)
-            raise error
-        except DataEntryError as error:
-            outcome = "error"
-            audit_record["message"] = str(error)
-            return Response(
-                status_code=422,
-                content=orjson.dumps({"fields": error.fields, "message": error.message}),
-            )
-        except NotFoundError as error:
-            outcome = "error"
-            audit_record["message"] = str(error)
-            return Response(status_code=404, content=str(error))
-        except AlreadyExistsError as error:
-            outcome = "error"
-            audit_record["message"] = str(error)
-            return Response(status_code=409, content=str(error))
+        try:
+            await self.app(scope, receive, send_with_status)
+            outcome = "success"
         except Exception as error:
             outcome = "error"
             audit_record["message"] = str(error)
-            from uuid import uuid4
+            response = _error_response(error)
+            # if the response has started we can't replace it
+            if response is None or status_code is not None:
+                from uuid import uuid4
 
-            code = str(uuid4())
-            print(f"{code}\n{error}")
-            raise error
-            return Response(status_code=500, content=f"Unexpected Error ({code})")
+                code = str(uuid4())
+                print(f"{code}\n{error}")
+                raise error
+            await response(scope, receive, send_with_status)
         finally:
             audit_record["duration_ms"] = (time.monotonic_ns() - start) / 1e6
             audit_record["outcome"] = outcome
+            if status_code is not None:
+                audit_record["status_code"] = status_code
+            storage = request_io.as_dict()
+            if storage:
+                audit_record["storage"] = storage
 
-            print(orjson.dumps(audit_record).decode())
+            audit_log.record(audit_record)
 
 
 def bind(app: FastAPI):
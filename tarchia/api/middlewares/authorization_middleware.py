@@ -1,39 +1,121 @@
 """
 A very basic auth system.
 
-If the system is running locally we don't need a token, if we're not reunning locally
-then a cookie or an auth header must include the same value as an environment variable.
+If the request is made from the local machine we don't need a token, otherwise a
+cookie or an auth header must carry a token. A request is local if the peer
+making it has a loopback address, the Host header is chosen by the caller so it
+isn't used, and requests forwarded by a proxy are never local. The token is
+either a signed access token (see tarchia.utils.tokens), or the same value as
+the AUTH_TOKEN environment variable, which acts as a service account with access
+to everything.
+
+The caller is resolved once, into a Principal which is available to the handlers
+as `request.state.principal`, and requests for tables and owners are checked
+against the caller's permissions (see tarchia.utils.permissions).
 """
 
+import hmac
+import ipaddress
 import os
-from typing import Awaitable
-from typing import Callable
+from typing import Optional
 
 from fastapi import FastAPI
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import cookie_parser
 from starlette.responses import Response
+from starlette.types import ASGIApp
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from tarchia.exceptions import InvalidTokenError
+from tarchia.utils.permissions import Principal
+from tarchia.utils.permissions import is_permitted
+from tarchia.utils.tokens import is_jwt
+from tarchia.utils.tokens import verify_token
+
+# the peer the test client reports, it isn't an address a server can report
+TEST_CLIENT = "testclient"
+FORWARDING_HEADERS = (b"forwarded", b"x-forwarded-for", b"x-real-ip")
+
+LOCAL_PRINCIPAL = Principal("local", unrestricted=True)
+SERVICE_PRINCIPAL = Principal("service", unrestricted=True)
+
+
+def _is_local(scope: Scope, forwarded: bool) -> bool:
+    """The request was made from this machine, rather than forwarded to it"""
+    client = scope.get("client")
+    if forwarded or not client:
+        return False
+    if client[0] == TEST_CLIENT:
+        return True
+    try:
+        return ipaddress.ip_address(client[0]).is_loopback
+    except ValueError:
+        return False
+
 
+def _auth_token(cookie: Optional[str], authorization: Optional[str]) -> Optional[str]:
+    if cookie is not None:
+        auth_token = cookie_parser(cookie).get("AUTH_TOKEN")
+        if auth_token is not None:
+            return auth_token
+    if authorization is not None:
+        parts = authorization.split(" ")
+        return parts[1] if len(parts) == 2 else None
+    return None
 
-class AuthorizationMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
-        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
-    ) -> Response:
-        if request.url.hostname not in ("127.0.0.1", "localhost", "testserver"):
-            auth_token = None
-            if "AUTH_TOKEN" in request.cookies:
-                auth_token = request.cookies["AUTH_TOKEN"]
-            else:
-                for header, value in request.headers.items():
-                    if header.lower() == "authorization":
-                        auth_token = value.split(" ")[1] if len(value.split(" ")) == 2 else None
 
+class AuthorizationMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cookie = authorization = None
+        forwarded = False
+        for name, value in scope["headers"]:
+            if name in FORWARDING_HEADERS:
+                forwarded = True
+            elif name == b"cookie":
+                cookie = value.decode("latin-1")
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+
+        principal = LOCAL_PRINCIPAL
+        if not _is_local(scope, forwarded):
+            auth_token = _auth_token(cookie, authorization)
             if auth_token is None:
-                return Response(status_code=401)
-            if os.environ.get("AUTH_TOKEN") != auth_token:
-                return Response(status_code=403)
+                await Response(status_code=401)(scope, receive, send)
+                return
+            principal = _resolve_principal(auth_token)
+            if principal is None or not is_permitted(principal, scope["method"], scope["path"]):
+                await Response(status_code=403)(scope, receive, send)
+                return
+
+        scope.setdefault("state", {})["principal"] = principal
+        await self.app(scope, receive, send)
+
+
+def _resolve_principal(auth_token: str) -> Optional[Principal]:
+    """The caller presenting a token, None if the token isn't valid"""
+    if is_jwt(auth_token):
+        try:
+            claims = verify_token(auth_token)
+        except InvalidTokenError:
+            return None
+        subject = claims.get("sub")
+        roles = claims.get("roles") or []
+        if not isinstance(subject, str) or not isinstance(roles, list):
+            return None
+        return Principal(subject, (role for role in roles if isinstance(role, str)))
 
-        return await call_next(request)
+    service_token = os.environ.get("AUTH_TOKEN")
+    if service_token and hmac.compare_digest(service_token.encode(), auth_token.encode()):
+        return SERVICE_PRINCIPAL
+    return None
 
 
 def bind(app: FastAPI):
@@ -1,6 +1,212 @@
-from brotli_asgi import BrotliMiddleware
+"""
+Response Compression
+
+Compressing a small response costs more than it saves, and compressing a large
+manifest listing at a high quality holds up the response, so how (and whether)
+a response is compressed depends on what it is:
+
+- responses smaller than MINIMUM_SIZE, without a text-like content type, or
+  already encoded are sent as they are
+- responses up to LARGE_SIZE are compressed at a moderate quality, preferring
+  Brotli for its better ratio
+- larger and streaming responses are compressed at a low quality, preferring
+  zstd for its speed; streaming responses are compressed chunk by chunk as they
+  are sent rather than being buffered
+
+The client's Accept-Encoding preferences (q-values) are honoured, the order
+above only breaks ties between encodings the client likes equally.
+"""
+
+import re
+import zlib
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import brotli
+import zstandard
 from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+MINIMUM_SIZE = 1024
+LARGE_SIZE = 1024 * 1024
+
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|javascript|xml|x-ndjson|[\w.+-]+\+json|[\w.+-]+\+xml))"
+)
+
+# encoding preferences, for when the client has no preference between them
+SMALL_PREFERENCES = ("br", "zstd", "gzip")
+LARGE_PREFERENCES = ("zstd", "br", "gzip")
+
+# (brotli quality, zstd level, gzip level)
+SMALL_LEVELS = (5, 3, 6)
+LARGE_LEVELS = (1, 1, 1)
+
+
+class _Encoder:
+    """Compresses a response a chunk at a time"""
+
+    def __init__(self, encoding: str, levels: Tuple[int, int, int]):
+        brotli_quality, zstd_level, gzip_level = levels
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=brotli_quality, mode=brotli.MODE_TEXT)
+        elif encoding == "zstd":
+            self.compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+        else:
+            self.compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress part of the response, flushed so the client can decode it"""
+        if self.encoding == "br":
+            return self.compressor.process(data) + self.compressor.flush()
+        if self.encoding == "zstd":
+            return self.compressor.compress(data) + self.compressor.flush(
+                zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the end of the response"""
+        if self.encoding == "br":
+            return self.compressor.process(data) + self.compressor.finish()
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    The encodings the client accepts and their q-values, encodings the client
+    has refused (q=0) are excluded.
+    """
+    accepted = {}
+    for item in header.split(","):
+        encoding, _, parameters = item.strip().partition(";")
+        encoding = encoding.strip().lower()
+        if not encoding:
+            continue
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition("=")
+        if parameter.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[encoding] = quality
+
+    wildcard = accepted.pop("*", None)
+    preferences = {}
+    for encoding in SMALL_PREFERENCES:
+        quality = accepted.get(encoding, wildcard)
+        if quality:
+            preferences[encoding] = quality
+    return preferences
+
+
+def choose_encoding(accepted: Dict[str, float], large: bool) -> str:
+    preferences = LARGE_PREFERENCES if large else SMALL_PREFERENCES
+    return max(accepted, key=lambda encoding: (accepted[encoding], -preferences.index(encoding)))
+
+
+class CompressionMiddleware:
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE, large_size: int = LARGE_SIZE
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.large_size = large_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = {}
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accepted = parse_accept_encoding(value.decode("latin-1"))
+                break
+        if not accepted:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, accepted, self.minimum_size, self.large_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, accepted: Dict[str, float], minimum_size: int, large_size: int):
+        self._send = send
+        self.accepted = accepted
+        self.minimum_size = minimum_size
+        self.large_size = large_size
+        self.start_message: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            # hold the headers until we've seen the body
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":  # pragma: no cover
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is not None:
+            chunk = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        # this is the first part of the body, decide whether to compress it
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        compressible = COMPRESSIBLE_TYPES.match(headers.get("content-type", "")) is not None
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+
+        if (
+            not compressible
+            or "content-encoding" in headers
+            or self.start_message["status"] in (204, 206, 304)
+            or (not more_body and len(body) < self.minimum_size)
+        ):
+            self.passthrough = True
+            await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        large = more_body or len(body) >= self.large_size
+        encoding = choose_encoding(self.accepted, large)
+        self.encoder = _Encoder(encoding, LARGE_LEVELS if large else SMALL_LEVELS)
+        headers["Content-Encoding"] = encoding
+
+        if more_body:
+            # the length isn't known until the stream ends
+            del headers["Content-Length"]
+            await self._send(self.start_message)
+            await self._send(
+                {"type": "http.response.body", "body": self.encoder.chunk(body), "more_body": True}
+            )
+            return
+
+        compressed = self.encoder.finish(body)
+        headers["Content-Length"] = str(len(compressed))
+        await self._send(self.start_message)
+        await self._send({"type": "http.response.body", "body": compressed})
 
 
 def bind(app: FastAPI):
-    app.add_middleware(BrotliMiddleware)
+    app.add_middleware(CompressionMiddleware)
@@ -10,12 +10,18 @@ from typing import Optional
 from typing import Union
 
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import Path
 from fastapi import Query
 from fastapi import Request
 from fastapi.responses import ORJSONResponse
 
-from tarchia.utils.catalogs import load_commit
+from tarchia.api.dependencies import get_catalog
+from tarchia.api.dependencies import get_storage
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.interfaces.storage.storage_provider import StorageProvider
+from tarchia.utils.catalogs import aload_commit
+from tarchia.utils.catalogs import aload_history
 from tarchia.utils.constants import COMMITS_ROOT
 from tarchia.utils.constants import HISTORY_ROOT
 from tarchia.utils.constants import IDENTIFIER_REG_EX
@@ -34,9 +40,10 @@ async def get_table_commit(
         description="The commit to retrieve.", pattern=SHA_OR_HEAD_REG_EX
     ),
     filters: Optional[str] = Query(None, description="Filters to push to manifest reader"),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
 ):
-    from tarchia.interfaces.storage import storage_factory
-    from tarchia.metadata.manifests import get_manifest
+    from tarchia.metadata.manifests import aget_manifest
     from tarchia.metadata.manifests.pruning import parse_filters
     from tarchia.utils import build_root
     from tarchia.utils import get_base_url
@@ -45,20 +52,21 @@ async def get_table_commit(
     base_url = get_base_url(request=request)
 
     # read the data from the catalog for this table
-    catalog_entry = identify_table(owner, table)
+    catalog_entry = identify_table(owner, table, catalog_provider=catalog_provider)
     table_id = catalog_entry.table_id
     if commit_sha == "head":
         commit_sha = catalog_entry.current_commit_sha
 
     commit_root = build_root(COMMITS_ROOT, owner=owner, table_id=table_id)
-    storage_provider = storage_factory()
-    commit_entry = load_commit(storage_provider, commit_root, commit_sha)
+    commit_entry = await aload_commit(storage_provider, commit_root, commit_sha)
 
     # retrieve the list of blobs from the manifests
-    filters = parse_filters(filters, commit_entry.table_schema)
+    filter_conditions = parse_filters(filters, commit_entry.table_schema)
     blobs = [
         {"path": entry.file_path, "bytes": entry.file_size, "records": entry.record_count}
-        for entry in get_manifest(commit_entry.manifest_path, storage_provider, filters)
+        for entry in await aget_manifest(
+            commit_entry.manifest_path, storage_provider, filter_conditions
+        )
     ]
 
     # build the response
@@ -93,8 +101,9 @@ async def get_list_of_table_commits(
     before: datetime.datetime = Query(None, description="Filter commits before this date."),
     after: datetime.datetime = Query(None, description="Filter commits after this date."),
     page_size: int = Query(100, description="Maximum items to show."),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
 ):
-    from tarchia.interfaces.storage import storage_factory
     from tarchia.metadata.history import HistoryTree
     from tarchia.utils import build_root
     from tarchia.utils import get_base_url
@@ -103,15 +112,14 @@ async def get_list_of_table_commits(
     base_url = get_base_url(request=request)
 
     # read the data from the catalog for this table
-    catalog_entry = identify_table(owner, table)
+    catalog_entry = identify_table(owner, table, catalog_provider=catalog_provider)
     table_id = catalog_entry.table_id
 
-    storage_provider = storage_factory()
     history_root = build_root(HISTORY_ROOT, owner=owner, table_id=table_id)
     history = None
     if catalog_entry.current_history:
         history_file = f"{history_root}/history-{catalog_entry.current_history}.avro"
-        history_raw = storage_provider.read_blob(history_file)
+        history_raw = await aload_history(storage_provider, history_file)
         if history_raw:
             history = HistoryTree.load_from_avro(history_raw, branch)
 
@@ -5,32 +5,54 @@ Transaction control
 @router.post("/transactions/commit")    -> [POST]   /pull/commit
 @router.post("/transactions/stage")     -> [POST]   /pull/stage
 @router.post("/transactions/truncate")  -> [POST]   /pull/truncate
+                                        -> [POST]   /pull/delete
 @router.patch("/transaction/encryption")-> [PATCH]  /pull/encryption
                                         -> [POST]   /pull/abort
 """
 
+import asyncio
 import base64
 import hashlib
+import hmac
+import random
 import time
+from typing import Dict
 from typing import List
 from typing import Literal
+from typing import Optional
+from typing import Tuple
 from typing import Union
 
+import numpy
 import orjson
+import zstandard
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Request
 
+from tarchia.api.dependencies import get_catalog
+from tarchia.api.dependencies import get_storage
+from tarchia.exceptions import InvalidFilterError
 from tarchia.exceptions import TransactionError
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.interfaces.storage.storage_provider import StorageProvider
+from tarchia.metadata.commit_coordinator import CommitCoordinator
 from tarchia.models import Commit
 from tarchia.models import CommitRequest
+from tarchia.models import DeleteFilesRequest
+from tarchia.models import Schema
 from tarchia.models import StageFilesRequest
+from tarchia.models import TableCatalogEntry
+from tarchia.models import TableDisposition
 from tarchia.models import Transaction
 from tarchia.models import TransactionRequest
+from tarchia.models.manifest_models import ManifestEntry
 from tarchia.utils import config
 from tarchia.utils import get_base_url
-from tarchia.utils.catalogs import load_commit
+from tarchia.utils.catalogs import aload_commit
+from tarchia.utils.catalogs import aload_history
 from tarchia.utils.constants import COMMITS_ROOT
 from tarchia.utils.constants import HISTORY_ROOT
 from tarchia.utils.constants import IDENTIFIER_REG_EX
@@ -40,32 +62,45 @@ from tarchia.utils.constants import SHA_OR_HEAD_REG_EX
 
 router = APIRouter()
 
+MAXIMUM_COMMIT_ATTEMPTS = 10
+COMMIT_RETRY_BACKOFF_SECONDS = 0.01
+
+
+def _transaction_signer() -> bytes:
+    signer: Union[str, bytes] = config.TRANSACTION_SIGNER
+    if isinstance(signer, bytes):
+        return signer
+    return str(signer).encode()
+
 
 def encode_and_sign_transaction(transaction: Transaction) -> str:
     """
     Encode and sign a transaction.
 
+    The transaction is compressed and encoded so large transactions stay compact,
+    the encoded form is signed with an HMAC so it can be verified before it is
+    decoded.
+
     Parameters:
         transaction (Transaction): The transaction object to be encoded and signed.
 
     Returns:
         str: The encoded and signed transaction as a string.
     """
-    SIGNER = config.TRANSACTION_SIGNER
-    if not isinstance(SIGNER, bytes):
-        SIGNER = str(SIGNER).encode()
-
-    transaction_bytes = transaction.serialize()
-    encoded = base64.b64encode(transaction_bytes).decode()
-    signature = hashlib.sha256(SIGNER + transaction_bytes).hexdigest()
+    transaction_bytes = zstandard.ZstdCompressor().compress(transaction.serialize())
+    encoded = base64.urlsafe_b64encode(transaction_bytes)
+    signature = hmac.new(_transaction_signer(), encoded, hashlib.sha256).hexdigest()
 
-    return f"{encoded}.{signature}"
+    return f"{encoded.decode()}.{signature}"
 
 
 def verify_and_decode_transaction(transaction_data: str) -> Transaction:
     """
     Verify and decode a transaction.
 
+    The signature is checked, in constant time, before anything in the token is
+    decoded.
+
     Parameters:
         transaction_data (str): The encoded and signed transaction data as a string.
 
@@ -75,66 +110,269 @@ def verify_and_decode_transaction(transaction_data: str) -> Transaction:
     Raises:
         TransactionError: If the transaction is invalid or expired.
     """
-    SIGNER = config.TRANSACTION_SIGNER
-    if not isinstance(SIGNER, bytes):
-        SIGNER = str(SIGNER).encode()
-
     if not transaction_data:
         raise TransactionError("No Transaction.")
-    if "." not in transaction_data:
+    parts = transaction_data.split(".")
+    if len(parts) != 2:
         raise TransactionError("Transaction incorrectly formatted.")
 
-    transaction, signature = transaction_data.split(".")
+    encoded, signature = (part.encode() for part in parts)
+
+    recreated_signature = hmac.new(_transaction_signer(), encoded, hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(signature, recreated_signature.encode()):
+        raise TransactionError("Transaction signature invalid.")
 
-    decoded = base64.b64decode(transaction)
+    decoded = zstandard.ZstdDecompressor().decompress(base64.urlsafe_b64decode(encoded))
     transaction = orjson.loads(decoded)
 
-    if int(transaction["expires_at"]) > time.time():
+    if int(transaction["expires_at"]) < time.time():
         raise TransactionError("Transaction Expired")
 
-    recreated_signature = hashlib.sha256(SIGNER + decoded).hexdigest()
-    if signature != recreated_signature:
-        raise TransactionError("Transaction signature invalid.")
-
     return Transaction(**transaction)
 
 
-def build_new_manifest(old_manifest, transaction, schema):
+def build_new_manifest(
+    old_manifest: List[ManifestEntry],
+    transaction: Transaction,
+    schema: Schema,
+    prebuilt_entries: Optional[Dict[str, ManifestEntry]] = None,
+) -> Tuple[List[ManifestEntry], List[ManifestEntry], List[ManifestEntry]]:
+    """
+    Apply the changes in a transaction to a manifest.
+
+    Removing files only needs the manifest entries, no data files are read. Files
+    can only be removed by a filter if the bounds in the manifest show that every
+    record in the file matches, a file which may only partially match can't be
+    removed without being rewritten so the transaction is rejected.
+
+    Parameters:
+        old_manifest: List[ManifestEntry]
+            The manifest of the commit the transaction is based on
+        transaction: Transaction
+            The transaction to apply
+        schema: Schema
+            The schema the added files must conform to
+        prebuilt_entries: Dict[str, ManifestEntry] (optional)
+            Manifest entries already built for the added files, keyed by path,
+            an entry is only used if the file still has the checksum it records
+
+    Returns:
+        The new manifest, the entries added to it and the entries removed from it
+
+    Raises:
+        TransactionError: If a filter matches some, but not all, of a file.
+    """
     from tarchia.metadata.manifests import build_manifest_entry
+    from tarchia.metadata.manifests import data_file_checksum
+    from tarchia.metadata.manifests.pruning import matches_all
+    from tarchia.metadata.manifests.pruning import parse_filters
+    from tarchia.metadata.manifests.pruning import prune
+
+    prebuilt_entries = prebuilt_entries or {}
+    deletions = set(transaction.deletions)
+    prefixes = tuple(transaction.deletion_prefixes)
+    try:
+        filters = [parse_filters(f, schema, strict=True) for f in transaction.deletion_filters]
+    except InvalidFilterError as err:
+        raise TransactionError(f"Transaction failed: {err}") from err
+
+    def is_removed(entry: ManifestEntry) -> bool:
+        if entry.file_path in deletions or (prefixes and entry.file_path.startswith(prefixes)):
+            return True
+        if any(matches_all(entry, condition) for condition in filters):
+            return True
+        for condition in filters:
+            bounded = all(
+                column in entry.lower_bounds and column in entry.upper_bounds
+                for column, _, _ in condition
+            )
+            if not bounded or not prune(entry, condition):
+                raise TransactionError(
+                    f"Transaction failed: Some, but not all, of the records in '{entry.file_path}' may match the delete filters"
+                )
+        return False
 
     existing_entries = {e.file_path for e in old_manifest}
     new_entries = [
         e
-        for e in transaction.additions
-        if e not in set(transaction.deletions).union(existing_entries)
+        for e in dict.fromkeys(transaction.additions)
+        if e not in deletions.union(existing_entries)
     ]
 
-    new_manifest = [entry for entry in old_manifest if entry not in transaction.deletions]
-    new_manifest.extend(build_manifest_entry(entry, schema) for entry in new_entries)
+    new_manifest = []
+    removed_entries = []
+    for entry in old_manifest:
+        if transaction.truncate or is_removed(entry):
+            removed_entries.append(entry)
+        else:
+            new_manifest.append(entry)
+
+    def added_entry(path: str) -> ManifestEntry:
+        # the file may have been rewritten since its entry was built when staged
+        prebuilt = prebuilt_entries.get(path)
+        if prebuilt is not None and prebuilt.sha256_checksum == data_file_checksum(path):
+            return prebuilt
+        return build_manifest_entry(path, schema)
+
+    added_entries = [added_entry(entry) for entry in new_entries]
+    new_manifest.extend(added_entries)
+
+    return new_manifest, added_entries, removed_entries
+
+
+def merge_transactions(transactions: List[Transaction]) -> Transaction:
+    """Combine additive transactions for the same table into a single transaction"""
+    if len(transactions) == 1:
+        return transactions[0]
+    merged = transactions[0].model_copy(deep=True)
+    merged.additions = list(dict.fromkeys(path for t in transactions for path in t.additions))
+    return merged
+
+
+def is_additive(transaction: Transaction) -> bool:
+    """A transaction is additive if it only adds files to the table"""
+    return not (
+        transaction.truncate
+        or transaction.deletions
+        or transaction.deletion_prefixes
+        or transaction.deletion_filters
+    )
+
 
-    return new_manifest
+async def load_intervening_commits(
+    storage_provider, commit_root: str, head_sha: str, base_sha: str
+) -> List[Commit]:
+    """
+    Walk back from the HEAD commit to (but not including) the base commit.
+
+    Parameters:
+        storage_provider: StorageProvider
+            Inject the library to access storage
+        commit_root: str
+            The location of the commit files for the table
+        head_sha: str
+            The commit to start walking from
+        base_sha: str
+            The commit to stop walking at
+
+    Returns:
+        List[Commit]: The commits made after the base commit, newest first.
+
+    Raises:
+        TransactionError: If the base commit isn't an ancestor of HEAD.
+    """
+    commits = []
+    commit_sha = head_sha
+    while commit_sha != base_sha:
+        if commit_sha is None:
+            raise TransactionError("Transaction failed: Parent commit not in table history")
+        commit = await aload_commit(storage_provider, commit_root, commit_sha)
+        commits.append(commit)
+        commit_sha = commit.parent_commit_sha
+    return commits
+
+
+async def rebase_transaction(
+    storage_provider,
+    commit_root: str,
+    head_sha: str,
+    transaction: Transaction,
+    base_sha: Optional[str] = None,
+) -> str:
+    """
+    Move a transaction from the commit it was based on to the current HEAD.
+
+    This is only safe if the transaction and all of the commits made since its
+    base commit were purely additive, the staged additions are then applied on
+    top of the HEAD manifest and can't conflict with anything already there.
+
+    Parameters:
+        storage_provider: StorageProvider
+            Inject the library to access storage
+        commit_root: str
+            The location of the commit files for the table
+        head_sha: str
+            The current HEAD commit of the table
+        transaction: Transaction
+            The transaction being committed
+        base_sha: str (optional)
+            The commit the transaction is currently based on, defaults to the
+            transaction's parent commit
+
+    Returns:
+        str: The commit to use as the parent of the new commit.
+
+    Raises:
+        TransactionError: If the transaction can't be rebased.
+    """
+    if base_sha is None:
+        base_sha = transaction.parent_commit_sha
+
+    if not is_additive(transaction):
+        raise TransactionError("Transaction failed: Commit out of date")
+
+    intervening_commits = await load_intervening_commits(
+        storage_provider, commit_root, head_sha, base_sha
+    )
+    if any(commit.removed_files or commit.truncated for commit in intervening_commits):
+        raise TransactionError("Transaction failed: Commit out of date")
+
+    return head_sha
 
 
 def xor_hex_strings(hex_strings: List[str]) -> str:
     """
     XOR a list of hexadecimal strings and return the result as a hexadecimal string.
 
+    The strings are decoded into a single contiguous buffer and reduced with
+    numpy, rather than XORing each string in turn.
+
     Parameters:
         hex_strings: List[str]
-            The list of hexadecimal strings to XOR.
+            The list of hexadecimal strings to XOR, all must be SHA-256 hashes.
 
     Returns:
         str
             The resulting hexadecimal string after XOR.
     """
+    hex_strings = [h for h in hex_strings if h]
     if not hex_strings:
         return "0" * 64  # Return a 64-character string of zeros if the list is empty
 
-    result_bytes = bytes.fromhex(hex_strings[0])
-    for hex_str in hex_strings[1:]:
-        result_bytes = bytes(a ^ b for a, b in zip(result_bytes, bytes.fromhex(hex_str)))
+    # each 32 byte hash is viewed as four 64 bit words, to XOR 8 bytes at a time
+    buffer = numpy.frombuffer(bytes.fromhex("".join(hex_strings)), dtype=numpy.uint64)
+    result = numpy.bitwise_xor.reduce(buffer.reshape(-1, 4), axis=0)
+
+    return result.tobytes().hex()
+
+
+def update_data_hash(
+    data_hash: Optional[str],
+    added_entries: List[ManifestEntry],
+    removed_entries: List[ManifestEntry],
+) -> str:
+    """
+    Calculate the data hash of a commit from the data hash of its parent.
+
+    The data hash is the XOR of the checksums of all of the files in the manifest,
+    XOR is its own inverse so we can remove files by XORing them in again, which
+    means we don't need to read the whole manifest to update the hash.
 
-    return result_bytes.hex()
+    Parameters:
+        data_hash: str
+            The data hash of the parent commit
+        added_entries: List[ManifestEntry]
+            The files added to the manifest
+        removed_entries: List[ManifestEntry]
+            The files removed from the manifest
+
+    Returns:
+        str: The data hash of the new commit.
+    """
+    checksums = [data_hash or "0" * 64]
+    checksums.extend(e.sha256_checksum for e in added_entries)
+    checksums.extend(e.sha256_checksum for e in removed_entries)
+    return xor_hex_strings(checksums)
 
 
 @router.post("/tables/{owner}/{table}/commits/{commit_sha}/pull/start")
@@ -144,21 +382,21 @@ async def start_transaction(
     commit_sha: Union[str, Literal["head"]] = Path(
         description="The commit to retrieve.", pattern=SHA_OR_HEAD_REG_EX
     ),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
 ):
-    from tarchia.interfaces.storage import storage_factory
     from tarchia.utils import build_root
     from tarchia.utils import generate_uuid
     from tarchia.utils.catalogs import identify_table
 
-    catalog_entry = identify_table(owner=owner, table=table)
+    catalog_entry = identify_table(owner=owner, table=table, catalog_provider=catalog_provider)
     table_id = catalog_entry.table_id
 
     if commit_sha == "head":
         commit_sha = catalog_entry.current_commit_sha
 
     commit_root = build_root(COMMITS_ROOT, owner=owner, table_id=catalog_entry.table_id)
-    storage_provider = storage_factory()
-    parent_commit = load_commit(storage_provider, commit_root, commit_sha)
+    parent_commit = await aload_commit(storage_provider, commit_root, commit_sha)
 
     if parent_commit is None:
         raise TransactionError("Commit not found")
@@ -166,7 +404,7 @@ async def start_transaction(
     transaction_id = generate_uuid()
     transaction = Transaction(
         transaction_id=transaction_id,
-        expires_at=int(time.time()),
+        expires_at=int(time.time()) + config.TRANSACTION_LIFETIME_SECONDS,
         table_id=table_id,
         table=table,
         owner=owner,
@@ -181,126 +419,260 @@ async def start_transaction(
     return {"message": "Transaction started", "encoded_transaction": encoded_data}
 
 
-@router.post("/pull/commit")
-async def commit_transaction(request: Request, commit_request: CommitRequest):
+async def apply_transactions(
+    transactions: List[Transaction],
+    commit_message: str,
+    base_url: str,
+    catalog_provider: CatalogProvider,
+    storage_provider: StorageProvider,
+) -> Tuple[TableCatalogEntry, Commit]:
     """
-    Commits a transaction by verifying it, updating the manifest and commit,
-    and updating the catalog.
+    Apply one or more transactions for the same table as a single commit.
+
+    Other commits may have been made since the transactions started, or may land
+    while we're committing (the catalog is updated with a compare-and-swap so we
+    never overwrite them). If the transactions and all of those commits only add
+    files, the transactions are rebased onto the new HEAD rather than rejected.
 
     Parameters:
-        encoded_transaction (str): Encoded transaction string.
-        force (bool): Force transaction to complete even if the commit is not the latest.
+        transactions: List[Transaction]
+            The transactions to commit, more than one must all be additive
+        commit_message: str
+            The message for the commit
+        base_url: str
+            The URL of this service, for the webhook payloads
+        catalog_provider: CatalogProvider
+            The catalog to commit to
+        storage_provider: StorageProvider
+            The storage the metadata is written to
 
     Returns:
-        dict: Result of the transaction commit.
-    """
-
-    raise NotImplementedError("read notes")
+        Tuple[TableCatalogEntry, Commit]: The updated catalog entry and the new commit.
     """
-    get all of the commits between HEAD and the parent, if any include deletes
-    then fail this commit, if they're all additive then we can continue
-
-    make sure we change the parent commit to the HEAD commit
-    """
-
-    from tarchia.interfaces.catalog import catalog_factory
-    from tarchia.interfaces.storage import storage_factory
+    from tarchia.interfaces.storage.storage_provider import run_in_io_executor
     from tarchia.metadata.history import HistoryTree
-    from tarchia.metadata.manifests import get_manifest
-    from tarchia.metadata.manifests import write_manifest
+    from tarchia.metadata.manifests import aget_manifest
+    from tarchia.metadata.manifests import awrite_manifest
+    from tarchia.metadata.staging import load_staged_entries
     from tarchia.utils import build_root
     from tarchia.utils import generate_uuid
     from tarchia.utils.catalogs import identify_table
 
-    base_url = get_base_url(request)
-    timestamp = int(time.time_ns() / 1e6)
-    uuid = generate_uuid()
-
-    try:
-        transaction = verify_and_decode_transaction(commit_request.encoded_transaction)
-        catalog_entry = identify_table(owner=transaction.owner, table=transaction.table)
-
-        if (
-            transaction.parent_commit_sha
-            and catalog_entry.current_commit_sha != transaction.parent_commit_sha
-        ):
-            raise TransactionError("Transaction failed: Commit out of date")
-
-        owner = catalog_entry.owner
-        table_id = catalog_entry.table_id
-
-        commit_root = build_root(COMMITS_ROOT, owner=owner, table_id=table_id)
-        manifest_root = build_root(MANIFEST_ROOT, owner=owner, table_id=table_id)
-        history_root = build_root(HISTORY_ROOT, owner=owner, table_id=table_id)
-
-        storage_provider = storage_factory()
-        catalog_provider = catalog_factory()
+    transaction = transactions[0]
+    catalog_entry = identify_table(
+        owner=transaction.owner, table=transaction.table, catalog_provider=catalog_provider
+    )
 
-        # get the commit we're based on
-        old_commit = load_commit(storage_provider, commit_root, transaction.parent_commit_sha)
-        old_manifest = (
-            get_manifest(old_commit.manifest_path, storage_provider, None)
-            if old_commit.manifest_path
-            else []
-        )
+    owner = catalog_entry.owner
+    table_id = catalog_entry.table_id
 
-        new_manifest = build_new_manifest(old_manifest, transaction, transaction.table_schema)
-        manifest_path = f"{manifest_root}/manifest-{uuid}.avro"
-        write_manifest(
-            location=manifest_path, storage_provider=storage_provider, entries=new_manifest
+    commit_root = build_root(COMMITS_ROOT, owner=owner, table_id=table_id)
+    manifest_root = build_root(MANIFEST_ROOT, owner=owner, table_id=table_id)
+    history_root = build_root(HISTORY_ROOT, owner=owner, table_id=table_id)
+
+    # if other commits have been made since the transactions started we may be
+    # able to apply our changes on top of them
+    head_commit_sha = catalog_entry.current_commit_sha
+    parent_commit_sha = transaction.parent_commit_sha
+    for pending in transactions:
+        if pending.parent_commit_sha and pending.parent_commit_sha != head_commit_sha:
+            parent_commit_sha = await rebase_transaction(
+                storage_provider, commit_root, head_commit_sha, pending
+            )
+    transaction = merge_transactions(transactions)
+
+    # use the manifest entries built while the files were being staged
+    prebuilt_entries = {}
+    for pending in transactions:
+        prebuilt_entries.update(await load_staged_entries(storage_provider, pending))
+
+    for attempt in range(MAXIMUM_COMMIT_ATTEMPTS):
+        timestamp = int(time.time_ns() / 1e6)
+        uuid = generate_uuid()
+
+        # get the commit we're based on, truncating doesn't need the old manifest
+        old_commit = await aload_commit(storage_provider, commit_root, parent_commit_sha)
+        if transaction.truncate:
+            old_manifest = []
+            parent_data_hash = None
+        else:
+            old_manifest = await aget_manifest(old_commit.manifest_path, storage_provider, None)
+            parent_data_hash = old_commit.data_hash
+
+        # building entries for files which weren't prebuilt reads the data files
+        new_manifest, added_entries, removed_entries = await run_in_io_executor(
+            build_new_manifest,
+            old_manifest,
+            transaction,
+            transaction.table_schema,
+            prebuilt_entries,
         )
+        manifest_path = None
+        if new_manifest:
+            manifest_path = f"{manifest_root}/manifest-{uuid}.avro"
+            await awrite_manifest(
+                location=manifest_path, storage_provider=storage_provider, entries=new_manifest
+            )
 
         # hash the manifests together
-        combined_hash = xor_hex_strings([e.sha256_checksum for e in new_manifest])
+        combined_hash = update_data_hash(parent_data_hash, added_entries, removed_entries)
 
         # build the new commit record
         commit = Commit(
             data_hash=combined_hash,
             user="user",
-            message=commit_request.commit_message,
+            message=commit_message,
             branch=MAIN_BRANCH,
-            parent_commit_sha=transaction.parent_commit_sha,
+            parent_commit_sha=parent_commit_sha,
             last_updated_ms=timestamp,
             manifest_path=manifest_path,
             table_schema=transaction.table_schema,
             encryption=transaction.encryption,
-            added_files=transaction.additions,
-            removed_files=transaction.deletions,
+            added_files=[entry.file_path for entry in added_entries],
+            removed_files=[entry.file_path for entry in removed_entries],
+            truncated=transaction.truncate,
         )
 
-        commit_path = f"{commit_root}/commit-{commit.commit_sha}.json"
-        storage_provider.write_blob(commit_path, commit.serialize())
-
+        history_raw = None
         if catalog_entry.current_history:
             history_file = f"{history_root}/history-{catalog_entry.current_history}.avro"
-            history_raw = storage_provider.read_blob(history_file)
-            if history_raw:
-                history = HistoryTree.load_from_avro(history_raw)
-            else:
-                history = HistoryTree(MAIN_BRANCH)
+            history_raw = await aload_history(storage_provider, history_file)
+        if history_raw:
+            history = HistoryTree.load_from_avro(history_raw)
         else:
             history = HistoryTree(MAIN_BRANCH)
-
         history.commit(commit.history_entry)
-        history_raw = history.save_to_avro()
+
+        commit_path = f"{commit_root}/commit-{commit.commit_sha}.json"
         history_file = f"{history_root}/history-{uuid}.avro"
-        storage_provider.write_blob(history_file, history_raw)
+        await asyncio.gather(
+            storage_provider.awrite_blob(commit_path, commit.serialize()),
+            storage_provider.awrite_blob(history_file, history.save_to_avro()),
+        )
 
         catalog_entry.last_updated_ms = timestamp
         catalog_entry.current_commit_sha = commit.commit_sha
         catalog_entry.current_history = uuid
-        catalog_provider.update_table(catalog_entry.table_id, catalog_entry)
-
-        # trigger webhooks - this should be async so we don't wait for the outcome
-        catalog_entry.trigger_event(
-            catalog_entry.EventTypes.NEW_COMMIT,
-            {
-                "event": "NEW_COMMIT",
-                "table": f"{catalog_entry.owner}.{catalog_entry.name}",
-                "commit": commit.commit_sha,
-                "url": f"{base_url}/v1/tables/{catalog_entry.owner}/{catalog_entry.name}/commits/{commit.commit_sha}",
-            },
+        if catalog_provider.swap_commit(table_id, parent_commit_sha, catalog_entry):
+            break
+
+        # another commit beat us to the catalog, try to rebase onto it
+        catalog_entry = identify_table(
+            owner=transaction.owner, table=transaction.table, catalog_provider=catalog_provider
+        )
+        parent_commit_sha = await rebase_transaction(
+            storage_provider,
+            commit_root,
+            catalog_entry.current_commit_sha,
+            transaction,
+            parent_commit_sha,
+        )
+
+        # back off so writers racing for the same table spread out
+        backoff = COMMIT_RETRY_BACKOFF_SECONDS * (2**attempt)
+        await asyncio.sleep(random.uniform(0, backoff))  # nosec
+    else:
+        raise TransactionError(
+            f"Transaction failed: Unable to commit after {MAXIMUM_COMMIT_ATTEMPTS} attempts"
+        )
+
+    # trigger webhooks - this should be async so we don't wait for the outcome
+    catalog_entry.trigger_event(
+        catalog_entry.EventTypes.NEW_COMMIT,
+        {
+            "event": "NEW_COMMIT",
+            "table": f"{catalog_entry.owner}.{catalog_entry.name}",
+            "commit": commit.commit_sha,
+            "url": f"{base_url}/v1/tables/{catalog_entry.owner}/{catalog_entry.name}/commits/{commit.commit_sha}",
+        },
+    )
+
+    return catalog_entry, commit
+
+
+async def _apply_commit_batch(
+    batch: List[Tuple[Transaction, str, str, CatalogProvider, StorageProvider]],
+) -> List[Tuple[TableCatalogEntry, Commit]]:
+    """
+    Apply a group of transactions collected by the commit coordinator, batches
+    are keyed by the table and the providers so they all share the providers.
+    """
+    transactions = [item[0] for item in batch]
+    if any(t.table_schema != transactions[0].table_schema for t in transactions):
+        raise TransactionError("Transactions with different schemas can't be grouped")
+    commit_message = "\n".join(dict.fromkeys(item[1] for item in batch))
+    _, _, base_url, catalog_provider, storage_provider = batch[0]
+    result = await apply_transactions(
+        transactions, commit_message, base_url, catalog_provider, storage_provider
+    )
+    return [result] * len(batch)
+
+
+commit_coordinator = CommitCoordinator(
+    _apply_commit_batch, window_seconds=config.GROUP_COMMIT_WINDOW_MS / 1000
+)
+
+
+@router.post("/pull/commit")
+async def commit_transaction(
+    request: Request,
+    commit_request: CommitRequest,
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
+):
+    """
+    Commits a transaction by verifying it, updating the manifest and commit,
+    and updating the catalog.
+
+    Additive commits to CONTINUOUS tables are held for a short window so commits
+    arriving together can be written as a single commit.
+
+    Parameters:
+        encoded_transaction (str): Encoded transaction string.
+        force (bool): Force transaction to complete even if the commit is not the latest.
+
+    Returns:
+        dict: Result of the transaction commit.
+    """
+    from tarchia.metadata.staging import discard_staged_files
+    from tarchia.metadata.staging import load_staged_files
+    from tarchia.utils.catalogs import identify_table
+
+    base_url = get_base_url(request)
+
+    try:
+        transaction = verify_and_decode_transaction(commit_request.encoded_transaction)
+        catalog_entry = identify_table(
+            owner=transaction.owner, table=transaction.table, catalog_provider=catalog_provider
         )
+        transaction.additions.extend(await load_staged_files(storage_provider, transaction))
+
+        if (
+            config.GROUP_COMMIT_WINDOW_MS > 0
+            and catalog_entry.disposition == TableDisposition.CONTINUOUS
+            and is_additive(transaction)
+        ):
+            catalog_entry, commit = await commit_coordinator.submit(
+                (catalog_entry.table_id, id(catalog_provider), id(storage_provider)),
+                (
+                    transaction,
+                    commit_request.commit_message,
+                    base_url,
+                    catalog_provider,
+                    storage_provider,
+                ),
+            )
+        else:
+            catalog_entry, commit = await apply_transactions(
+                [transaction],
+                commit_request.commit_message,
+                base_url,
+                catalog_provider,
+                storage_provider,
+            )
+
+        # the staged files are in the commit, the staging segments aren't needed
+        await discard_staged_files(storage_provider, transaction)
 
         return {
             "table": f"{catalog_entry.owner}.{catalog_entry.name}",
@@ -316,17 +688,25 @@ async def commit_transaction(request: Request, commit_request: CommitRequest):
 
 
 @router.post("/pull/stage")
-async def add_files_to_transaction(stage: StageFilesRequest):
+async def add_files_to_transaction(
+    stage: StageFilesRequest, storage_provider: StorageProvider = Depends(get_storage)
+):
     """
     Add files to a table.
 
     This operation can only be called as part of a transaction and does not make
     any changes to the table until the commit end-point is called.
     """
+    from tarchia.metadata.staging import stage_files
+
     transaction = verify_and_decode_transaction(stage.encoded_transaction)
 
-    # Add file paths to the transaction's addition list
-    transaction.additions.extend(stage.paths)
+    # The staged files are written to a segment in the staging area rather than
+    # carried in the token, the token only references the segments. The manifest
+    # entries for the files are built in the background while the transaction
+    # is open.
+    segment_id = await stage_files(storage_provider, transaction, stage.paths)
+    transaction.staged_segments.append(segment_id)
 
     # Reissue the updated transaction token
     new_encoded_transaction = encode_and_sign_transaction(transaction)
@@ -343,13 +723,15 @@ async def truncate_all_files(tran: TransactionRequest):
     """
     transaction = verify_and_decode_transaction(tran.encoded_transaction)
 
-    if len(transaction.additions) != 0:
+    if len(transaction.additions) != 0 or len(transaction.staged_segments) != 0:
         raise TransactionError("Use 'truncate' before staging files in transaction.")
 
     # truncate everything
     transaction.truncate = True
     transaction.additions = []
     transaction.deletions = []
+    transaction.deletion_prefixes = []
+    transaction.deletion_filters = []
 
     # Reissue the updated transaction token
     new_encoded_transaction = encode_and_sign_transaction(transaction)
@@ -359,12 +741,67 @@ async def truncate_all_files(tran: TransactionRequest):
     }
 
 
+@router.post("/pull/delete")
+async def delete_files(delete: DeleteFilesRequest):
+    """
+    Remove files from a table, by path, by prefix (e.g. a partition) or where all
+    of the records in the file match a filter.
+
+    The prefix is matched against the start of the file paths as-is, so a prefix
+    of 'year=2020/month=1' also matches 'year=2020/month=10', end a partition
+    prefix with '/' to only match the files in that partition. Every filter
+    clause must be usable, a clause which can't be parsed or names a column not
+    in the table's schema is rejected.
+
+    Only the table's metadata is changed, the data files are not read or deleted.
+
+    This operation can only be called as part of a transaction and does not make
+    any changes to the table until the commit end-point is called.
+    """
+    from tarchia.metadata.manifests.pruning import parse_filters
+
+    transaction = verify_and_decode_transaction(delete.encoded_transaction)
+
+    if not (delete.paths or delete.prefix or delete.filters):
+        raise HTTPException(status_code=400, detail="No files identified to delete.")
+    if delete.filters:
+        # unlike reads, a filter clause which is ignored would remove too much
+        try:
+            parse_filters(delete.filters, transaction.table_schema, strict=True)
+        except InvalidFilterError as err:
+            raise HTTPException(status_code=400, detail=str(err)) from err
+
+    # the prefixes and filters are resolved against the manifest when the
+    # transaction is committed, so the token doesn't grow with the table
+    transaction.deletions.extend(path for path in delete.paths if path not in transaction.deletions)
+    if delete.prefix:
+        transaction.deletion_prefixes.append(delete.prefix)
+    if delete.filters:
+        transaction.deletion_filters.append(delete.filters)
+
+    # Reissue the updated transaction token
+    new_encoded_transaction = encode_and_sign_transaction(transaction)
+    return {
+        "message": "Files removed in Transaction",
+        "encoded_transaction": new_encoded_transaction,
+    }
+
+
 @router.patch("/pull/encryption")
 async def update_encryption(tran: TransactionRequest):
     raise NotImplementedError("Create a commit")
 
 
 @router.patch("/pull/abort")
-async def abort_pull(tran: TransactionRequest):
-    """doesn't do anything, exists for conceptual completeness"""
+async def abort_pull(
+    tran: TransactionRequest, storage_provider: StorageProvider = Depends(get_storage)
+):
+    """
+    Abort a transaction, the table isn't changed and the files staged to the
+    transaction are discarded.
+    """
+    from tarchia.metadata.staging import discard_staged_files
+
+    transaction = verify_and_decode_transaction(tran.encoded_transaction)
+    await discard_staged_files(storage_provider, transaction)
     return {"message": "Transaction Aborted"}
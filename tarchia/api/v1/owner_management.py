@@ -17,11 +17,14 @@ Exceptions:
 """
 
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import Path
 from fastapi.responses import ORJSONResponse
 
+from tarchia.api.dependencies import get_catalog
 from tarchia.exceptions import AlreadyExistsError
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
 from tarchia.models import CreateOwnerRequest
 from tarchia.models import OwnerEntry
 from tarchia.models import UpdateValueRequest
@@ -31,7 +34,9 @@ router = APIRouter()
 
 
 @router.post("/owners", response_class=ORJSONResponse)
-async def create_owner(request: CreateOwnerRequest):
+async def create_owner(
+    request: CreateOwnerRequest, catalog_provider: CatalogProvider = Depends(get_catalog)
+):
     """
     Create a new owner.
 
@@ -42,11 +47,8 @@ async def create_owner(request: CreateOwnerRequest):
     Returns:
         JSON response with a message and owner name.
     """
-    from tarchia.interfaces.catalog import catalog_factory
     from tarchia.utils import generate_uuid
 
-    catalog_provider = catalog_factory()
-
     catalog_entry = catalog_provider.get_owner(name=request.name)
     if catalog_entry:
         raise AlreadyExistsError(entity=request.name)
@@ -71,6 +73,7 @@ async def create_owner(request: CreateOwnerRequest):
 @router.get("/owners/{owner}", response_class=ORJSONResponse)
 async def read_owner(
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     """
     Read an owner by name.
@@ -84,7 +87,7 @@ async def read_owner(
     """
     from tarchia.utils.catalogs import identify_owner
 
-    entry = identify_owner(owner)
+    entry = identify_owner(owner, catalog_provider=catalog_provider)
     return entry.as_dict()
 
 
@@ -93,6 +96,7 @@ async def update_owner(
     attribute: str,
     request: UpdateValueRequest,
     owner: str = Path(description="The owner.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     """
     Update an attribute of an owner.
@@ -108,14 +112,12 @@ async def update_owner(
     Returns:
         JSON response with a message, owner name, and updated attribute.
     """
-    from tarchia.interfaces.catalog import catalog_factory
     from tarchia.utils.catalogs import identify_owner
 
     if attribute not in {"steward", "description"}:
         raise HTTPException(status_code=405, detail=f"Attribute {attribute} cannot be PATCHed.")
 
-    catalog_provider = catalog_factory()
-    entry = identify_owner(owner)
+    entry = identify_owner(owner, catalog_provider=catalog_provider)
     setattr(entry, attribute, request.value)
     catalog_provider.update_owner(entry)
 
@@ -123,7 +125,10 @@ async def update_owner(
 
 
 @router.delete("/owners/{owner}", response_class=ORJSONResponse)
-async def delete_owner(owner: str = Path(description="The owner.", pattern=IDENTIFIER_REG_EX)):
+async def delete_owner(
+    owner: str = Path(description="The owner.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+):
     """
     Delete an owner.
 
@@ -134,16 +139,16 @@ async def delete_owner(owner: str = Path(description="The owner.", pattern=IDENT
     Returns:
         JSON response with a message and owner name.
     """
-    from tarchia.interfaces.catalog import catalog_factory
     from tarchia.utils.catalogs import identify_owner
+    from tarchia.utils.permissions import invalidate
 
-    entry = identify_owner(owner)
-    catalog_provider = catalog_factory()
+    entry = identify_owner(owner, catalog_provider=catalog_provider)
 
     if catalog_provider.list_tables(owner):
         raise HTTPException(status_code=409, detail="Cannot delete an owner with active tables.")
 
     catalog_provider.delete_owner(entry.owner_id)
+    invalidate(owner)
 
     return {
         "message": "Owner Deleted",
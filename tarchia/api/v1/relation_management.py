@@ -1,18 +1,21 @@
 """ """
 
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import Path
 from fastapi import Request
 from fastapi.responses import ORJSONResponse
 
+from tarchia.api.dependencies import get_catalog
+from tarchia.api.dependencies import get_storage
 from tarchia.exceptions import NotFoundError
 from tarchia.exceptions import TableNotFoundError
 from tarchia.exceptions import ViewNotFoundError
-from tarchia.interfaces.catalog import catalog_factory
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.interfaces.storage.storage_provider import StorageProvider
 from tarchia.utils.constants import IDENTIFIER_REG_EX
 
 router = APIRouter()
-catalog_provider = catalog_factory()
 
 
 @router.get("/relations/{owner}/{relation}", response_class=ORJSONResponse)
@@ -20,6 +23,8 @@ async def get_relation(
     request: Request,
     owner: str = Path(description="The owner of the relation.", pattern=IDENTIFIER_REG_EX),
     relation: str = Path(description="The name of the relation.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
 ):
     """
     When a user enters a relation in a query, we don't know if it's a
@@ -35,18 +40,26 @@ async def get_relation(
 
     try:
         # this will fail if the entry isn't a known table
-        identify_table(owner, relation)
+        identify_table(owner, relation, catalog_provider=catalog_provider)
         # call the get_table routine and return the result
-        response = await get_table(request, owner=owner, table=relation)
+        response = await get_table(
+            request,
+            owner=owner,
+            table=relation,
+            catalog_provider=catalog_provider,
+            storage_provider=storage_provider,
+        )
         return response
     except TableNotFoundError:
         pass
 
     try:
         # this will fail if the entry isn't a known view
-        identify_view(owner, relation)
+        identify_view(owner, relation, catalog_provider=catalog_provider)
         # call the get_view routine and return the result
-        response = await get_view(request, owner=owner, view=relation)
+        response = await get_view(
+            request, owner=owner, view=relation, catalog_provider=catalog_provider
+        )
         return response
     except ViewNotFoundError:
         pass
@@ -1,19 +1,23 @@
+import asyncio
 import time
 
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import Path
 from fastapi import Request
 from fastapi.responses import ORJSONResponse
 
+from tarchia.api.dependencies import get_catalog
+from tarchia.api.dependencies import get_storage
 from tarchia.exceptions import AlreadyExistsError
-from tarchia.interfaces.catalog import catalog_factory
-from tarchia.interfaces.storage import storage_factory
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.interfaces.storage.storage_provider import StorageProvider
 from tarchia.models import CreateTableRequest
 from tarchia.models import TableCatalogEntry
 from tarchia.models import UpdateMetadataRequest
 from tarchia.models import UpdateValueRequest
 from tarchia.utils import get_base_url
-from tarchia.utils.catalogs import load_commit
+from tarchia.utils.catalogs import aload_commit
 from tarchia.utils.config import METADATA_ROOT
 from tarchia.utils.constants import COMMITS_ROOT
 from tarchia.utils.constants import HISTORY_ROOT
@@ -21,14 +25,13 @@ from tarchia.utils.constants import IDENTIFIER_REG_EX
 from tarchia.utils.constants import MAIN_BRANCH
 
 router = APIRouter()
-catalog_provider = catalog_factory()
-storage_provider = storage_factory()
 
 
 @router.get("/tables/{owner}", response_class=ORJSONResponse)
 async def list_tables(
     request: Request,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     """
     Retrieve a list of tables and their current commits.
@@ -40,12 +43,23 @@ async def list_tables(
         List[Dict[str, Any]]: A list of tables with their metadata, including the commit URL if applicable.
     """
 
+    from tarchia.utils.permissions import READ
+    from tarchia.utils.permissions import compile_table_permissions
+
     base_url = get_base_url(request=request)
+    principal = getattr(request.state, "principal", None)
 
     table_list = []
 
     tables = catalog_provider.list_tables(owner)
     for table in tables:
+        # only list the tables the caller can read
+        if (
+            principal is not None
+            and not principal.unrestricted
+            and compile_table_permissions(table).level(principal) < READ
+        ):
+            continue
         # filter down the items we return
         table = {
             k: v
@@ -81,6 +95,8 @@ async def create_table(
     request: Request,
     table_definition: CreateTableRequest,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
 ):
     """
     Create a new table in the catalog.
@@ -100,7 +116,7 @@ async def create_table(
     timestamp = int(time.time_ns() / 1e6)
 
     # can we find the owner?
-    owner_entry = identify_owner(name=owner)
+    owner_entry = identify_owner(name=owner, catalog_provider=catalog_provider)
 
     catalog_entry = catalog_provider.get_view(owner=owner, view=table_definition.name)
     if catalog_entry:
@@ -130,17 +146,23 @@ async def create_table(
         encryption=table_definition.encryption,
     )
 
-    # write the initial commit to storage
-    commit_path = f"{commit_root}/commit-{new_commit.commit_sha}.json"
-    storage_provider.write_blob(commit_path, new_commit.serialize())
-
     # we know we have no history, so we initialize it
     history = HistoryTree(MAIN_BRANCH)
     history.commit(new_commit.history_entry)
     history_raw = history.save_to_avro()
     history_uuid = generate_uuid()
+
+    # write the initial commit and history to storage, and create the metadata
+    # folder, putting a file with the table name in there
+    commit_path = f"{commit_root}/commit-{new_commit.commit_sha}.json"
     history_file = f"{history_root}/history-{history_uuid}.avro"
-    storage_provider.write_blob(history_file, history_raw)
+    await asyncio.gather(
+        storage_provider.awrite_blob(commit_path, new_commit.serialize()),
+        storage_provider.awrite_blob(history_file, history_raw),
+        storage_provider.awrite_blob(
+            f"{METADATA_ROOT}/{owner}/{table_id}/{table_definition.name}", b""
+        ),
+    )
 
     # We create tables without any data
     new_table = TableCatalogEntry(
@@ -157,14 +179,12 @@ async def create_table(
         disposition=table_definition.disposition,
         metadata=table_definition.metadata,
         current_commit_sha=new_commit.commit_sha,
+        current_history=history_uuid,
         last_updated_ms=timestamp,
         freshness_life_in_days=table_definition.freshness_life_in_days,
         retention_in_days=table_definition.retention_in_days,
     )
 
-    # create the metadata folder, put a file with the table name in there
-    storage_provider.write_blob(f"{METADATA_ROOT}/{owner}/{table_id}/{table_definition.name}", b"")
-
     # Save the table to the Catalog - do this last
     catalog_provider.update_table(table_id=new_table.table_id, entry=new_table)
 
@@ -189,6 +209,8 @@ async def get_table(
     request: Request,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
     table: str = Path(description="The name of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
 ):
     """
     This is essentially a test that a table exists. It doesn't read the commits or
@@ -204,14 +226,14 @@ async def get_table(
     from tarchia.utils import build_root
     from tarchia.utils.catalogs import identify_table
 
-    catalog_entry = identify_table(owner, table)
+    catalog_entry = identify_table(owner, table, catalog_provider=catalog_provider)
     base_url = get_base_url(request)
 
     table = catalog_entry.as_dict()
 
     current_commit_sha = catalog_entry.current_commit_sha
     commit_root = build_root(COMMITS_ROOT, owner=owner, table_id=catalog_entry.table_id)
-    commit = load_commit(storage_provider, commit_root, current_commit_sha)
+    commit = await aload_commit(storage_provider, commit_root, current_commit_sha)
 
     table["schema"] = commit.table_schema.as_dict()
 
@@ -228,6 +250,8 @@ async def get_table(
 async def delete_table(
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
     table: str = Path(description="The name of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
+    storage_provider: StorageProvider = Depends(get_storage),
 ):
     """
     Delete a table from the catalog.
@@ -241,16 +265,18 @@ async def delete_table(
 
     from tarchia.utils.catalogs import identify_owner
     from tarchia.utils.catalogs import identify_table
+    from tarchia.utils.permissions import invalidate
 
-    owner_entry = identify_owner(name=owner)
-    catalog_entry = identify_table(owner=owner, table=table)
+    owner_entry = identify_owner(name=owner, catalog_provider=catalog_provider)
+    catalog_entry = identify_table(owner=owner, table=table, catalog_provider=catalog_provider)
 
     table_id = catalog_entry.table_id
     catalog_provider.delete_table(table_id)
+    invalidate(owner, table)
 
     # mark the entry as deleted
     # we save the catalog entry to give the option to manually restate the table
-    storage_provider.write_blob(
+    await storage_provider.awrite_blob(
         f"{METADATA_ROOT}/{owner}/{table_id}/deleted.json", catalog_entry.serialize()
     )
 
@@ -271,13 +297,14 @@ async def update_metadata(
     metadata: UpdateMetadataRequest,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
     table: str = Path(description="The name of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
-    from tarchia.utils.catalogs import identify_table
+    from tarchia.utils.catalogs import update_table_entry
 
-    catalog_entry = identify_table(owner, table)
-    table_id = catalog_entry.table_id
-    catalog_entry.metadata = metadata.metadata
-    catalog_provider.update_table(table_id=table_id, entry=catalog_entry)
+    def update(catalog_entry: TableCatalogEntry):
+        catalog_entry.metadata = metadata.metadata
+
+    update_table_entry(owner, table, update, catalog_provider=catalog_provider)
 
     return {
         "message": "Metadata updated",
@@ -291,15 +318,19 @@ async def update_table(
     attribute: str,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
     table: str = Path(description="The name of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
-    from tarchia.utils.catalogs import identify_table
+    from tarchia.utils.catalogs import update_table_entry
+    from tarchia.utils.permissions import invalidate
 
     if attribute not in {"visibility", "steward", "description"}:
         raise ValueError(f"Data attribute {attribute} cannot be modified via the API")
 
-    catalog_entry = identify_table(owner, table)
-    setattr(catalog_entry, attribute, value.value)
-    catalog_provider.update_table(table_id=catalog_entry.table_id, entry=catalog_entry)
+    def update(catalog_entry: TableCatalogEntry):
+        setattr(catalog_entry, attribute, value.value)
+
+    update_table_entry(owner, table, update, catalog_provider=catalog_provider)
+    invalidate(owner, table)
 
     return {
         "message": "Table updated",
@@ -312,6 +343,7 @@ async def update_schema(
     schema: Request,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
     table: str = Path(description="The name of the table.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     raise NotImplementedError("Create a commit")
     from tarchia.metadata.schemas import validate_schema_update
@@ -321,7 +353,7 @@ async def update_schema(
     for col in schema.columns:
         col.is_valid()
 
-    catalog_entry = identify_table(owner=owner, table=table)
+    catalog_entry = identify_table(owner=owner, table=table, catalog_provider=catalog_provider)
 
     # is the evolution valid
     validate_schema_update(current_schema=catalog_entry.current_schema, updated_schema=schema)
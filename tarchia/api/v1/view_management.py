@@ -1,11 +1,13 @@
 import time
 
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import Path
 from fastapi import Request
 from fastapi.responses import ORJSONResponse
 
-from tarchia.interfaces.catalog import catalog_factory
+from tarchia.api.dependencies import get_catalog
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
 from tarchia.models import CreateViewRequest
 from tarchia.models import UpdateMetadataRequest
 from tarchia.models import UpdateValueRequest
@@ -14,13 +16,13 @@ from tarchia.utils import get_base_url
 from tarchia.utils.constants import IDENTIFIER_REG_EX
 
 router = APIRouter()
-catalog_provider = catalog_factory()
 
 
 @router.get("/views/{owner}", response_class=ORJSONResponse)
 async def list_views(
     request: Request,
     owner: str = Path(description="The owner of the view.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     base_url = get_base_url(request=request)
 
@@ -56,13 +58,14 @@ async def create_view(
     request: Request,
     view_definition: CreateViewRequest,
     owner: str = Path(description="The owner of the view.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     from tarchia.exceptions import AlreadyExistsError
     from tarchia.utils import generate_uuid
     from tarchia.utils.catalogs import identify_owner
 
     # can we find the owner?
-    owner_entry = identify_owner(name=owner)
+    owner_entry = identify_owner(name=owner, catalog_provider=catalog_provider)
 
     base_url = get_base_url(request=request)
     timestamp = int(time.time_ns() / 1e6)
@@ -115,10 +118,11 @@ async def get_view(
     request: Request,
     owner: str = Path(description="The owner of the view.", pattern=IDENTIFIER_REG_EX),
     view: str = Path(description="The view.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     from tarchia.utils.catalogs import identify_view
 
-    catalog_entry = identify_view(owner, view)
+    catalog_entry = identify_view(owner, view, catalog_provider=catalog_provider)
 
     return catalog_entry.as_dict()
 
@@ -127,12 +131,13 @@ async def get_view(
 async def delete_view(
     owner: str = Path(description="The owner of the view.", pattern=IDENTIFIER_REG_EX),
     view: str = Path(description="The view.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     from tarchia.utils.catalogs import identify_owner
     from tarchia.utils.catalogs import identify_view
 
-    owner_entry = identify_owner(name=owner)
-    catalog_entry = identify_view(owner=owner, view=view)
+    owner_entry = identify_owner(name=owner, catalog_provider=catalog_provider)
+    catalog_entry = identify_view(owner=owner, view=view, catalog_provider=catalog_provider)
 
     view_id = catalog_entry.view_id
     catalog_provider.delete_view(view_id)
@@ -155,13 +160,14 @@ async def update_view(
     attribute: str,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
     view: str = Path(description="The name of the view.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     from tarchia.utils.catalogs import identify_view
 
     if attribute not in {"statement", "description"}:
         raise ValueError(f"Data attribute {attribute} cannot be modified via the API")
 
-    catalog_entry = identify_view(owner, view)
+    catalog_entry = identify_view(owner, view, catalog_provider=catalog_provider)
     setattr(catalog_entry, attribute, value.value)
     catalog_provider.update_view(view_id=catalog_entry.view_id, entry=catalog_entry)
 
@@ -176,10 +182,11 @@ async def update_metadata(
     metadata: UpdateMetadataRequest,
     owner: str = Path(description="The owner of the table.", pattern=IDENTIFIER_REG_EX),
     view: str = Path(description="The name of the view.", pattern=IDENTIFIER_REG_EX),
+    catalog_provider: CatalogProvider = Depends(get_catalog),
 ):
     from tarchia.utils.catalogs import identify_view
 
-    catalog_entry = identify_view(owner, view)
+    catalog_entry = identify_view(owner, view, catalog_provider=catalog_provider)
     view_id = catalog_entry.view_id
     catalog_entry.metadata = metadata.metadata
     catalog_provider.update_view(view_id=view_id, entry=catalog_entry)
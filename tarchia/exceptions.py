@@ -60,6 +60,10 @@ class NotFoundError(Exception):
     pass
 
 
+class InvalidTokenError(Exception):  # pragma: no cover
+    """Exception raised when an access token can't be verified"""
+
+
 class TableNotFoundError(NotFoundError):  # pragma: no cover
     def __init__(self, owner: str, table: str):
         self.owner = owner
@@ -13,4 +13,8 @@ def catalog_factory() -> CatalogProvider:  # pragma: no cover
         from tarchia.interfaces.catalog.gcs_firestore import FirestoreCatalogProvider
 
         return FirestoreCatalogProvider(config.CATALOG_NAME)
+    if config.CATALOG_PROVIDER.upper() == "SQLITE":
+        from tarchia.interfaces.catalog.sqlite_catalog import SqliteCatalogProvider
+
+        return SqliteCatalogProvider(config.CATALOG_NAME or "catalog.db")
     raise InvalidConfigurationError(setting="CATALOG_PROVIDER")
@@ -8,6 +8,7 @@ from typing import Dict
 from typing import List
 from typing import Optional
 
+from tarchia.interfaces.catalog.provider_base import COMMIT_FIELDS
 from tarchia.interfaces.catalog.provider_base import CatalogProvider
 from tarchia.models import OwnerEntry
 from tarchia.models import TableCatalogEntry
@@ -44,7 +45,8 @@ class DevelopmentCatalogProvider(CatalogProvider):
         """
 
         result = self.store.find("tables", {"owner": owner, "name": table})
-        return result[0] if result else None
+        # a copy, the store's documents are changed in place
+        return dict(result[0]) if result else None
 
     def update_table(self, table_id: str, entry: TableCatalogEntry) -> None:
         """
@@ -57,6 +59,50 @@ class DevelopmentCatalogProvider(CatalogProvider):
 
         self.store.upsert("tables", entry.as_dict(), {"table_id": table_id})
 
+    def swap_commit(
+        self, table_id: str, expected_sha: Optional[str], entry: TableCatalogEntry
+    ) -> bool:
+        """
+        Move a table to a new commit only if its current commit is the one we
+        expect, the store is locked so the check and the write can't interleave.
+        Only the commit fields are changed, the rest of the stored entry is kept.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected_sha (str): The commit we expect to be replacing.
+            entry (TableCatalogEntry): The catalog entry holding the new commit.
+
+        Returns:
+            bool: True if the commit was written, False if the commit had moved on.
+        """
+        with self.store.lock:
+            result = self.store.find("tables", {"table_id": table_id})
+            if not result or result[0].get("current_commit_sha") != expected_sha:
+                return False
+            commit = {field: getattr(entry, field) for field in COMMIT_FIELDS}
+            self.store.upsert("tables", commit, {"table_id": table_id})
+        return True
+
+    def swap_table(self, table_id: str, expected: Dict[str, Any], entry: TableCatalogEntry) -> bool:
+        """
+        Replace the metadata for a table only if it hasn't changed since it was
+        read, the store is locked so the check and the write can't interleave.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected (Dict[str, Any]): The metadata as it was read.
+            entry (TableCatalogEntry): The catalog entry to write.
+
+        Returns:
+            bool: True if the entry was written, False if the table had changed.
+        """
+        with self.store.lock:
+            result = self.store.find("tables", {"table_id": table_id})
+            if not result or result[0] != expected:
+                return False
+            self.store.upsert("tables", entry.as_dict(), {"table_id": table_id})
+        return True
+
     def list_tables(self, owner: str) -> List[Dict[str, Any]]:
         """
         List all tables in the catalog along with their basic metadata.
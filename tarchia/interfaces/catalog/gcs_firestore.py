@@ -10,6 +10,7 @@ from typing import Optional
 
 from tarchia.exceptions import MissingDependencyError
 from tarchia.exceptions import UnmetRequirementError
+from tarchia.interfaces.catalog.provider_base import COMMIT_FIELDS
 from tarchia.interfaces.catalog.provider_base import CatalogProvider
 from tarchia.models import OwnerEntry
 from tarchia.models import TableCatalogEntry
@@ -57,6 +58,9 @@ class FirestoreCatalogProvider(CatalogProvider):
         self.collection = db_path
         self.database = firestore.Client(project=self.project_id)
 
+    def close(self):
+        self.database.close()
+
     def get_table(self, owner: str, table: str) -> dict:
         """
         Retrieve metadata for a specified table, including its schema and manifest references.
@@ -93,6 +97,64 @@ class FirestoreCatalogProvider(CatalogProvider):
             entry.as_dict()
         )
 
+    def swap_commit(
+        self, table_id: str, expected_sha: Optional[str], entry: TableCatalogEntry
+    ) -> bool:
+        """
+        Move a table to a new commit only if its current commit is the one we
+        expect, the read and the write are made in a Firestore transaction. Only
+        the commit fields are changed, the rest of the stored entry is kept.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected_sha (str): The commit we expect to be replacing.
+            entry (TableCatalogEntry): The catalog entry holding the new commit.
+
+        Returns:
+            bool: True if the commit was written, False if the commit had moved on.
+        """
+        from google.cloud import firestore
+
+        reference = self.database.collection(self.collection).document(f"table-{table_id}")
+        commit = {field: getattr(entry, field) for field in COMMIT_FIELDS}
+
+        @firestore.transactional
+        def _swap(transaction) -> bool:
+            snapshot = reference.get(transaction=transaction)
+            if not snapshot.exists or snapshot.get("current_commit_sha") != expected_sha:
+                return False
+            transaction.update(reference, commit)
+            return True
+
+        return _swap(self.database.transaction())
+
+    def swap_table(self, table_id: str, expected: Dict[str, Any], entry: TableCatalogEntry) -> bool:
+        """
+        Replace the metadata for a table only if it hasn't changed since it was
+        read, the read and the write are made in a Firestore transaction.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected (Dict[str, Any]): The metadata as it was read.
+            entry (TableCatalogEntry): The catalog entry to write.
+
+        Returns:
+            bool: True if the entry was written, False if the table had changed.
+        """
+        from google.cloud import firestore
+
+        reference = self.database.collection(self.collection).document(f"table-{table_id}")
+
+        @firestore.transactional
+        def _swap(transaction) -> bool:
+            snapshot = reference.get(transaction=transaction)
+            if not snapshot.exists or snapshot.to_dict() != expected:
+                return False
+            transaction.set(reference, entry.as_dict())
+            return True
+
+        return _swap(self.database.transaction())
+
     def list_tables(self, owner: str) -> List[Dict[str, Any]]:
         """
         List all tables in the catalog along with their basic metadata.
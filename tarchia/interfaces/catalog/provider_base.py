@@ -8,6 +8,9 @@ from tarchia.models import OwnerEntry
 from tarchia.models import TableCatalogEntry
 from tarchia.models import ViewCatalogEntry
 
+# the fields of a table's catalog entry which are changed by a commit
+COMMIT_FIELDS = ("current_commit_sha", "current_history", "last_updated_ms")
+
 
 class CatalogProvider:  # pragma: no cover
     """
@@ -15,15 +18,17 @@ class CatalogProvider:  # pragma: no cover
     with a document store for managing table metadata, schemas, and references to manifests.
     """
 
-    def get_table(self, table_id: str) -> Dict[str, Any]:
+    def get_table(self, owner: str, table: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve metadata for a specified table, including its schema and manifest references.
 
         Parameters:
-            table_id (str): The identifier of the table.
+            owner (str): The owner of the table.
+            table (str): The name of the table.
 
         Returns:
-            Dict[str, Any]: A dictionary containing the metadata of the table.
+            Dict[str, Any]: A dictionary containing the metadata of the table, None if
+            the table doesn't exist.
         """
         raise NotImplementedError(
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
@@ -41,6 +46,52 @@ class CatalogProvider:  # pragma: no cover
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
         )
 
+    def close(self):
+        """
+        Release the provider's clients and connections, the provider isn't used
+        after it's closed. Providers which don't hold any don't need to override this.
+        """
+
+    def swap_commit(
+        self, table_id: str, expected_sha: Optional[str], entry: TableCatalogEntry
+    ) -> bool:
+        """
+        Atomically move a table to a new commit, only if the table's current commit
+        is still the one the caller based its changes on.
+
+        Only the commit fields (COMMIT_FIELDS) are taken from the entry, the rest
+        of the stored entry is kept, so changes to other attributes made while the
+        commit was being built aren't reverted.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected_sha (str): The commit the caller expects to be replacing.
+            entry (TableCatalogEntry): The catalog entry holding the new commit.
+
+        Returns:
+            bool: True if the commit was written, False if the commit had moved on.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
+        )
+
+    def swap_table(self, table_id: str, expected: Dict[str, Any], entry: TableCatalogEntry) -> bool:
+        """
+        Atomically replace the metadata for a specified table, only if the stored
+        metadata is still the metadata the caller read and changed.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected (Dict[str, Any]): The metadata as it was read (from get_table).
+            entry (TableCatalogEntry): The catalog entry to write.
+
+        Returns:
+            bool: True if the entry was written, False if the table had changed.
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
+        )
+
     def list_tables(self, owner: str) -> List[Dict[str, Any]]:
         """
         List all tables in the catalog along with their basic metadata.
@@ -63,7 +114,7 @@ class CatalogProvider:  # pragma: no cover
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
         )
 
-    def get_owner(self, name: str) -> OwnerEntry:
+    def get_owner(self, name: str) -> Optional[Dict[str, Any]]:
         raise NotImplementedError(
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
         )
@@ -73,7 +124,7 @@ class CatalogProvider:  # pragma: no cover
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
         )
 
-    def delete_owner(self, entry: OwnerEntry) -> None:
+    def delete_owner(self, owner_id: str) -> None:
         raise NotImplementedError(
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
         )
@@ -0,0 +1,327 @@
+"""
+SQLite backed catalog provider.
+
+Intended for single-node deployments and CI, where a durable, indexed local
+catalog is needed but a hosted document store like FireStore is not.
+
+Each relation is stored as a JSON document with the fields we query on
+(owner, name and the current commit) promoted to indexed columns. The database
+runs in WAL mode so readers are not blocked by writers, and writes take the
+database lock up-front (BEGIN IMMEDIATE) so concurrent writers from multiple
+uvicorn workers queue on the busy timeout rather than failing mid-transaction.
+"""
+
+import sqlite3
+import threading
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import orjson
+
+from tarchia.interfaces.catalog.provider_base import COMMIT_FIELDS
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.models import OwnerEntry
+from tarchia.models import TableCatalogEntry
+from tarchia.models import ViewCatalogEntry
+
+BUSY_TIMEOUT_MS = 30_000
+
+SCHEMA_STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS tables (
+        table_id TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        name TEXT NOT NULL,
+        current_commit_sha TEXT,
+        document BLOB NOT NULL
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS tables_owner_name ON tables (owner, name)",
+    """
+    CREATE TABLE IF NOT EXISTS owners (
+        owner_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        document BLOB NOT NULL
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS owners_name ON owners (name)",
+    """
+    CREATE TABLE IF NOT EXISTS views (
+        view_id TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        name TEXT NOT NULL,
+        document BLOB NOT NULL
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS views_owner_name ON views (owner, name)",
+)
+
+
+class SqliteCatalogProvider(CatalogProvider):
+    def __init__(self, db_path: str = None):
+        """
+        Initializes the database, creating the tables and indexes if required.
+
+        Parameters:
+            db_path (str): The file path for the database.
+        """
+        self.db_path = db_path or "catalog.db"
+        self._local = threading.local()
+        # every thread's connection, so they can all be closed
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        with self._transaction() as cursor:
+            for statement in SCHEMA_STATEMENTS:
+                cursor.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        SQLite connections can't be shared between threads, FastAPI runs sync work
+        in a thread pool so we hold one connection per thread.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # autocommit mode, we manage the transactions explicitly
+            connection = sqlite3.connect(
+                self.db_path,
+                timeout=BUSY_TIMEOUT_MS / 1000,
+                isolation_level=None,
+                # each connection is only used by the thread which opened it,
+                # but they're closed from the thread stopping the application
+                check_same_thread=False,
+            )
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _find_one(self, statement: str, parameters: tuple) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(statement, parameters).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def _find_many(self, statement: str, parameters: tuple) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(statement, parameters).fetchall()
+        return [orjson.loads(row[0]) for row in rows]
+
+    def get_table(self, owner: str, table: str) -> Optional[dict]:
+        """
+        Retrieve metadata for a specified table, including its schema and manifest references.
+
+        Parameters:
+            owner (str): The owner of the table.
+            table (str): The name of the table.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the metadata of the table.
+        """
+        return self._find_one(
+            "SELECT document FROM tables WHERE owner = ? AND name = ?", (owner, table)
+        )
+
+    def update_table(self, table_id: str, entry: TableCatalogEntry) -> None:
+        """
+        Update the metadata for a specified table.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            entry (TableCatalogEntry): The catalog entry to write.
+        """
+        with self._transaction() as cursor:
+            self._write_table(cursor, table_id, entry)
+
+    def swap_commit(
+        self, table_id: str, expected_sha: Optional[str], entry: TableCatalogEntry
+    ) -> bool:
+        """
+        Move a table to a new commit only if its current commit is the one we
+        expect, the check and the write are made in a single transaction. Only
+        the commit fields are changed, the rest of the stored entry is kept.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected_sha (str): The commit we expect to be replacing.
+            entry (TableCatalogEntry): The catalog entry holding the new commit.
+
+        Returns:
+            bool: True if the commit was written, False if the commit had moved on.
+        """
+        with self._transaction() as cursor:
+            row = cursor.execute(
+                "SELECT current_commit_sha, document FROM tables WHERE table_id = ?", (table_id,)
+            ).fetchone()
+            if row is None or row[0] != expected_sha:
+                return False
+            stored = orjson.loads(row[1])
+            stored.update({field: getattr(entry, field) for field in COMMIT_FIELDS})
+            self._write_table(cursor, table_id, TableCatalogEntry(**stored))
+        return True
+
+    def swap_table(self, table_id: str, expected: Dict[str, Any], entry: TableCatalogEntry) -> bool:
+        """
+        Replace the metadata for a table only if it hasn't changed since it was
+        read, the check and the write are made in a single transaction.
+
+        Parameters:
+            table_id (str): The identifier of the table.
+            expected (Dict[str, Any]): The metadata as it was read.
+            entry (TableCatalogEntry): The catalog entry to write.
+
+        Returns:
+            bool: True if the entry was written, False if the table had changed.
+        """
+        with self._transaction() as cursor:
+            row = cursor.execute(
+                "SELECT document FROM tables WHERE table_id = ?", (table_id,)
+            ).fetchone()
+            if row is None or orjson.loads(row[0]) != expected:
+                return False
+            self._write_table(cursor, table_id, entry)
+        return True
+
+    @staticmethod
+    def _write_table(cursor: sqlite3.Cursor, table_id: str, entry: TableCatalogEntry):
+        cursor.execute(
+            """
+            INSERT INTO tables (table_id, owner, name, current_commit_sha, document)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (table_id) DO UPDATE SET
+                owner = excluded.owner,
+                name = excluded.name,
+                current_commit_sha = excluded.current_commit_sha,
+                document = excluded.document
+            """,
+            (table_id, entry.owner, entry.name, entry.current_commit_sha, entry.serialize()),
+        )
+
+    def list_tables(self, owner: str) -> List[Dict[str, Any]]:
+        """
+        List all tables in the catalog along with their basic metadata.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries, each representing the metadata of a table.
+        """
+        return self._find_many(
+            "SELECT document FROM tables WHERE owner = ? ORDER BY name", (owner,)
+        )
+
+    def delete_table(self, table_id: str) -> None:
+        """
+        Delete metadata for a specified table.
+
+        Parameters:
+            table_id (str): The identifier of the table to be deleted.
+        """
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM tables WHERE table_id = ?", (table_id,))
+
+    def get_owner(self, name: str) -> dict:
+        return self._find_one("SELECT document FROM owners WHERE name = ?", (name,))
+
+    def update_owner(self, entry: OwnerEntry) -> None:
+        with self._transaction() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO owners (owner_id, name, document) VALUES (?, ?, ?)
+                ON CONFLICT (owner_id) DO UPDATE SET
+                    name = excluded.name,
+                    document = excluded.document
+                """,
+                (entry.owner_id, entry.name, entry.serialize()),
+            )
+
+    def delete_owner(self, owner_id: str) -> None:
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM owners WHERE owner_id = ?", (owner_id,))
+
+    def list_views(self, owner: str) -> List[Dict[str, Any]]:
+        """
+        List all views in the catalog along with their basic metadata.
+
+        Returns:
+            List[Dict[str, Any]]: A list of dictionaries, each representing the metadata of a view.
+        """
+        return self._find_many("SELECT document FROM views WHERE owner = ? ORDER BY name", (owner,))
+
+    def get_view(self, owner: str, view: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve metadata for a specified view.
+
+        Parameters:
+            owner (str): The owner of the view.
+            view (str): The name of the view.
+
+        Returns:
+            Dict[str, Any]: A dictionary containing the metadata of the view.
+        """
+        return self._find_one(
+            "SELECT document FROM views WHERE owner = ? AND name = ?", (owner, view)
+        )
+
+    def delete_view(self, view_id: str) -> None:
+        """
+        Delete metadata for a specified view.
+
+        Parameters:
+            view_id (str): The identifier of the view to be deleted.
+        """
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM views WHERE view_id = ?", (view_id,))
+
+    def update_view(self, view_id: str, entry: ViewCatalogEntry) -> None:
+        """
+        Update the metadata for a specified view.
+
+        Parameters:
+            view_id (str): The identifier of the view.
+            entry (ViewCatalogEntry): The catalog entry to write.
+        """
+        with self._transaction() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO views (view_id, owner, name, document) VALUES (?, ?, ?, ?)
+                ON CONFLICT (view_id) DO UPDATE SET
+                    owner = excluded.owner,
+                    name = excluded.name,
+                    document = excluded.document
+                """,
+                (view_id, entry.owner, entry.name, entry.serialize()),
+            )
+
+
+class _Transaction:
+    """
+    Take the write lock when the transaction starts (BEGIN IMMEDIATE), this avoids
+    deadlocks between readers trying to upgrade to writers.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("BEGIN IMMEDIATE")
+        return self.cursor
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.cursor.execute("COMMIT")
+        else:
+            self.cursor.execute("ROLLBACK")
+        self.cursor.close()
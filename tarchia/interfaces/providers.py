@@ -0,0 +1,100 @@
+"""
+Provider Registry
+
+The catalog and storage providers are created the first time they're needed
+and shared by everything in the application, rather than being created when
+modules are imported. Creating a provider can open clients to remote services
+(e.g. Firestore or GCS) or read the catalog, so doing it at import time slows
+down every cold start, even for requests which never use the provider.
+
+The application creates the providers when it starts (see `lifespan` in main.py)
+so the first requests don't pay for them, and closes them (releasing their
+clients and connections) when it stops. The handlers are given the providers
+with FastAPI dependencies (see tarchia.api.dependencies).
+"""
+
+import threading
+from typing import Dict
+from typing import Optional
+
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.interfaces.storage.storage_provider import StorageProvider
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._catalog: Optional[CatalogProvider] = None
+        self._storage: Optional[StorageProvider] = None
+        self._data_storage: Dict[str, StorageProvider] = {}
+        self._lock = threading.Lock()
+
+    def catalog(self) -> CatalogProvider:
+        """The application's catalog provider, created on first use"""
+        if self._catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    from tarchia.interfaces.catalog import catalog_factory
+
+                    self._catalog = catalog_factory()
+        return self._catalog
+
+    def storage(self) -> StorageProvider:
+        """The application's storage provider, created on first use"""
+        if self._storage is None:
+            with self._lock:
+                if self._storage is None:
+                    from tarchia.interfaces.storage import storage_factory
+
+                    self._storage = storage_factory()
+        return self._storage
+
+    def data_storage(self, host: str) -> StorageProvider:
+        """
+        The storage provider for data files on a host (e.g. GCS or S3), data files
+        are read with the bucket in the path so the provider is shared by buckets.
+        """
+        host = host.upper()
+        provider = self._data_storage.get(host)
+        if provider is None:
+            with self._lock:
+                provider = self._data_storage.get(host)
+                if provider is None:
+                    from tarchia.interfaces.storage import storage_factory
+
+                    provider = storage_factory(host)
+                    self._data_storage[host] = provider
+        return provider
+
+    def start(self):
+        """Create the catalog and storage providers now rather than on first use"""
+        self.catalog()
+        self.storage()
+
+    def close(self):
+        """
+        Close the providers, releasing their clients and connections, and forget
+        them; used when the application stops.
+        """
+        with self._lock:
+            opened = [self._catalog, self._storage, *self._data_storage.values()]
+            self._catalog = None
+            self._storage = None
+            self._data_storage = {}
+        for provider in opened:
+            if provider is None:
+                continue
+            # one provider failing to close shouldn't leave the others open
+            try:
+                provider.close()
+            except Exception as err:  # pragma: no cover
+                print(f"Unable to close {provider.__class__.__name__} - {err}")
+
+    def reset(self):
+        """Forget the providers, the next use creates them again (e.g. after a config change)"""
+        with self._lock:
+            self._catalog = None
+            self._storage = None
+            self._data_storage = {}
+
+
+providers = ProviderRegistry()
@@ -7,6 +7,27 @@ from .storage_provider import StorageProvider
 
 
 def storage_factory(provider: Optional[str] = None) -> StorageProvider:  # pragma: no cover
+    """
+    Create a storage provider, with the metadata cache in front of it if the cache
+    is enabled (STORAGE_CACHE_MEMORY_MB and STORAGE_CACHE_DISK_MB).
+
+    The requests made to the store are instrumented unless STORAGE_METRICS is
+    disabled, reads served from the cache aren't storage requests so the
+    instrumentation sits between the cache and the store.
+    """
+    storage_provider = _create_provider(provider)
+    if config.STORAGE_METRICS:
+        from .instrumented_storage import InstrumentedStorage
+
+        storage_provider = InstrumentedStorage(storage_provider)
+    if config.STORAGE_CACHE_MEMORY_MB > 0 or config.STORAGE_CACHE_DISK_MB > 0:
+        from .caching_storage import CachingStorage
+
+        return CachingStorage(storage_provider)
+    return storage_provider
+
+
+def _create_provider(provider: Optional[str] = None) -> StorageProvider:  # pragma: no cover
     """
     Factory function to create and return a storage provider instance based on the specified or
     default provider (local disk storage). The function supports multiple storage providers
@@ -51,6 +72,8 @@ def storage_factory(provider: Optional[str] = None) -> StorageProvider:  # pragm
         return GoogleCloudStorage()
 
     if provider in ("AMAZON", "S3", "MINIO"):
-        raise NotImplementedError(f"{provider} storage provider not implemented")
+        from .s3_storage import S3Storage
+
+        return S3Storage()
 
     raise InvalidConfigurationError(setting="STORAGE_PROVIDER")
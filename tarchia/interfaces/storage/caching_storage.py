@@ -0,0 +1,389 @@
+"""
+Tiered cache in front of a storage provider.
+
+The metadata blobs (commits, manifests, history) are never changed once they
+have been written, they are named with a uuid or a hash, so once read they can
+be served from a cache rather than from the remote store. The cache has two
+tiers, a size-bounded in-memory LRU in front of a size-bounded on-disk LRU; the
+disk tier survives restarts and can be shared by the workers on an instance.
+
+Paths which can change are excluded from the cache by pattern
+(STORAGE_CACHE_EXCLUDE), data files are read with the bucket in the path and
+are never cached, they are read once to build their manifest entry and would
+only push metadata out of the cache.
+
+Writes to the cache are best-effort, if the disk tier can't be written (e.g.
+the disk is full) the blob is still returned and the failure is counted.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from tarchia.utils import config
+from tarchia.utils import generate_uuid
+
+from .storage_provider import StorageProvider
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows, the folder isn't shared between processes
+    fcntl = None
+
+
+# the deleted marker is written when a table is deleted, and can be rewritten
+DEFAULT_EXCLUSIONS = (r"/deleted\.json$",)
+
+# when the disk cache is full it's trimmed to this share of its limit, so the
+# folder isn't scanned on every write once it's full
+EVICTION_LOW_WATER_MARK = 0.9
+
+
+class _MemoryCache:
+    """A thread-safe LRU of blobs, bounded by the total size of the blobs"""
+
+    def __init__(self, maximum_bytes: int):
+        self.maximum_bytes = maximum_bytes
+        self.current_bytes = 0
+        self.items: "OrderedDict[str, bytes]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.maximum_bytes:
+            return
+        with self.lock:
+            previous = self.items.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+            self.items[key] = value
+            self.current_bytes += len(value)
+            while self.current_bytes > self.maximum_bytes:
+                _, evicted = self.items.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def discard(self, key: str):
+        with self.lock:
+            previous = self.items.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous)
+
+
+class _DiskCache:
+    """
+    An LRU of blobs stored as files in a folder, bounded by the total size of the
+    files.
+
+    The folder can be shared by processes (the workers on an instance), so the
+    folder rather than the process is the record of what is cached: reads open
+    the file, the recency of a file is its modified time (which is updated when
+    it is read), and the total size is held in a file in the folder which is
+    only updated while holding a lock on the folder. When the total is over the
+    limit, the least recently used files are removed, whichever process wrote
+    them, until the total is below the low-water mark.
+    """
+
+    SIZE_FILE = ".size"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, folder: str, maximum_bytes: int):
+        self.folder = folder
+        self.maximum_bytes = maximum_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(folder, exist_ok=True)
+        # the size may be out of step if a process stopped part way through a
+        # change, so it's counted again when a process starts
+        with self._folder_lock():
+            self._evict(self._scan())
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @property
+    def current_bytes(self) -> int:
+        """The total size of the cached files, as recorded in the folder"""
+        with self._folder_lock():
+            return self._read_size()
+
+    @contextlib.contextmanager
+    def _folder_lock(self):
+        """Hold a lock on the folder, shared with the other processes using it"""
+        with self.lock, open(os.path.join(self.folder, self.LOCK_FILE), "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_size(self) -> int:
+        try:
+            with open(os.path.join(self.folder, self.SIZE_FILE), "rb") as size_file:
+                return int(size_file.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return self._scan()
+
+    def _write_size(self, size: int):
+        with open(os.path.join(self.folder, self.SIZE_FILE), "wb") as size_file:
+            size_file.write(str(max(size, 0)).encode())
+
+    def _files(self) -> List[Tuple[int, int, str]]:
+        """The cached files as (modified time, size, location), least recent first"""
+        files = []
+        for entry in os.scandir(self.folder):
+            if entry.name.startswith(".") or entry.name.endswith(".tmp"):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return sorted(files)
+
+    def _scan(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def _file_size(self, location: str) -> int:
+        try:
+            return os.stat(location).st_size
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _touch(location: str):
+        """
+        Mark a file as used now, the modified time is the recency used to pick
+        the files to evict; it's set from the clock as file times can be coarser.
+        """
+        now = time.time_ns()
+        os.utime(location, ns=(now, now))
+
+    def get(self, key: str) -> Optional[bytes]:
+        location = os.path.join(self.folder, self._file_name(key))
+        try:
+            with open(location, "rb") as cached_file:
+                content = cached_file.read()
+        except FileNotFoundError:
+            return None
+        with contextlib.suppress(FileNotFoundError):
+            self._touch(location)
+        return content
+
+    def set(self, key: str, value: bytes):
+        if len(value) > self.maximum_bytes:
+            return
+        location = os.path.join(self.folder, self._file_name(key))
+        # write then rename so readers never see a partial file, this is a cache
+        # so we don't need the writes to be durable
+        temporary_location = f"{location}.{generate_uuid()}.tmp"
+        try:
+            with open(temporary_location, "wb") as cached_file:
+                cached_file.write(value)
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temporary_location)
+            raise
+
+        with self._folder_lock():
+            size = self._read_size() - self._file_size(location)
+            os.replace(temporary_location, location)
+            self._touch(location)
+            self._evict(size + len(value))
+
+    def discard(self, key: str):
+        location = os.path.join(self.folder, self._file_name(key))
+        with self._folder_lock():
+            size = self._file_size(location)
+            try:
+                os.remove(location)
+            except FileNotFoundError:
+                return
+            self._write_size(self._read_size() - size)
+
+    def _evict(self, size: int):
+        """
+        Remove the least recently used files if the cache is over its limit,
+        until it is within the low-water mark.
+        """
+        if size > self.maximum_bytes:
+            target = int(self.maximum_bytes * EVICTION_LOW_WATER_MARK)
+            files = self._files()
+            size = sum(file_size for _, file_size, _ in files)
+            for _, file_size, location in files:
+                if size <= target:
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(location)
+                size -= file_size
+        self._write_size(size)
+
+
+class CacheStatistics:
+    """
+    Counts of where reads were served from, and of failed writes to the disk
+    cache, shared by all caching providers
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.memory_hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+            self.bypassed = 0
+            self.write_errors = 0
+
+    def record(self, outcome: str):
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self.lock:
+            cacheable = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "write_errors": self.write_errors,
+                "hit_ratio": hits / cacheable if cacheable else 0.0,
+            }
+
+
+statistics = CacheStatistics()
+
+# the caches belong to the process rather than to a provider, so they outlive
+# providers created again when the provider registry is reset
+_memory_cache: Optional[_MemoryCache] = None
+_disk_cache: Optional[_DiskCache] = None
+_caches_lock = threading.Lock()
+
+
+def _get_caches():
+    global _memory_cache, _disk_cache
+    with _caches_lock:
+        if _memory_cache is None and config.STORAGE_CACHE_MEMORY_MB > 0:
+            _memory_cache = _MemoryCache(config.STORAGE_CACHE_MEMORY_MB * 1024 * 1024)
+        if _disk_cache is None and config.STORAGE_CACHE_DISK_MB > 0:
+            _disk_cache = _DiskCache(
+                config.STORAGE_CACHE_FOLDER, config.STORAGE_CACHE_DISK_MB * 1024 * 1024
+            )
+    return _memory_cache, _disk_cache
+
+
+def _exclusions() -> List[re.Pattern]:
+    patterns = list(DEFAULT_EXCLUSIONS)
+    if config.STORAGE_CACHE_EXCLUDE:
+        patterns.extend(p.strip() for p in config.STORAGE_CACHE_EXCLUDE.split(",") if p.strip())
+    return [re.compile(pattern) for pattern in patterns]
+
+
+class CachingStorage(StorageProvider):
+    def __init__(self, provider: StorageProvider) -> None:
+        """
+        Parameters:
+            provider: StorageProvider
+                The provider to cache the blobs from
+        """
+        super().__init__()
+        self.provider = provider
+        self.memory_cache, self.disk_cache = _get_caches()
+        self.exclusions = _exclusions()
+
+    def _cacheable(self, location: str, bucket_in_path: bool) -> bool:
+        if bucket_in_path:
+            return False
+        return not any(pattern.search(location) for pattern in self.exclusions)
+
+    def _cached(self, location: str) -> Optional[bytes]:
+        if self.memory_cache is not None:
+            content = self.memory_cache.get(location)
+            if content is not None:
+                statistics.record("memory_hits")
+                return content
+        if self.disk_cache is not None:
+            content = self.disk_cache.get(location)
+            if content is not None:
+                statistics.record("disk_hits")
+                if self.memory_cache is not None:
+                    self.memory_cache.set(location, content)
+                return content
+        return None
+
+    def _store(self, location: str, content: bytes):
+        content = bytes(content)
+        if self.memory_cache is not None:
+            self.memory_cache.set(location, content)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(location, content)
+            except OSError:
+                # the cache is an optimization, a full disk mustn't fail the request
+                statistics.record("write_errors")
+
+    def read_blob(self, location: str, bucket_in_path: bool = False) -> Optional[bytes]:
+        if not self._cacheable(location, bucket_in_path):
+            statistics.record("bypassed")
+            return self.provider.read_blob(location, bucket_in_path)
+
+        content = self._cached(location)
+        if content is not None:
+            return content
+
+        statistics.record("misses")
+        content = self.provider.read_blob(location, bucket_in_path)
+        # missing blobs aren't cached, they may be written later
+        if content is not None:
+            self._store(location, content)
+        return content
+
+    def read_blob_view(self, location: str, bucket_in_path: bool = False) -> Optional[memoryview]:
+        if not self._cacheable(location, bucket_in_path):
+            statistics.record("bypassed")
+            return self.provider.read_blob_view(location, bucket_in_path)
+        content = self.read_blob(location, bucket_in_path)
+        return None if content is None else memoryview(content)
+
+    def write_blob(self, location: str, content: bytes):
+        self.provider.write_blob(location, content)
+        # blobs are read soon after they're written (e.g. the new HEAD commit)
+        if self._cacheable(location, False):
+            self._store(location, content)
+
+    def close(self):
+        self.provider.close()
+
+    def delete_blob(self, location: str):
+        self.provider.delete_blob(location)
+        if self.memory_cache is not None:
+            self.memory_cache.discard(location)
+        if self.disk_cache is not None:
+            self.disk_cache.discard(location)
+
+    async def aread_blob(self, location: str, bucket_in_path: bool = False) -> bytes:
+        # memory hits don't need to go to the thread pool
+        if self.memory_cache is not None and self._cacheable(location, bucket_in_path):
+            content = self.memory_cache.get(location)
+            if content is not None:
+                statistics.record("memory_hits")
+                return content
+        return await super().aread_blob(location, bucket_in_path)
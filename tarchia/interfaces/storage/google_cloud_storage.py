@@ -1,9 +1,46 @@
 import os
+import threading
+from typing import Dict
 
+from tarchia.utils import config
 from tarchia.utils.config import BUCKET_NAME
 
 from .storage_provider import StorageProvider
 
+# the client holds the connection pool, there's a provider for the metadata and
+# one for each data host (and they're created again when the provider registry
+# is reset), so they share the client rather than each opening new connections
+_client = None
+# bucket handles are cached so we don't make a metadata request for every blob
+_buckets: Dict[str, object] = {}
+_buckets_lock = threading.Lock()
+
+
+def _get_client(storage, credentials=None):
+    global _client
+    if _client is None:
+        from requests.adapters import HTTPAdapter
+
+        client = storage.Client(credentials=credentials)
+        # the default pool holds 10 connections, size it for the IO threads
+        adapter = HTTPAdapter(
+            pool_connections=config.STORAGE_IO_THREADS, pool_maxsize=config.STORAGE_IO_THREADS
+        )
+        client._http.mount("https://", adapter)
+        client._http.mount("http://", adapter)
+        _client = client
+    return _client
+
+
+def _close_client():
+    """Close the shared client's connections, the next provider creates a new client"""
+    global _client
+    with _buckets_lock:
+        _buckets.clear()
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
 
 class GoogleCloudStorage(StorageProvider):
     def __init__(self) -> None:
@@ -12,6 +49,7 @@ class GoogleCloudStorage(StorageProvider):
         try:
             from google.api_core import retry  # type:ignore
             from google.api_core.exceptions import InternalServerError  # type:ignore
+            from google.api_core.exceptions import NotFound
             from google.api_core.exceptions import TooManyRequests
             from google.auth.credentials import AnonymousCredentials  # type:ignore
             from google.cloud import storage  # type:ignore
@@ -23,28 +61,55 @@ class GoogleCloudStorage(StorageProvider):
             raise MissingDependencyError("google-cloud-storage")
 
         if os.environ.get("STORAGE_EMULATOR_HOST") is not None:
-            self.client = storage.Client(credentials=AnonymousCredentials())
+            self.client = _get_client(storage, credentials=AnonymousCredentials())
         else:  # pragma: no cover
-            self.client = storage.Client()
+            self.client = _get_client(storage)
 
         predicate = retry.if_exception_type(
             ConnectionResetError, ProtocolError, InternalServerError, TooManyRequests
         )
         self.retry = retry.Retry(predicate)
+        self.not_found = NotFound
         self.bucket_name = BUCKET_NAME
 
+    def _get_bucket(self, bucket_name: str):
+        """
+        Get a handle to a bucket, these are cached per bucket name.
+
+        We don't use `get_bucket`, which makes a request to load the bucket's
+        metadata, a missing bucket will fail on the blob request instead.
+        """
+        bucket = _buckets.get(bucket_name)
+        if bucket is None:
+            with _buckets_lock:
+                bucket = _buckets.get(bucket_name)
+                if bucket is None:
+                    bucket = self.client.bucket(bucket_name)
+                    _buckets[bucket_name] = bucket
+        return bucket
+
     def write_blob(self, location: str, content: bytes):
-        bucket = self.client.get_bucket(self.bucket_name)
-        blob = bucket.blob(location)
+        blob = self._get_bucket(self.bucket_name).blob(location)
         self.retry(blob.upload_from_string)(content, content_type="application/octet-stream")
 
+    def close(self):
+        _close_client()
+
+    def delete_blob(self, location: str):
+        blob = self._get_bucket(self.bucket_name).blob(location)
+        try:
+            self.retry(blob.delete)()
+        except self.not_found:
+            pass
+
     def read_blob(self, location: str, bucket_in_path: bool = False) -> bytes:
         if bucket_in_path:
             bucket_name, location = location.split("/", 1)
         else:
             bucket_name = self.bucket_name
-        bucket = self.client.get_bucket(bucket_name)
-        blob = bucket.get_blob(location)
-        if blob:
-            return blob.download_as_bytes()
-        return None
+        # download directly rather than checking the blob exists first
+        blob = self._get_bucket(bucket_name).blob(location)
+        try:
+            return self.retry(blob.download_as_bytes)()
+        except self.not_found:
+            return None
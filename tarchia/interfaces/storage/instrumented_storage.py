@@ -0,0 +1,220 @@
+"""
+Storage Instrumentation
+
+Counts the calls, bytes and time spent on storage requests, by operation and by
+the class of the path (commits, manifests, history, staging, data), so we can
+see where the time serving a request goes.
+
+The totals for the process are held in `metrics`, and exposed on the /metrics
+endpoint. Each request can also collect its own totals, the audit middleware
+starts a `RequestIO` for each request which is added to its audit record.
+
+The instrumentation wraps the provider which talks to the store, so reads served
+from the metadata cache aren't counted as storage requests.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .storage_provider import StorageProvider
+
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PATH_CLASSES = (
+    ("/metadata/commits/", "commit"),
+    ("/metadata/manifests/", "manifest"),
+    ("/metadata/history/", "history"),
+    ("/metadata/staging/", "staging"),
+)
+
+
+def path_class(location: str, bucket_in_path: bool = False) -> str:
+    """Classify a storage location, data files are read with the bucket in the path"""
+    if bucket_in_path:
+        return "data"
+    for marker, name in PATH_CLASSES:
+        if marker in location:
+            return name
+    return "other"
+
+
+class _Series:
+    """The counters for one operation on one class of path"""
+
+    __slots__ = ("calls", "errors", "bytes", "seconds", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+
+class StorageMetrics:
+    """Totals for the storage requests made by the process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series: Dict[Tuple[str, str], _Series] = {}
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def observe(self, operation: str, kind: str, size: int, seconds: float, error: bool):
+        with self.lock:
+            series = self.series.get((operation, kind))
+            if series is None:
+                series = self.series[(operation, kind)] = _Series()
+            series.calls += 1
+            series.errors += error
+            series.bytes += size
+            series.seconds += seconds
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series.buckets[index] += 1
+                    break
+
+    def to_prometheus(self) -> List[str]:
+        """
+        The metrics in the Prometheus text exposition format, each family is
+        written as a group, its HELP and TYPE lines then its samples.
+        """
+        with self.lock:
+            return self._families()
+
+    def _families(self) -> List[str]:
+        series = [
+            (f'operation="{operation}",path_class="{kind}"', values)
+            for (operation, kind), values in sorted(self.series.items())
+        ]
+
+        lines = []
+        for name, description, attribute in (
+            ("tarchia_storage_requests_total", "Storage requests made.", "calls"),
+            ("tarchia_storage_errors_total", "Storage requests which failed.", "errors"),
+            ("tarchia_storage_bytes_total", "Bytes read from or written to storage.", "bytes"),
+        ):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, values in series:
+                lines.append(f"{name}{{{labels}}} {getattr(values, attribute)}")
+
+        lines.append("# HELP tarchia_storage_request_seconds Time taken by storage requests.")
+        lines.append("# TYPE tarchia_storage_request_seconds histogram")
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, values.buckets):
+                cumulative += count
+                lines.append(
+                    f'tarchia_storage_request_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'tarchia_storage_request_seconds_bucket{{{labels},le="+Inf"}} {values.calls}'
+            )
+            lines.append(f"tarchia_storage_request_seconds_sum{{{labels}}} {values.seconds}")
+            lines.append(f"tarchia_storage_request_seconds_count{{{labels}}} {values.calls}")
+        return lines
+
+
+metrics = StorageMetrics()
+
+
+class RequestIO:
+    """Totals for the storage requests made while serving one API request"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals: Dict[str, List[float]] = {}
+
+    def observe(self, kind: str, size: int, seconds: float):
+        with self.lock:
+            totals = self.totals.setdefault(kind, [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += size
+            totals[2] += seconds
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {
+                kind: {"calls": calls, "bytes": size, "ms": round(seconds * 1000, 3)}
+                for kind, (calls, size, seconds) in sorted(self.totals.items())
+            }
+
+
+_request_io: ContextVar[Optional[RequestIO]] = ContextVar("tarchia_request_io", default=None)
+
+
+def start_request_io() -> RequestIO:
+    """
+    Start collecting the storage requests made in the current context, the storage
+    requests made by tasks and threads started from this context are included.
+    """
+    request_io = RequestIO()
+    _request_io.set(request_io)
+    return request_io
+
+
+class InstrumentedStorage(StorageProvider):
+    def __init__(self, provider: StorageProvider) -> None:
+        """
+        Parameters:
+            provider: StorageProvider
+                The provider to instrument
+        """
+        super().__init__()
+        self.provider = provider
+
+    def _observe(self, operation: str, kind: str, size: int, start: float, error: bool):
+        seconds = time.perf_counter() - start
+        metrics.observe(operation, kind, size, seconds, error)
+        request_io = _request_io.get()
+        if request_io is not None:
+            request_io.observe(kind, size, seconds)
+
+    def _read(self, operation: str, reader, location: str, bucket_in_path: bool, *args):
+        kind = path_class(location, bucket_in_path)
+        start = time.perf_counter()
+        try:
+            content = reader(location, *args, bucket_in_path)
+        except Exception:
+            self._observe(operation, kind, 0, start, True)
+            raise
+        self._observe(operation, kind, 0 if content is None else len(content), start, False)
+        return content
+
+    def read_blob(self, location: str, bucket_in_path: bool = False) -> Optional[bytes]:
+        return self._read("read", self.provider.read_blob, location, bucket_in_path)
+
+    def read_blob_view(self, location: str, bucket_in_path: bool = False) -> Optional[memoryview]:
+        return self._read("read", self.provider.read_blob_view, location, bucket_in_path)
+
+    def write_blob(self, location: str, content: bytes):
+        kind = path_class(location)
+        start = time.perf_counter()
+        try:
+            self.provider.write_blob(location, content)
+        except Exception:
+            self._observe("write", kind, 0, start, True)
+            raise
+        self._observe("write", kind, len(content), start, False)
+
+    def close(self):
+        self.provider.close()
+
+    def delete_blob(self, location: str):
+        kind = path_class(location)
+        start = time.perf_counter()
+        try:
+            self.provider.delete_blob(location)
+        except Exception:
+            self._observe("delete", kind, 0, start, True)
+            raise
+        self._observe("delete", kind, 0, start, False)
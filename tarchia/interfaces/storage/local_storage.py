@@ -1,12 +1,81 @@
+import mmap
 import os
+import threading
+from typing import Dict
+from typing import Optional
+from typing import Set
+
+from tarchia.utils import config
+from tarchia.utils import generate_uuid
 
 from .storage_provider import StorageProvider
 
 OS_SEP = os.sep
 
-# Define os.O_BINARY for non-Windows platforms if it's not already defined
-if not hasattr(os, "O_BINARY"):
-    os.O_BINARY = 0  # Value has no effect on non-Windows platforms
+# O_BINARY is only defined on Windows, the value has no effect on other platforms
+O_BINARY = getattr(os, "O_BINARY", 0)
+
+
+def _sync_directory(directory: str):
+    """Flush a directory entry (e.g. a rename) to disk"""
+    if os.name == "nt":  # pragma: no cover - directories can't be opened on Windows
+        return
+    file_descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+
+class _GroupDirectorySync:
+    """
+    Share directory syncs between concurrent writers.
+
+    A writer waits for a sync of its directory which started after its rename.
+    The first writer to arrive when no sync is running syncs every directory
+    requested so far, writers arriving while it runs are handled by the next
+    sync, so under load each sync covers many writes.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending: Set[str] = set()
+        self.collecting = 1  # the batch new requests join
+        self.completed = 0  # the last batch to be synced
+        self.running = False
+        self.errors: Dict[int, Exception] = {}
+
+    def sync(self, directory: str):
+        with self.condition:
+            self.pending.add(directory)
+            batch = self.collecting
+            while self.completed < batch:
+                if self.running:
+                    self.condition.wait()
+                    continue
+
+                # nothing is syncing, sync everything requested so far
+                self.running = True
+                directories, self.pending = self.pending, set()
+                running = self.collecting
+                self.collecting += 1
+                self.condition.release()
+                try:
+                    for pending_directory in directories:
+                        _sync_directory(pending_directory)
+                except Exception as err:
+                    self.errors[running] = err
+                finally:
+                    self.condition.acquire()
+                    self.running = False
+                    self.completed = running
+                    self.condition.notify_all()
+
+            if batch in self.errors:
+                raise self.errors[batch]
+
+
+_group_sync = _GroupDirectorySync()
 
 
 class LocalStorage(StorageProvider):
@@ -14,18 +83,49 @@ class LocalStorage(StorageProvider):
         """
         Writes the given data to the specified file location.
 
+        The data is written to a temporary file in the same folder, flushed to
+        disk and then renamed over the target, so a crash can't leave a partially
+        written file. The rename is made durable by syncing the folder, with
+        LOCAL_STORAGE_GROUP_SYNC these syncs are shared between concurrent writes.
+
         Parameters:
             location: str
                 The file path where the data should be written.
             data: bytes
                 The data to be written to the file.
         """
-        os.makedirs(os.path.dirname(location), exist_ok=True)
-        file_descriptor = os.open(location, os.O_WRONLY | os.O_BINARY | os.O_CREAT | os.O_TRUNC)
+        directory = os.path.dirname(location) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        temporary_location = f"{location}.{generate_uuid()}.tmp"
+        file_descriptor = os.open(
+            temporary_location, os.O_WRONLY | O_BINARY | os.O_CREAT | os.O_EXCL, 0o644
+        )
         try:
-            os.write(file_descriptor, content)
-        finally:
-            os.close(file_descriptor)
+            try:
+                view = memoryview(content)
+                while view:
+                    # writes can be short, write until everything is written
+                    view = view[os.write(file_descriptor, view) :]
+                os.fsync(file_descriptor)
+            finally:
+                os.close(file_descriptor)
+            os.replace(temporary_location, location)
+        except BaseException:
+            if os.path.exists(temporary_location):
+                os.remove(temporary_location)
+            raise
+
+        if config.LOCAL_STORAGE_GROUP_SYNC:
+            _group_sync.sync(directory)
+        else:
+            _sync_directory(directory)
+
+    def delete_blob(self, location: str):
+        try:
+            os.remove(location)
+        except FileNotFoundError:
+            pass
 
     def read_blob(self, location: str, bucket_in_path: bool = False) -> bytes:
         """
@@ -45,11 +145,49 @@ class LocalStorage(StorageProvider):
         """
         file_descriptor = None
         try:
-            file_descriptor = os.open(location, os.O_RDONLY | os.O_BINARY)
-            size = os.path.getsize(location)
-            return os.read(file_descriptor, size)
+            file_descriptor = os.open(location, os.O_RDONLY | O_BINARY)
+            size = os.fstat(file_descriptor).st_size
+            content = os.read(file_descriptor, size)
+            if len(content) == size:
+                return content
+            # reads can be short (e.g. large files on some platforms)
+            chunks = [content]
+            while chunk := os.read(file_descriptor, size):
+                chunks.append(chunk)
+            return b"".join(chunks)
         except FileNotFoundError:  # pragma: no cover
             return None
         finally:
-            if file_descriptor:
+            if file_descriptor is not None:
                 os.close(file_descriptor)
+
+    def read_blob_view(self, location: str, bucket_in_path: bool = False) -> Optional[memoryview]:
+        """
+        Read a blob from disk by memory mapping it, nothing is copied until it is
+        read from the view.
+
+        The mapping is released when nothing references the view. Blobs must not be
+        modified in place while they are mapped (truncating a mapped file raises
+        SIGBUS), so this is only used for the metadata files, which are only ever
+        written once. Data files are owned by users and are read with `read_blob`.
+
+        Parameters:
+            location: str
+                The name of the blob file to read.
+
+        Returns:
+            The blob as a memoryview.
+        """
+        try:
+            file_descriptor = os.open(location, os.O_RDONLY | O_BINARY)
+        except FileNotFoundError:
+            return None
+        try:
+            if os.fstat(file_descriptor).st_size == 0:
+                # empty files can't be mapped
+                return memoryview(b"")
+            # the mapping holds its own reference to the file
+            mapped = mmap.mmap(file_descriptor, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(file_descriptor)
+        return memoryview(mapped)
@@ -0,0 +1,108 @@
+"""
+Amazon S3 and S3 compatible (e.g. MinIO) storage.
+
+Set S3_ENDPOINT_URL to use an S3 compatible store rather than AWS, credentials
+and the region are read by boto3 from the usual environment variables or
+configuration files.
+"""
+
+from io import BytesIO
+from typing import Optional
+
+from tarchia.utils import config
+from tarchia.utils.config import BUCKET_NAME
+
+from .storage_provider import StorageProvider
+
+# blobs this size or larger are uploaded in parts, in parallel
+MULTIPART_THRESHOLD = 16 * 1024 * 1024
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+MAXIMUM_ATTEMPTS = 10
+
+# the client holds the connection pool, there's a provider for the metadata and
+# one for each data host (and they're created again when the provider registry
+# is reset), so they share the client rather than each opening new connections
+_client = None
+
+
+def _get_client(boto3, Config):
+    global _client
+    if _client is None:
+        client_config = Config(
+            max_pool_connections=config.STORAGE_IO_THREADS,
+            # 'standard' retries throttling and transient errors with jittered
+            # exponential backoff
+            retries={"max_attempts": MAXIMUM_ATTEMPTS, "mode": "standard"},
+        )
+        _client = boto3.session.Session().client(
+            "s3", endpoint_url=config.S3_ENDPOINT_URL, config=client_config
+        )
+    return _client
+
+
+def _close_client():
+    """Close the shared client's connections, the next provider creates a new client"""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+class S3Storage(StorageProvider):
+    def __init__(self) -> None:
+        super().__init__()
+
+        try:
+            import boto3  # type:ignore
+            from boto3.s3.transfer import TransferConfig  # type:ignore
+            from botocore.config import Config  # type:ignore
+            from botocore.exceptions import ClientError  # type:ignore
+        except ImportError:  # pragma: no cover
+            from tarchia.exceptions import MissingDependencyError
+
+            raise MissingDependencyError("boto3")
+
+        self.client = _get_client(boto3, Config)
+        self.client_error = ClientError
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            max_concurrency=min(10, config.STORAGE_IO_THREADS),
+        )
+        self.bucket_name = BUCKET_NAME
+
+    def _is_missing(self, err: Exception) -> bool:
+        # botocore's ClientError carries the parsed error response
+        code = getattr(err, "response", {}).get("Error", {}).get("Code")
+        return code in ("NoSuchKey", "404", "NotFound")
+
+    def _split(self, location: str, bucket_in_path: bool):
+        if bucket_in_path:
+            return location.split("/", 1)
+        return self.bucket_name, location
+
+    def write_blob(self, location: str, content: bytes):
+        if len(content) < MULTIPART_THRESHOLD:
+            self.client.put_object(Bucket=self.bucket_name, Key=location, Body=bytes(content))
+            return
+        # large blobs are uploaded in parts, the parts are uploaded concurrently
+        self.client.upload_fileobj(
+            BytesIO(content), self.bucket_name, location, Config=self.transfer_config
+        )
+
+    def close(self):
+        _close_client()
+
+    def delete_blob(self, location: str):
+        # deleting a key which doesn't exist succeeds
+        self.client.delete_object(Bucket=self.bucket_name, Key=location)
+
+    def read_blob(self, location: str, bucket_in_path: bool = False) -> Optional[bytes]:
+        bucket_name, location = self._split(location, bucket_in_path)
+        try:
+            response = self.client.get_object(Bucket=bucket_name, Key=location)
+        except self.client_error as err:
+            if self._is_missing(err):
+                return None
+            raise
+        return response["Body"].read()
@@ -1,4 +1,73 @@
+"""
+Storage providers have a blocking interface (read_blob/write_blob) and an async
+interface (aread_blob/awrite_blob/aread_many) for use in the API handlers.
+
+Unless a provider has a native async client, the async interface runs the
+blocking calls on a shared, bounded thread pool so a slow read doesn't stall
+the event loop and every other request being served by the worker.
+
+Many small blobs (e.g. the manifests in a manifest tree) can be read or written
+in one pass with read_blobs/write_blobs, these run the requests concurrently
+and report the outcome of each request rather than failing the whole batch.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
 import inspect
+import threading
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+from tarchia.utils import config
+
+_io_executor: concurrent.futures.ThreadPoolExecutor = None
+_batch_executor: concurrent.futures.ThreadPoolExecutor = None
+_batch_thread = threading.local()
+
+
+def io_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """The thread pool storage requests are run on, shared by all providers."""
+    global _io_executor
+    if _io_executor is None or _io_executor._shutdown:
+        _io_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.STORAGE_IO_THREADS, thread_name_prefix="tarchia-io"
+        )
+    return _io_executor
+
+
+def batch_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """
+    The thread pool the requests in batches (read_blobs/write_blobs) are run on,
+    shared by all batches so concurrent batches can't create more threads than
+    this pool and the shared pool have between them.
+    """
+    global _batch_executor
+    if _batch_executor is None or _batch_executor._shutdown:
+        _batch_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=config.STORAGE_IO_THREADS,
+            thread_name_prefix="tarchia-batch",
+            initializer=_mark_batch_thread,
+        )
+    return _batch_executor
+
+
+def _mark_batch_thread():
+    _batch_thread.active = True
+
+
+async def run_in_io_executor(func: Callable, *args):
+    """
+    Run a blocking function on the shared pool, in the caller's context so the
+    storage requests it makes are attributed to the request being served.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(io_executor(), functools.partial(context.run, func, *args))
 
 
 class StorageProvider:  # pragma: no cover
@@ -7,7 +76,127 @@ class StorageProvider:  # pragma: no cover
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
         )
 
+    def delete_blob(self, location: str):
+        """Delete a blob, deleting a blob which doesn't exist isn't an error."""
+        raise NotImplementedError(
+            f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
+        )
+
+    def close(self):
+        """
+        Release the provider's clients and connections, the provider isn't used
+        after it's closed. Providers which don't hold any don't need to override this.
+        """
+
     def read_blob(self, location: str, bucket_in_path: bool = False) -> bytes:
         raise NotImplementedError(
             f"{self.__class__.__name__}.{inspect.currentframe().f_code.co_name} is not implemented."
         )
+
+    def read_blob_view(self, location: str, bucket_in_path: bool = False) -> Optional[memoryview]:
+        """
+        Read a blob as a memoryview, providers which can map the blob into memory
+        avoid copying it. Use `blob_stream` to read the view as a file.
+        """
+        content = self.read_blob(location, bucket_in_path)
+        return None if content is None else memoryview(content)
+
+    def read_blobs(
+        self, locations: List[str], bucket_in_path: bool = False, views: bool = False
+    ) -> List[Union[bytes, memoryview, None, Exception]]:
+        """
+        Read a set of blobs concurrently.
+
+        Parameters:
+            locations: List[str]
+                The blobs to read
+            bucket_in_path: bool
+                The locations include the bucket name
+            views: bool
+                Read the blobs as memoryviews (see `read_blob_view`)
+
+        Returns:
+            List: The content of each blob in the order requested, None if the blob
+            doesn't exist or the exception raised trying to read it.
+        """
+        reader = self.read_blob_view if views else self.read_blob
+        return _run_batch(lambda location: reader(location, bucket_in_path), locations)
+
+    def write_blobs(self, blobs: Dict[str, bytes]) -> List[Optional[Exception]]:
+        """
+        Write a set of blobs concurrently.
+
+        Parameters:
+            blobs: Dict[str, bytes]
+                The content to write, keyed by location
+
+        Returns:
+            List: In the order of the blobs, None if the blob was written or the
+            exception raised trying to write it.
+        """
+        return _run_batch(lambda item: self.write_blob(*item), list(blobs.items()))
+
+    async def awrite_blob(self, location: str, content: bytes):
+        await run_in_io_executor(self.write_blob, location, content)
+
+    async def adelete_blob(self, location: str):
+        await run_in_io_executor(self.delete_blob, location)
+
+    async def aread_blob(self, location: str, bucket_in_path: bool = False) -> bytes:
+        return await run_in_io_executor(self.read_blob, location, bucket_in_path)
+
+    async def aread_blob_view(
+        self, location: str, bucket_in_path: bool = False
+    ) -> Optional[memoryview]:
+        return await run_in_io_executor(self.read_blob_view, location, bucket_in_path)
+
+    async def aread_many(
+        self, locations: List[str], bucket_in_path: bool = False, views: bool = False
+    ) -> List[Union[bytes, memoryview]]:
+        """
+        Read a set of blobs concurrently, the results are in the order requested.
+
+        The batch is a single task on the shared pool, so a large batch doesn't
+        queue ahead of the requests being made for other callers.
+        """
+        results = await run_in_io_executor(self.read_blobs, locations, bucket_in_path, views)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+
+def blob_stream(content: Union[bytes, memoryview]):
+    """
+    A file-like object over a blob, BytesIO would copy a memoryview (e.g. a
+    memory mapped file) so the blob is wrapped without copying it.
+    """
+    import pyarrow
+
+    return pyarrow.BufferReader(content)
+
+
+def _run_batch(func: Callable, items: list) -> list:
+    """
+    Apply a function to each item on the batch pool, capturing any errors.
+
+    Batches are usually run from a thread in the shared pool (aread_many), the
+    batch pool is separate from it so the batch can't deadlock waiting for
+    threads held by the batches waiting on it. A batch run from a thread in the
+    batch pool is run in that thread for the same reason.
+    """
+
+    def capture(item):
+        try:
+            return func(item)
+        except Exception as err:
+            return err
+
+    if len(items) <= 1 or getattr(_batch_thread, "active", False):
+        return [capture(item) for item in items]
+
+    executor = batch_executor()
+    # a context can only be entered by one thread at a time, so each item
+    # gets its own copy of the caller's context
+    futures = [executor.submit(contextvars.copy_context().run, capture, item) for item in items]
+    return [future.result() for future in futures]
@@ -0,0 +1,123 @@
+"""
+Group Commit
+
+When many writers are committing to the same table at the same time, each one
+rebuilding and writing a manifest, a commit and a history file is wasted effort,
+and they all contend for the same catalog entry.
+
+The coordinator holds commits for a table for a short window, then applies
+them as a single batch, each caller is given the result of the batch it was
+part of. If a batch fails, its members are retried one at a time so a single
+bad transaction doesn't fail everyone else's commit. Items whose callers stop
+waiting (are cancelled) before the batch is applied are left out of it.
+"""
+
+import asyncio
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+BatchApplier = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class CommitCoordinator:
+    def __init__(
+        self, apply_batch: BatchApplier, window_seconds: float, maximum_batch_size: int = 256
+    ):
+        """
+        Parameters:
+            apply_batch: Callable
+                Coroutine which applies a list of items, returning a result per item
+            window_seconds: float
+                How long to wait for other items to arrive before applying a batch
+            maximum_batch_size: int
+                The largest batch to build, further items start a new batch
+        """
+        self.apply_batch = apply_batch
+        self.window_seconds = window_seconds
+        self.maximum_batch_size = maximum_batch_size
+        self._batches: Dict[Tuple[int, Hashable], List[Tuple[Any, asyncio.Future]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        """
+        Add an item to the open batch for a key, and wait for the batch to be applied.
+
+        Parameters:
+            key: Hashable
+                Items with the same key are batched together (e.g. the table)
+            item: Any
+                The item to pass to the batch applier
+
+        Returns:
+            The result for this item
+        """
+        loop = asyncio.get_running_loop()
+        # futures belong to a loop, so batches can't be shared between loops
+        batch_key = (id(loop), key)
+        future = loop.create_future()
+
+        batch = self._batches.get(batch_key)
+        if batch is None:
+            batch = []
+            self._batches[batch_key] = batch
+            task = loop.create_task(self._apply_after_window(batch_key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        batch.append((item, future))
+        if len(batch) >= self.maximum_batch_size:
+            # close this batch, the next item will start a new one
+            self._close(batch_key, batch)
+
+        return await future
+
+    def _close(self, batch_key: Tuple[int, Hashable], batch: list):
+        if self._batches.get(batch_key) is batch:
+            self._batches.pop(batch_key)
+
+    async def _apply_after_window(self, batch_key: Tuple[int, Hashable], batch: list):
+        await asyncio.sleep(self.window_seconds)
+        self._close(batch_key, batch)
+
+        # callers which have gone away (e.g. the client disconnected) while the
+        # batch was open aren't waiting for their item to be applied
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        try:
+            results = await self.apply_batch([item for item, _ in batch])
+        except Exception as err:
+            if len(batch) == 1:
+                _deliver(batch[0][1], error=err)
+                return
+        else:
+            for (_, future), result in zip(batch, results):
+                _deliver(future, result)
+            return
+
+        # the batch failed, apply each item alone so errors go to the right caller
+        for item, future in batch:
+            try:
+                results = await self.apply_batch([item])
+            except Exception as err:
+                _deliver(future, error=err)
+            else:
+                _deliver(future, results[0])
+
+
+def _deliver(future: asyncio.Future, result: Any = None, error: Optional[Exception] = None):
+    """Give a caller its result, unless it has stopped waiting for it"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
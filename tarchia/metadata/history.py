@@ -4,10 +4,12 @@ import sys
 from io import BytesIO
 from typing import List
 from typing import Optional
+from typing import Union
 
 from fastavro import reader
 from fastavro import writer
 
+from tarchia.interfaces.storage.storage_provider import blob_stream
 from tarchia.models import HISTORY_SCHEMA
 from tarchia.models import HistoryEntry
 from tarchia.utils.constants import MAIN_BRANCH
@@ -103,8 +105,11 @@ class HistoryTree:
         return tree
 
     @classmethod
-    def load_from_avro(cls, contents: bytes, trunk_branch_name: str = MAIN_BRANCH) -> "HistoryTree":
-        stream = BytesIO(contents)
+    def load_from_avro(
+        cls, contents: Union[bytes, memoryview], trunk_branch_name: str = MAIN_BRANCH
+    ) -> "HistoryTree":
+        # contents may be a memoryview, read it without copying
+        stream = blob_stream(contents)
         data = list(reader(stream, HISTORY_SCHEMA))
         commits = (HistoryEntry(**record) for record in data)
         tree = cls.from_list(commits, trunk_branch_name)
@@ -1,15 +1,22 @@
 from typing import List
 from typing import Optional
 from typing import Tuple
+from typing import Union
+from typing import cast
 
 from tarchia.exceptions import DataError
+from tarchia.exceptions import UnableToReadBlobError
+from tarchia.interfaces.providers import providers
 from tarchia.interfaces.storage import StorageProvider
-from tarchia.interfaces.storage import storage_factory
+from tarchia.interfaces.storage.storage_provider import blob_stream
+from tarchia.interfaces.storage.storage_provider import run_in_io_executor
 from tarchia.metadata.manifests.pruning import prune
 from tarchia.models import Column
 from tarchia.models import Schema
 from tarchia.models.manifest_models import EntryType
 from tarchia.models.manifest_models import ManifestEntry
+from tarchia.utils.shared_cache import shared_cache
+from tarchia.utils.single_flight import metadata_loads
 
 
 def get_manifest(
@@ -36,37 +43,160 @@ def get_manifest(
         with no possible matching records. Blobs will still need to be filtered
         and blobs may not contain any matches.
     """
-    from io import BytesIO
-
-    import fastavro
+    if location is None:
+        return []
 
+    # the tree is read a level at a time, reading all of the manifests at each
+    # level in one pass
     manifest = []
+    locations = [location]
+    while locations:
+        manifests = _read_manifests(locations, storage_provider)
+        locations = _collect_entries(locations, manifests, filter_conditions, manifest)
+
+    # return accumulated records
+    return manifest
+
+
+async def aget_manifest(
+    location: Optional[str],
+    storage_provider: StorageProvider,
+    filter_conditions: Optional[List[Tuple[str, str, int]]],
+) -> List[ManifestEntry]:
+    """
+    Return the blobs from the manifests, without blocking the event loop.
+
+    The manifests at each level of the tree are read concurrently, and
+    concurrent requests for the same manifest share a single read. The entries
+    may be shared with other callers, they must not be modified.
+
+    Parameters:
+        manifest: str
+            The root manifest
+        storage_provider: StorageProvider
+            Inject the library to access storage
+        filters: Optional List of Tuples (field, operation, value)
+            Filters to apply to manifests, used for pruning blobs
 
+    Returns:
+        list of blob names
+    """
     if location is None:
+        return []
+
+    async def _load():
+        manifest = []
+        locations = [location]
+        while locations:
+            manifests = await _aread_manifests(locations, storage_provider)
+            locations = _collect_entries(locations, manifests, filter_conditions, manifest)
         return manifest
 
-    # get the manifest
-    manifest_bytes = storage_provider.read_blob(location)
-    manifest_complete = fastavro.reader(BytesIO(manifest_bytes))
+    filter_key = tuple(filter_conditions) if filter_conditions else None
+    return await metadata_loads.run(("manifest", location, filter_key), _load)
+
+
+def _read_manifests(locations: List[str], storage_provider: StorageProvider) -> list:
+    """
+    The decoded records of a level of the manifest tree, from the shared cache
+    where they've been decoded before (by any worker), otherwise from storage.
+    """
+    records, missing = _cached_manifests(locations)
+    if missing:
+        manifests = storage_provider.read_blobs(missing, views=True)
+        _add_decoded(locations, records, missing, manifests)
+    return records
 
-    for entry in manifest_complete:
-        manifest_entry = ManifestEntry(**entry)
 
-        # filter the rows we don't want
-        if filter_conditions and prune(manifest_entry, filter_conditions):
+async def _aread_manifests(locations: List[str], storage_provider: StorageProvider) -> list:
+    """
+    The async version of _read_manifests, reading the shared cache (which takes a
+    lock on its folder) and decoding are done on the I/O pool, not the event loop.
+    """
+    if shared_cache() is None:
+        records, missing = [None] * len(locations), list(locations)
+    else:
+        records, missing = await run_in_io_executor(_cached_manifests, locations)
+    if missing:
+        manifests = await storage_provider.aread_many(missing, views=True)
+        await run_in_io_executor(_add_decoded, locations, records, missing, manifests)
+    return records
+
+
+def _cached_manifests(locations: List[str]) -> Tuple[list, List[str]]:
+    """The records from the shared cache (None where not cached) and the locations to read"""
+    cache = shared_cache()
+    records = [cache.get("manifest", location) if cache else None for location in locations]
+    missing = [location for location, cached in zip(locations, records) if cached is None]
+    return records, missing
+
+
+def _add_decoded(locations: List[str], records: list, missing: List[str], manifests: list):
+    """Decode the manifests read from storage into the records, and the shared cache"""
+    cache = shared_cache()
+    positions = {location: i for i, location in enumerate(locations)}
+    for location, manifest_bytes in zip(missing, manifests):
+        if isinstance(manifest_bytes, Exception) or manifest_bytes is None:
+            records[positions[location]] = manifest_bytes
             continue
+        decoded = decode_manifest_records(manifest_bytes)
+        if cache:
+            cache.set("manifest", location, decoded)
+        records[positions[location]] = decoded
 
-        # if the rows are manifests, call get_manifest
-        if manifest_entry.file_type == EntryType.Manifest:
-            manifest.extend(get_manifest(manifest_entry, storage_provider, filter_conditions))
-        else:
-            manifest.append(manifest_entry)
 
-    # return accumulated records
-    return manifest
+def _collect_entries(
+    locations: List[str],
+    manifests: list,
+    filter_conditions: Optional[List[Tuple[str, str, int]]],
+    manifest: List[ManifestEntry],
+) -> List[str]:
+    """
+    Add the data entries from a level of the manifest tree to the manifest and
+    return the locations of the child manifests.
+    """
+    child_manifests = []
+    for location, records in zip(locations, manifests):
+        if isinstance(records, Exception):
+            raise records
+        if records is None:
+            raise UnableToReadBlobError(f"Unable to read manifest {location}.")
+
+        for manifest_entry in (ManifestEntry(**record) for record in records):
+            # filter the rows we don't want
+            if filter_conditions and prune(manifest_entry, filter_conditions):
+                continue
+
+            if manifest_entry.file_type == EntryType.Manifest:
+                child_manifests.append(manifest_entry.file_path)
+            else:
+                manifest.append(manifest_entry)
+    return child_manifests
+
+
+def read_manifest(manifest_bytes: Union[bytes, memoryview]) -> List[ManifestEntry]:
+    """
+    Decode the entries in a single manifest file, child manifests are not read.
+
+    Parameters:
+        manifest_bytes: bytes or memoryview
+            The raw manifest file
 
+    Returns:
+        list of manifest entries
+    """
+    return [ManifestEntry(**record) for record in decode_manifest_records(manifest_bytes)]
 
-def write_manifest(location: str, storage_provider: StorageProvider, entries: List[ManifestEntry]):
+
+def decode_manifest_records(manifest_bytes: Union[bytes, memoryview]) -> List[dict]:
+    """Decode the records in a single manifest file, as dictionaries"""
+    import fastavro
+
+    # the manifest schema is a record, so every message is a dictionary
+    return cast(List[dict], list(fastavro.reader(blob_stream(manifest_bytes))))
+
+
+def encode_manifest(entries: List[ManifestEntry]) -> bytes:
     from io import BytesIO
 
     import fastavro
@@ -82,8 +212,41 @@ def write_manifest(location: str, storage_provider: StorageProvider, entries: Li
         codec="zstandard",
     )
 
-    stream.seek(0)
-    storage_provider.write_blob(location, stream.read())
+    return stream.getvalue()
+
+
+def write_manifest(location: str, storage_provider: StorageProvider, entries: List[ManifestEntry]):
+    storage_provider.write_blob(location, encode_manifest(entries))
+
+
+async def awrite_manifest(
+    location: str, storage_provider: StorageProvider, entries: List[ManifestEntry]
+):
+    await storage_provider.awrite_blob(location, encode_manifest(entries))
+
+
+def _read_data_file(path: str):
+    """Read a data file, its path is either local or prefixed with the storage host"""
+    if "://" in path:
+        host, blob_path = path.split("://")
+        storage_provider = providers.data_storage(host)
+    else:
+        blob_path = path
+        storage_provider = providers.data_storage("LOCAL")
+
+    # data files are read rather than mapped, they may be changed by their owners
+    # and a mapped file which is truncated raises SIGBUS when it's read
+    file_bytes = storage_provider.read_blob(blob_path, bucket_in_path=True)
+    if file_bytes is None:
+        raise UnableToReadBlobError(f"Unable to read {blob_path}.")
+    return file_bytes
+
+
+def data_file_checksum(path: str) -> str:
+    """The SHA-256 checksum of a data file, as recorded in its manifest entry"""
+    from hashlib import sha256
+
+    return sha256(_read_data_file(path)).hexdigest()
 
 
 def build_manifest_entry(path: str, expected_schema: Schema) -> ManifestEntry:
@@ -97,35 +260,22 @@ def build_manifest_entry(path: str, expected_schema: Schema) -> ManifestEntry:
         ManifestEntry: The constructed manifest entry with file details and column statistics.
     """
     from hashlib import sha256
-    from io import BytesIO
 
     from pyarrow import parquet
 
     from tarchia.utils.to_int import to_int
 
-    if "://" in path:
-        host, blob_path = path.split("://")
-        storage_provider = storage_factory(host)
-    else:
-        blob_path = path
-        storage_provider = storage_factory("LOCAL")
-
     new_manifest_entry = ManifestEntry(
         file_path=path, file_format="parquet", file_type=EntryType.Data
     )
 
     # Read the file bytes and initialize the Parquet file object
-    file_bytes = storage_provider.read_blob(blob_path, bucket_in_path=True)
-    if file_bytes is None:
-        from tarchia.exceptions import UnableToReadBlobError
-
-        raise UnableToReadBlobError(f"Unable to read {blob_path}.")
+    file_bytes = _read_data_file(path)
 
     new_manifest_entry.file_size = len(file_bytes)
     new_manifest_entry.sha256_checksum = sha256(file_bytes).hexdigest()
 
-    stream = BytesIO(file_bytes)
-    parquet_file = parquet.ParquetFile(stream)
+    parquet_file = parquet.ParquetFile(blob_stream(file_bytes))
     new_manifest_entry.record_count = parquet_file.metadata.num_rows
 
     parquet_columns_names = set(parquet_file.schema.names)
@@ -138,11 +288,23 @@ def build_manifest_entry(path: str, expected_schema: Schema) -> ManifestEntry:
 
     # Initialize statistics for each column
     for column in parquet_file.schema_arrow.names:
+        # the null count is only recorded if every row group has statistics
+        null_count = 0
         # Iterate over each row group to gather statistics
         for row_group_index in range(parquet_file.metadata.num_row_groups):
             column_index = parquet_file.schema_arrow.get_field_index(column)
             column_chunk = parquet_file.metadata.row_group(row_group_index).column(column_index)
 
+            statistics = column_chunk.statistics
+            if null_count is not None:
+                if statistics is None or not statistics.has_null_count:
+                    null_count = None
+                elif not statistics.has_min_max and statistics.null_count < column_chunk.num_values:
+                    # there are values which the bounds don't describe
+                    null_count = None
+                else:
+                    null_count += statistics.null_count
+
             if column_chunk.statistics is not None:
                 # Update lower bounds
                 min_value = to_int(column_chunk.statistics.min)
@@ -164,4 +326,7 @@ def build_manifest_entry(path: str, expected_schema: Schema) -> ManifestEntry:
                             new_manifest_entry.upper_bounds[column], max_value
                         )
 
+        if null_count is not None:
+            new_manifest_entry.null_counts[column] = null_count
+
     return new_manifest_entry
@@ -2,6 +2,7 @@ from typing import Any
 from typing import List
 from typing import Tuple
 
+from tarchia.exceptions import InvalidFilterError
 from tarchia.models import Schema
 from tarchia.models.manifest_models import ManifestEntry
 from tarchia.utils.to_int import to_int
@@ -15,32 +16,51 @@ def parse_value(field: str, value: Any, schema: Schema) -> int:
     return None
 
 
-def parse_filters(filter_string: str, schema: Schema) -> List[Tuple[str, str, int]]:
+def parse_filters(
+    filter_string: str, schema: Schema, strict: bool = False
+) -> List[Tuple[str, str, int]]:
     """
     Parse a filter string into a list of tuples.
 
     Parameters:
         filter_string: str - The filter string in the format 'column=value, column>value, ...'
+        strict: bool - Raise an error for clauses which can't be used, rather than
+            ignoring them; filters which select data to change must be strict
 
     Returns:
         List[Tuple[str, str, str]]: A list of tuples containing (column, operator, value).
+
+    Raises:
+        InvalidFilterError: If strict and a clause can't be parsed or names a
+            column which isn't in the schema.
     """
     if filter_string is None:
         return None
 
-    operators = ("=", ">", ">=", "<", "<=")
+    # the longest operators first, so '>=' isn't read as '='
+    operators = (">=", "<=", "=", ">", "<")
     filters = []
 
     for item in filter_string.split(","):
-        for operator in operators:
-            if operator in item:
-                column, value = map(str.strip, item.split(operator, 1))
-                if value and value[0] == value[-1] == "'":
-                    value = value[1:-1]
-                int_value = parse_value(column, value, schema)
-                if int_value is not None:
-                    filters.append((column, operator, int_value))
-                break
+        operator = next((op for op in operators if op in item), None)
+        if operator is None:
+            if strict:
+                raise InvalidFilterError(f"Unable to interpret filter '{item.strip()}'.")
+            continue
+        column, value = map(str.strip, item.split(operator, 1))
+        if value and value[0] == value[-1] == "'":
+            value = value[1:-1]
+        try:
+            int_value = parse_value(column, value, schema)
+        except (TypeError, ValueError) as err:
+            if not strict:
+                raise
+            raise InvalidFilterError(f"Unable to interpret filter '{item.strip()}'.") from err
+        if int_value is None:
+            if strict:
+                raise InvalidFilterError(f"Filter column '{column}' is not in the schema.")
+            continue
+        filters.append((column, operator, int_value))
 
     return filters
 
@@ -68,3 +88,43 @@ def prune(record: ManifestEntry, condition: List[Tuple[str, str, int]]) -> bool:
             return True
 
     return False
+
+
+def matches_all(record: ManifestEntry, condition: List[Tuple[str, str, int]]) -> bool:
+    """
+    Determine if every record in a blob is guaranteed to match the filters, using
+    the min/max information.
+
+    The bounds are orderable integer representations of the values and may have
+    lost precision, so only strict comparisons are used and equality can never be
+    guaranteed. The bounds don't include nulls, which never match a filter, so
+    only columns known to have no nulls (across every row group) can match.
+
+    Parameters:
+        record: ManifestEntry
+            The manifest entry for the blob
+        condition: List[Tuple[str, str, int]]
+            Filters in the form (column, operator, value)
+
+    Returns:
+        bool: True if all of the records in the blob match
+    """
+    if not condition:
+        return False
+
+    for column, op, value in condition:
+        lower_bound = record.lower_bounds.get(column)
+        upper_bound = record.upper_bounds.get(column)
+
+        if lower_bound is None or upper_bound is None:
+            return False
+        if record.null_counts.get(column) != 0:
+            return False
+        if op in (">", ">=") and not lower_bound > value:
+            return False
+        if op in ("<", "<=") and not upper_bound < value:
+            return False
+        if op == "=":
+            return False
+
+    return True
@@ -0,0 +1,203 @@
+"""
+Transaction Staging
+
+Files staged to a transaction are written to segments in the table's staging
+area rather than being carried in the transaction token, the token only
+references the segments.
+
+Building a manifest entry means reading the data file, so rather than doing
+this for every staged file when the transaction is committed, the entries for
+each segment are built in the background as soon as the files are staged and
+written alongside the segment. Committing then only has to assemble the
+prebuilt entries, any which aren't available (e.g. the build failed or is
+running on another instance) are built when the transaction is committed.
+
+Data files are expected to be immutable once staged, but the prebuilt entries
+record the checksum of the file as it was when it was staged and an entry is
+only used if the file still has that checksum when it's committed, otherwise
+the entry is built again.
+
+The segments are deleted when the transaction is committed or aborted.
+Transactions which are abandoned (never committed or aborted) leave their
+segments in the staging area, `metadata/staging/<table>/<transaction>`, which
+can be swept with a lifecycle rule on the bucket.
+"""
+
+import asyncio
+import concurrent.futures
+from typing import Dict
+from typing import List
+
+import orjson
+
+from tarchia.exceptions import TransactionError
+from tarchia.interfaces.storage import StorageProvider
+from tarchia.models import Schema
+from tarchia.models import Transaction
+from tarchia.models.manifest_models import ManifestEntry
+from tarchia.utils import build_root
+from tarchia.utils import generate_uuid
+from tarchia.utils.constants import STAGING_ROOT
+
+_executor: concurrent.futures.ThreadPoolExecutor = None
+_pending: Dict[str, concurrent.futures.Future] = {}
+
+
+def _ensure_executor():
+    global _executor
+    if _executor is None or _executor._shutdown:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    return _executor
+
+
+def _segment_root(transaction: Transaction) -> str:
+    staging_root = build_root(STAGING_ROOT, owner=transaction.owner, table_id=transaction.table_id)
+    return f"{staging_root}/{transaction.transaction_id}"
+
+
+def _build_segment_entries(
+    storage_provider: StorageProvider, location: str, paths: List[str], schema: Schema
+):
+    from tarchia.metadata.manifests import build_manifest_entry
+    from tarchia.metadata.manifests import write_manifest
+
+    entries = [build_manifest_entry(path, schema) for path in paths]
+    write_manifest(location=location, storage_provider=storage_provider, entries=entries)
+
+
+async def stage_files(
+    storage_provider: StorageProvider, transaction: Transaction, paths: List[str]
+) -> str:
+    """
+    Write a staging segment for a set of files and start building their manifest
+    entries in the background.
+
+    Parameters:
+        storage_provider: StorageProvider
+            Inject the library to access storage
+        transaction: Transaction
+            The transaction the files are being staged to
+        paths: List[str]
+            The files to stage
+
+    Returns:
+        str: The identifier of the new segment.
+    """
+    segment_id = generate_uuid()
+    segment_root = _segment_root(transaction)
+
+    await storage_provider.awrite_blob(
+        f"{segment_root}/segment-{segment_id}.json", orjson.dumps(paths)
+    )
+
+    future = _ensure_executor().submit(
+        _build_segment_entries,
+        storage_provider,
+        f"{segment_root}/segment-{segment_id}.avro",
+        paths,
+        transaction.table_schema,
+    )
+    _pending[segment_id] = future
+    future.add_done_callback(lambda _: _pending.pop(segment_id, None))
+
+    return segment_id
+
+
+async def load_staged_files(
+    storage_provider: StorageProvider, transaction: Transaction
+) -> List[str]:
+    """
+    Read the files staged for a transaction from its staging segments.
+
+    Parameters:
+        storage_provider: StorageProvider
+            Inject the library to access storage
+        transaction: Transaction
+            The transaction to read the staged files for
+
+    Returns:
+        List[str]: The staged file paths, in the order they were staged.
+    """
+    segment_root = _segment_root(transaction)
+
+    segments = await storage_provider.aread_many(
+        [f"{segment_root}/segment-{segment_id}.json" for segment_id in transaction.staged_segments]
+    )
+
+    paths = []
+    for segment_id, segment in zip(transaction.staged_segments, segments):
+        if segment is None:
+            raise TransactionError(f"Transaction failed: Staged files ({segment_id}) missing")
+        paths.extend(orjson.loads(segment))
+    return paths
+
+
+async def discard_staged_files(storage_provider: StorageProvider, transaction: Transaction):
+    """
+    Delete the staging segments for a transaction, once it has been committed or
+    aborted. Failing to delete a segment doesn't fail the caller, the segments
+    aren't referenced by anything once the transaction is finished.
+
+    Parameters:
+        storage_provider: StorageProvider
+            Inject the library to access storage
+        transaction: Transaction
+            The finished transaction
+    """
+    segment_root = _segment_root(transaction)
+
+    for segment_id in transaction.staged_segments:
+        future = _pending.get(segment_id)
+        # builds which haven't started are cancelled, running builds are waited
+        # for so they don't write their entries after we've deleted the segment
+        if future is not None and not future.cancel():
+            try:
+                await asyncio.wrap_future(future)
+            # the entries are being discarded, so a failed build doesn't matter
+            except Exception:  # nosec B110
+                pass
+        for suffix in ("json", "avro"):
+            try:
+                await storage_provider.adelete_blob(f"{segment_root}/segment-{segment_id}.{suffix}")
+            except Exception as err:  # pragma: no cover
+                print(f"Unable to delete staging segment {segment_id} - {err}")
+
+
+async def load_staged_entries(
+    storage_provider: StorageProvider, transaction: Transaction
+) -> Dict[str, ManifestEntry]:
+    """
+    Read the prebuilt manifest entries for the files staged for a transaction.
+
+    If the entries for a segment are still being built by this instance we wait
+    for them rather than building them again.
+
+    Parameters:
+        storage_provider: StorageProvider
+            Inject the library to access storage
+        transaction: Transaction
+            The transaction to read the manifest entries for
+
+    Returns:
+        Dict[str, ManifestEntry]: The available entries, keyed by file path.
+    """
+    from tarchia.metadata.manifests import read_manifest
+
+    segment_root = _segment_root(transaction)
+
+    available = []
+    for segment_id in transaction.staged_segments:
+        future = _pending.get(segment_id)
+        if future is not None:
+            try:
+                await asyncio.wrap_future(future)
+            # the entries will be built again, and any errors raised, on commit
+            except Exception:  # nosec B112
+                continue
+        available.append(f"{segment_root}/segment-{segment_id}.avro")
+
+    entries: Dict[str, ManifestEntry] = {}
+    for segment in await storage_provider.aread_many(available, views=True):
+        if segment is not None:
+            entries.update((entry.file_path, entry) for entry in read_manifest(segment))
+    return entries
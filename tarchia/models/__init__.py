@@ -17,6 +17,7 @@ from .request_models import CommitRequest
 from .request_models import CreateOwnerRequest
 from .request_models import CreateTableRequest
 from .request_models import CreateViewRequest
+from .request_models import DeleteFilesRequest
 from .request_models import StageFilesRequest
 from .request_models import TransactionRequest
 from .request_models import UpdateMetadataRequest
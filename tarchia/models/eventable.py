@@ -28,12 +28,9 @@ from typing import List
 from typing import Union
 
 import orjson
-import requests
 from orso.tools import counter
 from orso.tools import retry
 from pydantic import BaseModel
-from requests.exceptions import ConnectionError
-from requests.exceptions import Timeout
 
 
 def is_valid_url(url: str) -> bool:
@@ -104,8 +101,12 @@ class Eventable:
             if not (s.user == user and s.event == event.value and s.url == url)
         ]
 
-    def trigger_event(self, event: Union[str, EventTypes], data: dict):
-        """Trigger an event and notify all subscribers."""
+    def trigger_event(self, event: Union[str, Enum], data: dict):
+        """
+        Trigger an event and notify all subscribers.
+
+        The event is one of the EventTypes of the subclass, or its name.
+        """
         if isinstance(event, str):
             event = event.upper()  # Ensure the event string is in lowercase
             try:
@@ -128,15 +129,36 @@ class Eventable:
         except Exception as err:
             print(f"[TARCHIA] Error notifying subscribers. {err} ({data})")
 
-    @retry(
-        max_tries=3,
-        backoff_seconds=5,
-        exponential_backoff=True,
-        max_backoff=60,
-        retry_exceptions=(ConnectionError, Timeout),
-    )
     def _send_request_with_retries(self, url: str, data: dict):
         """Send the actual HTTP request with retries."""
-        response = requests.post(url, json=data, timeout=10)
-        response.raise_for_status()
-        print(f"Notification sent to {url}: {response.status_code}")
+        _request_sender()(url, data)
+
+
+_sender = None
+
+
+def _request_sender():
+    """
+    requests is slow to import and only needed once there's something to send,
+    so the sender is created on first use rather than when the module is imported.
+    """
+    global _sender
+    if _sender is None:
+        import requests
+        from requests.exceptions import ConnectionError
+        from requests.exceptions import Timeout
+
+        @retry(
+            max_tries=3,
+            backoff_seconds=5,
+            exponential_backoff=True,
+            max_backoff=60,
+            retry_exceptions=(ConnectionError, Timeout),
+        )
+        def send(url: str, data: dict):
+            response = requests.post(url, json=data, timeout=10)
+            response.raise_for_status()
+            print(f"Notification sent to {url}: {response.status_code}")
+
+        _sender = send
+    return _sender
@@ -52,6 +52,7 @@ class Commit(TarchiaBaseModel):
     commit_sha: Optional[str] = None
     added_files: Optional[List[str]] = Field(default_factory=list)
     removed_files: Optional[List[str]] = Field(default_factory=list)
+    truncated: bool = False
 
     def calculate_hash(self) -> str:
         import hashlib
@@ -64,11 +65,16 @@ class Commit(TarchiaBaseModel):
         hasher.update(str(self.last_updated_ms).encode())
         if self.parent_commit_sha:
             hasher.update(self.parent_commit_sha.encode())
+        # commits racing from the same parent can otherwise have identical hashes
+        if self.manifest_path:
+            hasher.update(self.manifest_path.encode())
         return hasher.hexdigest()
 
     def __init__(self, **data):
         super().__init__(**data)
-        self.commit_sha = self.calculate_hash()
+        # commits read from storage keep the hash they were written with
+        if self.commit_sha is None:
+            self.commit_sha = self.calculate_hash()
 
     @property
     def history_entry(self):
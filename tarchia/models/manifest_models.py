@@ -53,6 +53,9 @@ class ManifestEntry(TarchiaBaseModel):
         sha256_checksum (Optional[str]): The SHA-256 checksum of the file. Defaults to None.
         lower_bounds (Dict[str, int]): A dictionary containing the lower bounds for data values.
         upper_bounds (Dict[str, int]): A dictionary containing the upper bounds for data values.
+        null_counts (Dict[str, int]): The number of nulls in each column, only for the
+            columns where the file's statistics cover every row, the bounds don't
+            include nulls so they only describe every row where the count is 0.
     """
 
     file_path: str
@@ -62,6 +65,7 @@ class ManifestEntry(TarchiaBaseModel):
     sha256_checksum: Optional[str] = None
     lower_bounds: Dict[str, int] = Field(default_factory=dict)
     upper_bounds: Dict[str, int] = Field(default_factory=dict)
+    null_counts: Dict[str, int] = Field(default_factory=dict)
 
 
 # Avro schema definition for the ManifestEntry
@@ -79,5 +83,6 @@ MANIFEST_SCHEMA = {
         {"name": "sha256_checksum", "type": ["null", "string"], "default": None},
         {"name": "lower_bounds", "type": {"type": "map", "values": "long"}},
         {"name": "upper_bounds", "type": {"type": "map", "values": "long"}},
+        {"name": "null_counts", "type": {"type": "map", "values": "long"}, "default": {}},
     ],
 }
@@ -228,3 +228,6 @@ class Transaction(TarchiaBaseModel):
     additions: List[str] = Field(default_factory=list)
     deletions: List[str] = Field(default_factory=list)
     truncate: bool = False
+    deletion_prefixes: List[str] = Field(default_factory=list)
+    deletion_filters: List[str] = Field(default_factory=list)
+    staged_segments: List[str] = Field(default_factory=list)
@@ -111,6 +111,26 @@ class StageFilesRequest(TransactionRequest):
     paths: List[str]
 
 
+class DeleteFilesRequest(TransactionRequest):
+    """
+    Model for removing files from a table.
+
+    Files can be identified by any combination of the criteria, a file matching
+    any of them is removed.
+
+    Attributes:
+        paths (List[str]): The paths of the files to remove.
+        prefix (Optional[str]): Remove the files whose path starts with this, it's
+            a raw prefix so end a partition with '/', e.g. 'data/year=2020/'.
+        filters (Optional[str]): Remove the files where every record matches these
+            filters, in the format 'column=value, column>value, ...'.
+    """
+
+    paths: List[str] = Field(default_factory=list)
+    prefix: Optional[str] = None
+    filters: Optional[str] = None
+
+
 class CreateViewRequest(TarchiaBaseModel):
     name: str
     statement: str
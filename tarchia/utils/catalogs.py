@@ -1,3 +1,4 @@
+from typing import Callable
 from typing import Optional
 
 import orjson
@@ -5,34 +6,82 @@ import orjson
 from tarchia.exceptions import CommitNotFoundError
 from tarchia.exceptions import OwnerNotFoundError
 from tarchia.exceptions import TableNotFoundError
+from tarchia.exceptions import TransactionError
 from tarchia.exceptions import ViewNotFoundError
-from tarchia.interfaces.catalog import catalog_factory
+from tarchia.interfaces.catalog.provider_base import CatalogProvider
+from tarchia.interfaces.providers import providers
+from tarchia.interfaces.storage.storage_provider import run_in_io_executor
 from tarchia.models import Commit
 from tarchia.models import OwnerEntry
 from tarchia.models import TableCatalogEntry
 from tarchia.models import ViewCatalogEntry
+from tarchia.utils.shared_cache import shared_cache
+from tarchia.utils.single_flight import metadata_loads
 
-catalog_provider = catalog_factory()
+MAXIMUM_UPDATE_ATTEMPTS = 10
 
 
-def identify_table(owner: str, table: str) -> TableCatalogEntry:
+def identify_table(
+    owner: str, table: str, catalog_provider: Optional[CatalogProvider] = None
+) -> TableCatalogEntry:
     """Get the catalog entry for a table name/identifier"""
+    catalog_provider = catalog_provider or providers.catalog()
     catalog_entry = catalog_provider.get_table(owner=owner, table=table)
     if catalog_entry is None:
         raise TableNotFoundError(owner=owner, table=table)
     return TableCatalogEntry(**catalog_entry)
 
 
-def identify_owner(name: str) -> OwnerEntry:
+def update_table_entry(
+    owner: str,
+    table: str,
+    update: Callable[[TableCatalogEntry], None],
+    catalog_provider: Optional[CatalogProvider] = None,
+) -> TableCatalogEntry:
+    """
+    Change a table's catalog entry without reverting a commit or another change
+    made at the same time; the entry is swapped only if it is still the entry we
+    read, and is read again and the change reapplied if it isn't.
+
+    Parameters:
+        owner: str
+            The owner of the table
+        table: str
+            The name of the table
+        update: Callable
+            Makes the change to the catalog entry
+        catalog_provider: CatalogProvider
+            The catalog to update
+
+    Returns:
+        TableCatalogEntry: The updated catalog entry
+    """
+    catalog_provider = catalog_provider or providers.catalog()
+    for _ in range(MAXIMUM_UPDATE_ATTEMPTS):
+        stored = catalog_provider.get_table(owner=owner, table=table)
+        if stored is None:
+            raise TableNotFoundError(owner=owner, table=table)
+        catalog_entry = TableCatalogEntry(**stored)
+        update(catalog_entry)
+        if catalog_provider.swap_table(catalog_entry.table_id, stored, catalog_entry):
+            return catalog_entry
+    raise TransactionError(f"Unable to update {owner}.{table}, it is being changed")
+
+
+def identify_owner(name: str, catalog_provider: Optional[CatalogProvider] = None) -> OwnerEntry:
     """Get the catalog entry for a table name/identifier"""
+    catalog_provider = catalog_provider or providers.catalog()
     catalog_entry = catalog_provider.get_owner(name=name)
     if catalog_entry is None:
         raise OwnerNotFoundError(owner=name)
     return OwnerEntry(**catalog_entry)
 
 
-def identify_view(owner: str, view: str) -> ViewCatalogEntry:
+def identify_view(
+    owner: str, view: str, catalog_provider: Optional[CatalogProvider] = None
+) -> ViewCatalogEntry:
     """Get the catalog entry for a table name/identifier"""
+    catalog_provider = catalog_provider or providers.catalog()
     catalog_entry = catalog_provider.get_view(owner=owner, view=view)
     if catalog_entry is None:
         raise ViewNotFoundError(owner=owner, view=view)
@@ -46,3 +95,44 @@ def load_commit(storage_provider, commit_root, commit_sha) -> Optional[Commit]:
             raise CommitNotFoundError(root=commit_root, commit=commit_sha)
         return Commit(**orjson.loads(commit_file))
     return None
+
+
+async def aload_commit(storage_provider, commit_root, commit_sha) -> Optional[Commit]:
+    """
+    Load a commit, concurrent loads of the same commit share a single read and
+    commits loaded by any worker are in the shared cache (if it's enabled). The
+    shared cache is read and written on the I/O pool, not the event loop.
+
+    The commit may be shared with other callers, it must not be modified.
+    """
+    if commit_sha:
+        commit_path = f"{commit_root}/commit-{commit_sha}.json"
+
+        async def _load():
+            cache = shared_cache()
+            values = None
+            if cache:
+                values = await run_in_io_executor(cache.get, "commit", commit_path)
+            if values is None:
+                commit_file = await storage_provider.aread_blob(commit_path)
+                if commit_file is None:
+                    raise CommitNotFoundError(root=commit_root, commit=commit_sha)
+                values = orjson.loads(commit_file)
+                if cache:
+                    await run_in_io_executor(cache.set, "commit", commit_path, values)
+            return Commit(**values)
+
+        return await metadata_loads.run(("commit", commit_path), _load)
+    return None
+
+
+async def aload_history(storage_provider, history_file: str) -> Optional[memoryview]:
+    """
+    Read a history file, concurrent reads of the same file share a single read.
+
+    The raw file is shared rather than the decoded tree, as trees are modified
+    when commits are added to them.
+    """
+    return await metadata_loads.run(
+        ("history", history_file), lambda: storage_provider.aread_blob_view(history_file)
+    )
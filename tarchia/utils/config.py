@@ -12,8 +12,7 @@
 
 from os import environ
 from pathlib import Path
-
-import yaml
+from tempfile import gettempdir
 
 # python-dotenv allows us to create an environment file to store secrets. If
 # there is no .env it will fail gracefully.
@@ -36,6 +35,8 @@ elif dotenv is not None:  # pragma: no cover
 try:  # pragma: no cover
     _config_path = Path(".") / "opteryx.yaml"
     if _config_path.exists():
+        import yaml
+
         with open(_config_path, "rb") as _config_file:
             _config_values = yaml.safe_load(_config_file)
         print(f"Loading config from {_config_path}")
@@ -69,6 +70,71 @@ METADATA_ROOT: str = get("METADATA_ROOT", "warehouse")
 TRANSACTION_SIGNER: str = get("TRANSACTION_SIGNER", "secret")
 """The key used to sign transactions."""
 
+TRANSACTION_LIFETIME_SECONDS: int = int(get("TRANSACTION_LIFETIME_SECONDS", 3600))
+"""How long a transaction can be staged to and committed after it is started."""
+
+GROUP_COMMIT_WINDOW_MS: int = int(get("GROUP_COMMIT_WINDOW_MS", 25))
+"""How long to collect commits to CONTINUOUS tables to write as one commit, 0 to disable."""
+
+STORAGE_IO_THREADS: int = int(get("STORAGE_IO_THREADS", 64))
+"""The number of threads (and pooled connections) used for storage requests."""
+
+LOCAL_STORAGE_GROUP_SYNC: bool = str(get("LOCAL_STORAGE_GROUP_SYNC", "false")).lower() == "true"
+"""Share the directory syncs made by concurrent writes to local storage."""
+
+STORAGE_CACHE_MEMORY_MB: int = int(get("STORAGE_CACHE_MEMORY_MB", 64))
+"""The size of the in-memory cache of metadata blobs, 0 to disable."""
+
+STORAGE_CACHE_DISK_MB: int = int(get("STORAGE_CACHE_DISK_MB", 0))
+"""The size of the on-disk cache of metadata blobs, 0 to disable."""
+
+STORAGE_CACHE_FOLDER: str = get("STORAGE_CACHE_FOLDER", str(Path(gettempdir()) / "tarchia-cache"))
+"""The folder for the on-disk cache of metadata blobs."""
+
+STORAGE_CACHE_EXCLUDE: str = get("STORAGE_CACHE_EXCLUDE")
+"""Comma separated patterns of paths which can change, so must not be cached."""
+
+WORKERS: int = int(get("WORKERS", 1))
+"""The number of worker processes serving requests."""
+
+SHARED_CACHE_MB: int = int(get("SHARED_CACHE_MB", 256 if WORKERS > 1 else 0))
+"""The size of the cache of decoded manifests and commits shared by the workers, 0 to disable."""
+
+SHARED_CACHE_FOLDER: str = get(
+    "SHARED_CACHE_FOLDER",
+    # B108: the default is fixed because the workers find the cache in shared
+    # memory by name; deployments where other users can write to /dev/shm should
+    # set SHARED_CACHE_FOLDER to a folder only the service can write to
+    "/dev/shm/tarchia-metadata"  # nosec B108
+    if Path("/dev/shm").is_dir()  # nosec B108
+    else str(Path(gettempdir()) / "tarchia-metadata"),
+)
+"""The folder for the shared cache, in shared memory (/dev/shm) where it's available."""
+
+STORAGE_METRICS: bool = str(get("STORAGE_METRICS", "true")).lower() == "true"
+"""Count the requests, bytes and time spent on storage, reported on /metrics."""
+
+AUTH_JWT_KEYS: str = get("AUTH_JWT_KEYS")
+"""Keys to verify HS256 access tokens, comma separated `kid=secret` pairs or a single secret."""
+
+AUTH_PERMISSION_CACHE_SECONDS: int = int(get("AUTH_PERMISSION_CACHE_SECONDS", 60))
+"""How long the compiled permissions for a table are used before being read again."""
+
+AUDIT_LOG_SINK: str = get("AUDIT_LOG_SINK", "STDOUT")
+"""Where audit records are written; STDOUT, FILE, STORAGE or NONE."""
+
+AUDIT_LOG_FILE: str = get("AUDIT_LOG_FILE")
+"""The file audit records are appended to when AUDIT_LOG_SINK is FILE."""
+
+AUDIT_LOG_BUFFER_SIZE: int = int(get("AUDIT_LOG_BUFFER_SIZE", 10_000))
+"""The most audit records to hold waiting to be written, further records are dropped."""
+
+AUDIT_LOG_FLUSH_MS: int = int(get("AUDIT_LOG_FLUSH_MS", 1000))
+"""The longest an audit record waits before it is written."""
+
+S3_ENDPOINT_URL: str = get("S3_ENDPOINT_URL")
+"""The endpoint of an S3 compatible store (e.g. MinIO), leave unset for AWS."""
+
 BUCKET_NAME: str = get("BUCKET_NAME") 
 """S3/GCP Metadata Bucket Name"""
 
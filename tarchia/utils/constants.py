@@ -6,5 +6,6 @@ SHA_OR_HEAD_REG_EX = r"^(head|[a-f0-9]{64})$"
 HISTORY_ROOT = "[metadata_root]/[owner]/[table_id]/metadata/history"
 MANIFEST_ROOT = "[metadata_root]/[owner]/[table_id]/metadata/manifests"
 COMMITS_ROOT = "[metadata_root]/[owner]/[table_id]/metadata/commits"
+STAGING_ROOT = "[metadata_root]/[owner]/[table_id]/metadata/staging"
 
 MAIN_BRANCH = "main"
@@ -4,6 +4,7 @@ A simple document store used for testing and development.
 Not intended for production use.
 """
 
+import threading
 from typing import Any
 from typing import Dict
 from typing import List
@@ -15,6 +16,8 @@ class _DocumentStore:
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.data = self._load()
+        # re-entrant so callers can hold the lock across a find and an upsert
+        self.lock = threading.RLock()
 
     def _load(self) -> Dict[str, Dict[str, Any]]:
         try:
@@ -37,27 +40,29 @@ class _DocumentStore:
         return [doc for doc in self.data.get(collection, []) if matches(doc)]
 
     def upsert(self, collection: str, document: Dict[str, Any], query: Dict[str, Any] = {}) -> None:
-        collection_data = self.data.setdefault(collection, [])
-        updated = False
+        with self.lock:
+            collection_data = self.data.setdefault(collection, [])
+            updated = False
 
-        for doc in collection_data:
-            if all(doc.get(k) == v for k, v in query.items()):
-                doc.update(document)
-                updated = True
-                break
+            for doc in collection_data:
+                if all(doc.get(k) == v for k, v in query.items()):
+                    doc.update(document)
+                    updated = True
+                    break
 
-        if not updated:
-            collection_data.append(document)
+            if not updated:
+                collection_data.append(document)
 
-        self._save()
+            self._save()
 
     def delete(self, collection: str, query: Dict[str, Any]) -> None:
-        self.data[collection] = [
-            doc
-            for doc in self.data.get(collection, [])
-            if not all(doc.get(k) == v for k, v in query.items())
-        ]
-        self._save()
+        with self.lock:
+            self.data[collection] = [
+                doc
+                for doc in self.data.get(collection, [])
+                if not all(doc.get(k) == v for k, v in query.items())
+            ]
+            self._save()
 
 
 class DocumentStore(_DocumentStore):
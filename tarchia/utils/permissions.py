@@ -0,0 +1,226 @@
+"""
+Table Permissions
+
+Who can do what to a table is decided by its `permissions`, its `visibility`
+and the memberships of its owner:
+
+- callers who are members of the owner (their subject or one of their roles is
+  the owner's name or in the owner's `memberships`) own the owner's tables
+- a permission granted to a named role applies to callers holding that role
+- a permission granted to `*` applies to every caller, unless the table is
+  PRIVATE, where access must be granted explicitly
+- PUBLIC tables can be read by every caller
+- views and hooks of an owner can only be changed by members of the owner
+
+Permissions are levels, OWN includes WRITE and WRITE includes READ.
+
+The caller's identity is resolved once per request into a `Principal`, and the
+rules for each table are compiled into a `TablePermissions` and cached, so a
+check is a few set lookups rather than a catalog read. The cache is invalidated
+when a table or owner is changed on this instance, and entries expire after
+AUTH_PERMISSION_CACHE_SECONDS so changes made on other instances are seen.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+from typing import Dict
+from typing import FrozenSet
+from typing import Generic
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+from tarchia.utils import config
+
+NONE, READ, WRITE, OWN = 0, 1, 2, 3
+LEVELS = {"READ": READ, "WRITE": WRITE, "OWN": OWN}
+
+MAXIMUM_CACHED_ENTRIES = 10_000
+
+T = TypeVar("T")
+
+
+class Principal:
+    """The caller of a request"""
+
+    __slots__ = ("subject", "identities", "unrestricted")
+
+    def __init__(self, subject: str, roles: Iterable[str] = (), unrestricted: bool = False):
+        self.subject = subject
+        self.identities: FrozenSet[str] = frozenset((subject, *roles))
+        self.unrestricted = unrestricted
+
+
+class TablePermissions:
+    """The compiled permission rules for a table"""
+
+    __slots__ = ("grants", "everyone", "members")
+
+    def __init__(self, permissions: list, visibility: str, members: FrozenSet[str]):
+        self.grants: Dict[str, int] = {}
+        everyone = NONE
+        for permission in permissions:
+            role = permission["role"]
+            level = LEVELS.get(_value(permission["permission"]), NONE)
+            if role == "*":
+                everyone = max(everyone, level)
+            else:
+                self.grants[role] = max(self.grants.get(role, NONE), level)
+
+        visibility = _value(visibility)
+        if visibility == "PRIVATE":
+            everyone = NONE
+        elif visibility == "PUBLIC":
+            everyone = max(everyone, READ)
+        self.everyone = everyone
+        self.members = members
+
+    def level(self, principal: Principal) -> int:
+        if principal.unrestricted or not self.members.isdisjoint(principal.identities):
+            return OWN
+        level = self.everyone
+        for identity in principal.identities:
+            level = max(level, self.grants.get(identity, NONE))
+        return level
+
+
+def _value(value) -> str:
+    """Enums when compiled from models, strings when compiled from the catalog"""
+    return getattr(value, "value", value)
+
+
+class _ExpiringCache(Generic[T]):
+    def __init__(self):
+        self.items: "OrderedDict[tuple, Tuple[float, T]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple, load: Callable[[], Optional[T]]) -> Optional[T]:
+        now = time.monotonic()
+        with self.lock:
+            cached = self.items.get(key)
+            if cached is not None and cached[0] > now:
+                self.items.move_to_end(key)
+                return cached[1]
+
+        value = load()
+        # things which don't exist aren't cached, they may be created
+        if value is not None:
+            with self.lock:
+                self.items[key] = (now + config.AUTH_PERMISSION_CACHE_SECONDS, value)
+                self.items.move_to_end(key)
+                while len(self.items) > MAXIMUM_CACHED_ENTRIES:
+                    self.items.popitem(last=False)
+        return value
+
+    def invalidate(self, match: Callable[[tuple], bool]):
+        with self.lock:
+            for key in [key for key in self.items if match(key)]:
+                self.items.pop(key)
+
+
+_owner_members: _ExpiringCache[FrozenSet[str]] = _ExpiringCache()
+_table_permissions: _ExpiringCache[TablePermissions] = _ExpiringCache()
+
+
+def owner_members(owner: str) -> Optional[FrozenSet[str]]:
+    """The identities which are members of an owner, None if the owner doesn't exist"""
+
+    def load():
+        from tarchia.interfaces.providers import providers
+
+        entry = providers.catalog().get_owner(name=owner)
+        if entry is None:
+            return None
+        return frozenset((entry["name"], *entry.get("memberships", [])))
+
+    return _owner_members.get((owner,), load)
+
+
+def compile_table_permissions(entry: dict) -> TablePermissions:
+    """Compile the permissions for a catalog entry (as stored in the catalog)"""
+    members = owner_members(entry["owner"]) or frozenset((entry["owner"],))
+    return TablePermissions(entry.get("permissions", []), entry["visibility"], members)
+
+
+def table_permissions(owner: str, table: str) -> Optional[TablePermissions]:
+    """The permissions for a table, None if the table doesn't exist"""
+
+    def load():
+        from tarchia.interfaces.providers import providers
+
+        entry = providers.catalog().get_table(owner=owner, table=table)
+        return None if entry is None else compile_table_permissions(entry)
+
+    return _table_permissions.get((owner, table), load)
+
+
+def invalidate(owner: str, table: Optional[str] = None):
+    """Forget the cached permissions for a table, or for an owner and all of its tables"""
+    if table is not None:
+        _table_permissions.invalidate(lambda key: key == (owner, table))
+        return
+    _owner_members.invalidate(lambda key: key == (owner,))
+    _table_permissions.invalidate(lambda key: key[0] == owner)
+
+
+# /v1/tables/{owner}[/{table}[/...]] and /v1/relations/{owner}/{relation}
+_TABLE_ROUTE = re.compile(r"^/v1/(tables|relations)/([^/]+)(?:/([^/]+))?(/[^/]+)?(/.*)?$")
+_OWNER_ROUTE = re.compile(r"^/v1/owners/([^/]+)(/[^/]+)?$")
+# /v1/views/{owner}[/...] and /v1/owner/{owner}/hooks[/...]
+_OWNED_ROUTE = re.compile(r"^/v1/(?:views/([^/]+)|owner/([^/]+)/hooks)(?:/.*)?$")
+
+
+def required_permission(method: str, path: str) -> Optional[Tuple[str, Optional[str], int]]:
+    """
+    The permission a request needs, as (owner, table, level), a table of None is
+    a permission on the owner. None if the request isn't for a table or owner.
+    """
+    match = _TABLE_ROUTE.match(path)
+    if match is not None:
+        collection, owner, table, attribute, rest = match.groups()
+        if table is None:
+            # listing an owner's tables is filtered rather than checked
+            return None if method == "GET" else (owner, None, OWN)
+        if method in ("GET", "HEAD") or collection == "relations":
+            return (owner, table, READ)
+        # deleting the table or changing its attributes needs ownership
+        if rest is None and (
+            (attribute is None and method == "DELETE")
+            or (method == "PATCH" and attribute not in (None, "/metadata"))
+        ):
+            return (owner, table, OWN)
+        return (owner, table, WRITE)
+
+    match = _OWNER_ROUTE.match(path)
+    if match is not None and method in ("PATCH", "DELETE"):
+        return (match.group(1), None, OWN)
+
+    # changing an owner's views or hooks needs membership of the owner
+    match = _OWNED_ROUTE.match(path)
+    if match is not None and method not in ("GET", "HEAD"):
+        return (match.group(1) or match.group(2), None, OWN)
+    return None
+
+
+def is_permitted(principal: Principal, method: str, path: str) -> bool:
+    """Can the caller make this request"""
+    if principal.unrestricted:
+        return True
+    required = required_permission(method, path)
+    if required is None:
+        return True
+    owner, table, level = required
+
+    if table is None:
+        members = owner_members(owner)
+        # requests for owners which don't exist fail in the handler
+        return members is None or not members.isdisjoint(principal.identities)
+
+    permissions = table_permissions(owner, table)
+    # relations may be views, and requests for tables which don't exist fail in
+    # the handler
+    return permissions is None or permissions.level(principal) >= level
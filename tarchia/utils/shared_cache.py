@@ -0,0 +1,104 @@
+"""
+Shared Metadata Cache
+
+When the service runs more than one worker process (WORKERS), an in-process
+cache is duplicated in every worker and each worker decodes the same hot
+manifests and commits for itself. The shared cache holds the decoded form of
+manifests and commits in files in a folder in shared memory (/dev/shm), so a
+manifest decoded by one worker is read by the others without reading it from
+storage or decoding the Avro again, and is held in memory only once however
+many workers there are.
+
+Manifests and commits are never changed once they have been written, so the
+entries never need to be invalidated, the cache is bounded by size
+(SHARED_CACHE_MB) and the least recently used entries are removed first. The
+decoded entries are stored as JSON, which is much quicker to load than the
+compressed Avro manifests.
+
+The size is capped at the space free in the folder when the cache is created,
+/dev/shm is often smaller than SHARED_CACHE_MB (64MB in Docker), and writes to
+the cache are best-effort, if an entry can't be written it's counted and the
+caller carries on with the decoded metadata.
+"""
+
+import shutil
+import threading
+from typing import Dict
+from typing import Optional
+
+import orjson
+
+from tarchia.interfaces.storage.caching_storage import _DiskCache
+from tarchia.utils import config
+
+# part of the key, so a change to what is stored doesn't read old entries
+FORMAT_VERSION = "1"
+
+
+class SharedMetadataCache:
+    def __init__(self, folder: str, maximum_bytes: int):
+        """
+        Parameters:
+            folder: str
+                The folder holding the cache, shared by the workers
+            maximum_bytes: int
+                The most the cached entries can take up
+        """
+        self.files = _DiskCache(folder, maximum_bytes)
+        # the entries already in the folder are part of the space the cache has
+        available = shutil.disk_usage(folder).free + self.files.current_bytes
+        self.files.maximum_bytes = min(maximum_bytes, available)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.write_errors = 0
+
+    @staticmethod
+    def _key(kind: str, location: str) -> str:
+        return f"{FORMAT_VERSION}:{kind}:{location}"
+
+    def get(self, kind: str, location: str) -> Optional[object]:
+        """The decoded metadata, None if it isn't in the cache"""
+        content = self.files.get(self._key(kind, location))
+        value = None
+        if content is not None:
+            try:
+                value = orjson.loads(content)
+            except orjson.JSONDecodeError:  # pragma: no cover
+                value = None
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, kind: str, location: str, value: object):
+        """Add decoded metadata to the cache, if it can be written"""
+        try:
+            self.files.set(self._key(kind, location), orjson.dumps(value))
+        except OSError:
+            with self.lock:
+                self.write_errors += 1
+
+    def as_dict(self) -> Dict[str, int]:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_shared_cache: Optional[SharedMetadataCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_cache() -> Optional[SharedMetadataCache]:
+    """The shared cache, None if it's disabled (SHARED_CACHE_MB is 0)"""
+    global _shared_cache
+    if config.SHARED_CACHE_MB <= 0:
+        return None
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedMetadataCache(
+                    config.SHARED_CACHE_FOLDER, config.SHARED_CACHE_MB * 1024 * 1024
+                )
+    return _shared_cache
@@ -0,0 +1,57 @@
+"""
+Single Flight
+
+When the HEAD of a popular table moves, many requests ask for the same new
+commit and manifest at the same time. Rather than each request reading and
+decoding its own copy, the first request for a key starts the load and any
+requests for the same key made while it is in flight wait for its result.
+
+The result is shared by all of the callers, so it must not be modified.
+"""
+
+import asyncio
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+
+    async def run(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run a load, or wait for the load for the same key already in flight.
+
+        Parameters:
+            key: Hashable
+                Identifies the value being loaded (e.g. the path of the blob)
+            load: Callable
+                Coroutine function which loads the value
+
+        Returns:
+            The loaded value
+        """
+        loop = asyncio.get_running_loop()
+        # tasks belong to a loop, so loads can't be shared between loops
+        call_key = (id(loop), key)
+
+        task = self._calls.get(call_key)
+        if task is None:
+            # loads may return any awaitable, not only a coroutine
+            task = asyncio.ensure_future(load(), loop=loop)
+            self._calls[call_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(call_key, None))
+
+        # a caller giving up (e.g. the client disconnected) mustn't cancel the
+        # load for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+metadata_loads = SingleFlight()
@@ -0,0 +1,148 @@
+"""
+Access Tokens
+
+Callers which aren't on the local machine authenticate with a JSON Web Token
+signed with HMAC-SHA256 (HS256). The keys to verify the tokens are set with
+AUTH_JWT_KEYS, either a single secret or comma separated `kid=secret` pairs so
+keys can be rotated, a token names the key it was signed with in its `kid`
+header. The key set is parsed once and cached.
+
+The token's `sub` claim identifies the caller and the `roles` claim lists the
+roles the caller holds, `exp` and `nbf` are enforced if they are present.
+"""
+
+import base64
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+from typing import Dict
+from typing import Optional
+
+import orjson
+
+from tarchia.exceptions import InvalidTokenError
+from tarchia.utils import config
+
+CLOCK_SKEW_SECONDS = 30
+DEFAULT_KEY = ""
+
+
+@lru_cache(maxsize=4)
+def _parse_key_set(keys: Optional[str]) -> Dict[str, bytes]:
+    key_set = {}
+    for item in (keys or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kid, separator, secret = item.partition("=")
+        if separator:
+            key_set[kid.strip()] = secret.strip().encode()
+        else:
+            key_set[DEFAULT_KEY] = item.encode()
+    return key_set
+
+
+def key_set() -> Dict[str, bytes]:
+    """The keys access tokens can be signed with, keyed by their `kid`"""
+    return _parse_key_set(config.AUTH_JWT_KEYS)
+
+
+def _decode_segment(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _encode_segment(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def is_jwt(token: str) -> bool:
+    return token.count(".") == 2
+
+
+def sign_token(claims: dict, secret: bytes, kid: Optional[str] = None) -> str:
+    """
+    Create an HS256 token, for tests and tooling.
+
+    Parameters:
+        claims: dict
+            The claims to include in the token
+        secret: bytes
+            The key to sign the token with
+        kid: str (optional)
+            The identifier of the key
+
+    Returns:
+        str: The signed token
+    """
+    header = {"alg": "HS256", "typ": "JWT"}
+    if kid is not None:
+        header["kid"] = kid
+    signing_input = (
+        f"{_encode_segment(orjson.dumps(header))}.{_encode_segment(orjson.dumps(claims))}"
+    )
+    signature = hmac.new(secret, signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{_encode_segment(signature)}"
+
+
+def verify_token(token: str) -> dict:
+    """
+    Verify an HS256 token and return its claims.
+
+    Parameters:
+        token: str
+            The token presented by the caller
+
+    Returns:
+        dict: The claims in the token
+
+    Raises:
+        InvalidTokenError: The token is malformed, the signature doesn't match,
+        or the token has expired or isn't valid yet.
+    """
+    keys = key_set()
+    if not keys:
+        raise InvalidTokenError("Access tokens are not enabled")
+
+    try:
+        header_segment, claims_segment, signature_segment = token.split(".")
+        header = orjson.loads(_decode_segment(header_segment))
+        signature = _decode_segment(signature_segment)
+    except (ValueError, orjson.JSONDecodeError) as err:
+        raise InvalidTokenError("Access token is malformed") from err
+
+    # only accept the algorithm we sign with, never 'none'
+    if not isinstance(header, dict) or header.get("alg") != "HS256":
+        raise InvalidTokenError("Access token algorithm is not supported")
+    kid = header.get("kid", DEFAULT_KEY)
+    if not isinstance(kid, str):
+        raise InvalidTokenError("Access token is malformed")
+    secret = keys.get(kid)
+    if secret is None:
+        raise InvalidTokenError("Access token key is not recognized")
+
+    signing_input = f"{header_segment}.{claims_segment}".encode()
+    expected = hmac.new(secret, signing_input, hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise InvalidTokenError("Access token signature is invalid")
+
+    try:
+        claims = orjson.loads(_decode_segment(claims_segment))
+    except (ValueError, orjson.JSONDecodeError) as err:
+        raise InvalidTokenError("Access token is malformed") from err
+    if not isinstance(claims, dict):
+        raise InvalidTokenError("Access token is malformed")
+
+    for claim in ("exp", "nbf"):
+        # bool is an int, but isn't a time
+        if claim in claims and (
+            not isinstance(claims[claim], (int, float)) or isinstance(claims[claim], bool)
+        ):
+            raise InvalidTokenError(f"Access token '{claim}' is not a time")
+
+    now = time.time()
+    if "exp" in claims and now > claims["exp"] + CLOCK_SKEW_SECONDS:
+        raise InvalidTokenError("Access token has expired")
+    if "nbf" in claims and now < claims["nbf"] - CLOCK_SKEW_SECONDS:
+        raise InvalidTokenError("Access token is not valid yet")
+    return claims
@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tarchia.api.middlewares import audit_middleware
+from tarchia.api.middlewares.audit_middleware import AuditLog
+from tarchia.exceptions import AlreadyExistsError
+from tarchia.exceptions import DataEntryError
+from tarchia.exceptions import OwnerNotFoundError
+
+AUDIT_FILE = "_temp_audit.jsonl"
+
+
+def test_records_are_written_in_batches():
+    batches = []
+    audit_log = AuditLog(writer=batches.append, capacity=100, flush_interval_seconds=60)
+
+    for i in range(10):
+        audit_log.record({"request": i})
+    assert batches == []
+
+    audit_log.flush()
+    assert len(batches) == 1
+    assert [record["request"] for record in batches[0]] == list(range(10))
+    assert audit_log.written == 10
+
+
+def test_full_buffer_drops_records():
+    batches = []
+    audit_log = AuditLog(writer=batches.append, capacity=5, flush_interval_seconds=60)
+    # don't let the background thread empty the buffer
+    audit_log._thread = "started"
+
+    for i in range(8):
+        audit_log.record({"request": i})
+
+    assert audit_log.dropped == 3
+    audit_log.flush()
+    assert [record["request"] for record in batches[0]] == list(range(5))
+
+
+def test_background_flush():
+    batches = []
+    audit_log = AuditLog(writer=batches.append, capacity=100, flush_interval_seconds=0.01)
+    audit_log.record({"request": 1})
+
+    deadline = time.monotonic() + 5
+    while not batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert batches == [[{"request": 1}]]
+
+
+def test_file_sink(monkeypatch):
+    monkeypatch.setattr(audit_middleware.config, "AUDIT_LOG_FILE", AUDIT_FILE)
+    writer = audit_middleware._create_writer("FILE")
+    try:
+        writer([{"request": 1}])
+        writer([{"request": 2}, {"request": 3}])
+        with open(AUDIT_FILE, "rb") as audit_file:
+            records = [orjson.loads(line) for line in audit_file]
+    finally:
+        os.remove(AUDIT_FILE)
+    assert [record["request"] for record in records] == [1, 2, 3]
+
+
+@pytest.fixture
+def audited(monkeypatch):
+    records = []
+    monkeypatch.setattr(audit_middleware.audit_log, "writer", records.extend)
+    audit_middleware.audit_log.flush()
+
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/missing")
+    async def missing():
+        raise OwnerNotFoundError(owner="nobody")
+
+    @app.get("/exists")
+    def exists():
+        raise AlreadyExistsError(entity="somebody")
+
+    @app.get("/invalid")
+    async def invalid():
+        raise DataEntryError(fields=["name"], message="bad name")
+
+    audit_middleware.bind(app)
+
+    def get(url):
+        response = TestClient(app).get(url)
+        audit_middleware.audit_log.flush()
+        return response, records[-1]
+
+    return get
+
+
+def test_middleware_maps_errors(audited):
+    response, record = audited("/ok")
+    assert response.status_code == 200
+    assert record["outcome"] == "success"
+    assert record["status_code"] == 200
+    assert record["end_point"] == "/ok"
+
+    response, record = audited("/missing")
+    assert response.status_code == 404
+    assert record["outcome"] == "error"
+    assert record["status_code"] == 404
+
+    response, record = audited("/exists")
+    assert response.status_code == 409
+    assert record["status_code"] == 409
+
+    response, record = audited("/invalid")
+    assert response.status_code == 422
+    assert orjson.loads(response.content) == {"fields": ["name"], "message": "bad name"}
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
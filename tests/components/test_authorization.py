@@ -0,0 +1,227 @@
+import os
+import sys
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tarchia.api.middlewares import authorization_middleware
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("AUTH_TOKEN", "open-sesame")
+
+    app = FastAPI()
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    authorization_middleware.bind(app)
+
+    def make(peer):
+        return TestClient(app, client=(peer, 50000))
+
+    return make
+
+
+def test_local_requests_need_no_token(client):
+    for peer in ("testclient", "127.0.0.1", "127.0.1.1", "::1"):
+        assert client(peer).get("/ok").status_code == 200
+
+
+def test_remote_requests_need_a_token(client):
+    remote = client("203.0.113.7")
+
+    assert remote.get("/ok").status_code == 401
+    assert remote.get("/ok", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert remote.get("/ok", headers={"Authorization": "open-sesame"}).status_code == 401
+    assert remote.get("/ok", headers={"Authorization": "Bearer open-sesame"}).status_code == 200
+    remote.cookies.set("AUTH_TOKEN", "open-sesame")
+    assert remote.get("/ok").status_code == 200
+
+
+def test_the_host_header_does_not_make_a_request_local(client):
+    remote = client("203.0.113.7")
+    for host in ("localhost", "127.0.0.1", "testserver"):
+        assert remote.get("/ok", headers={"Host": host}).status_code == 401
+    assert client("testclient").get("/ok", headers={"Host": "tarchia.example.com"}).status_code == 200
+
+
+def test_forwarded_requests_are_not_local(client):
+    # a proxy on this machine forwarding requests from elsewhere
+    proxied = client("127.0.0.1")
+    for header in ("X-Forwarded-For", "Forwarded", "X-Real-IP"):
+        assert proxied.get("/ok", headers={header: "203.0.113.7"}).status_code == 401
+
+
+def test_table_permissions(monkeypatch):
+    from main import application
+    from tarchia.models import Column
+    from tarchia.models import CreateOwnerRequest
+    from tarchia.models import CreateTableRequest
+    from tarchia.models import DatasetPermissions
+    from tarchia.models import OwnerType
+    from tarchia.models import RolePermission
+    from tarchia.models import Schema
+    from tarchia.models.metadata_models import TableVisibility
+    from tarchia.utils import config
+    from tarchia.utils.tokens import sign_token
+
+    monkeypatch.setattr(config, "AUTH_JWT_KEYS", "s3cret")
+    owner = "permissions_owner"
+
+    local = TestClient(application)
+    response = local.post(
+        url="/v1/owners",
+        content=CreateOwnerRequest(
+            name=owner,
+            steward="billy",
+            type=OwnerType.ORGANIZATION,
+            memberships=["data-team"],
+            description="test",
+        ).serialize(),
+    )
+    assert response.status_code in {200, 409}, response.content
+
+    def create(name, visibility, permissions):
+        response = local.post(
+            url=f"/v1/tables/{owner}",
+            content=CreateTableRequest(
+                name=name,
+                location="gs://dataset/",
+                steward="bob",
+                table_schema=Schema(columns=[Column(name="column")]),
+                freshness_life_in_days=0,
+                retention_in_days=0,
+                description="test",
+                visibility=visibility,
+                permissions=permissions,
+            ).serialize(),
+        )
+        assert response.status_code in {200, 409}, response.content
+
+    create(
+        "private",
+        TableVisibility.PRIVATE,
+        [DatasetPermissions(role="*", permission=RolePermission.READ)],
+    )
+    create(
+        "shared",
+        TableVisibility.INTERNAL,
+        [DatasetPermissions(role="analysts", permission=RolePermission.WRITE)],
+    )
+    create("public", TableVisibility.PUBLIC, [])
+
+    def as_caller(subject, roles=()):
+        token = sign_token({"sub": subject, "roles": list(roles)}, b"s3cret")
+        return TestClient(
+            application,
+            client=("203.0.113.7", 50000),
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    member = as_caller("alice", ["data-team"])
+    analyst = as_caller("bob", ["analysts"])
+    stranger = as_caller("carol")
+
+    def status(client, table):
+        return client.get(f"/v1/tables/{owner}/{table}").status_code
+
+    # members of the owner can see everything
+    assert [status(member, t) for t in ("private", "shared", "public")] == [200, 200, 200]
+    # the wildcard grant doesn't apply to private tables
+    assert [status(analyst, t) for t in ("private", "shared", "public")] == [403, 200, 200]
+    assert [status(stranger, t) for t in ("private", "shared", "public")] == [403, 403, 200]
+
+    # lists only include the tables the caller can read
+    listed = {table["name"] for table in stranger.get(f"/v1/tables/{owner}").json()}
+    assert listed == {"public"}
+
+    # writing and owning need more than reading
+    assert (
+        analyst.patch(f"/v1/tables/{owner}/shared/description", json={"value": "x"}).status_code
+        == 403
+    )
+    assert stranger.delete(f"/v1/tables/{owner}/public").status_code == 403
+    assert analyst.post(f"/v1/tables/{owner}", content=b"{}").status_code == 403
+
+    # changing the visibility is seen straight away
+    response = member.patch(f"/v1/tables/{owner}/public/visibility", json={"value": "PRIVATE"})
+    assert response.status_code == 200, response.content
+    assert status(stranger, "public") == 403
+
+    # a bad token is refused
+    monkeypatch.setattr(config, "AUTH_JWT_KEYS", "rotated")
+    assert status(member, "public") == 403
+
+    for table in ("private", "shared", "public"):
+        local.delete(f"/v1/tables/{owner}/{table}")
+    local.delete(f"/v1/owners/{owner}")
+
+
+def test_views_and_hooks_need_owner_membership(monkeypatch):
+    from main import application
+    from tarchia.models import CreateOwnerRequest
+    from tarchia.models import CreateViewRequest
+    from tarchia.models import OwnerType
+    from tarchia.utils import config
+    from tarchia.utils.permissions import OWN
+    from tarchia.utils.permissions import required_permission
+    from tarchia.utils.tokens import sign_token
+
+    owner = "view_owner"
+    assert required_permission("POST", f"/v1/views/{owner}") == (owner, None, OWN)
+    assert required_permission("DELETE", f"/v1/views/{owner}/view") == (owner, None, OWN)
+    assert required_permission("PATCH", f"/v1/views/{owner}/view/metadata") == (owner, None, OWN)
+    assert required_permission("GET", f"/v1/views/{owner}/view") is None
+    assert required_permission("POST", f"/v1/owner/{owner}/hooks") == (owner, None, OWN)
+    assert required_permission("DELETE", f"/v1/owner/{owner}/hooks/hook") == (owner, None, OWN)
+    assert required_permission("GET", f"/v1/owner/{owner}/hooks") is None
+
+    monkeypatch.setattr(config, "AUTH_JWT_KEYS", "s3cret")
+    local = TestClient(application)
+    response = local.post(
+        url="/v1/owners",
+        content=CreateOwnerRequest(
+            name=owner,
+            steward="billy",
+            type=OwnerType.ORGANIZATION,
+            memberships=["data-team"],
+            description="test",
+        ).serialize(),
+    )
+    assert response.status_code in {200, 409}, response.content
+
+    def as_caller(subject, roles=()):
+        token = sign_token({"sub": subject, "roles": list(roles)}, b"s3cret")
+        return TestClient(
+            application,
+            client=("203.0.113.7", 50000),
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    member = as_caller("alice", ["data-team"])
+    stranger = as_caller("carol")
+    view = CreateViewRequest(name="view", statement="SELECT * FROM $planets").serialize()
+
+    assert stranger.post(f"/v1/views/{owner}", content=view).status_code == 403
+    assert stranger.post(f"/v1/owner/{owner}/hooks").status_code == 403
+    response = member.post(f"/v1/views/{owner}", content=view)
+    assert response.status_code in {200, 409}, response.content
+    assert stranger.delete(f"/v1/views/{owner}/view").status_code == 403
+    assert member.delete(f"/v1/views/{owner}/view").status_code == 200
+
+    local.delete(f"/v1/owners/{owner}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
@@ -0,0 +1,130 @@
+import sys
+import os
+import asyncio
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+
+from tarchia.metadata.commit_coordinator import CommitCoordinator
+
+
+def test_items_in_window_are_batched():
+    batches = []
+
+    async def apply_batch(items):
+        batches.append(items)
+        return [f"result-{item}" for item in items]
+
+    async def run():
+        coordinator = CommitCoordinator(apply_batch, window_seconds=0.05)
+        return await asyncio.gather(*(coordinator.submit("table", i) for i in range(10)))
+
+    results = asyncio.run(run())
+
+    assert len(batches) == 1
+    assert batches[0] == list(range(10))
+    assert results == [f"result-{i}" for i in range(10)]
+
+
+def test_batches_are_per_key_and_bounded():
+    batches = []
+
+    async def apply_batch(items):
+        batches.append(items)
+        return items
+
+    async def run():
+        coordinator = CommitCoordinator(apply_batch, window_seconds=0.05, maximum_batch_size=4)
+        submissions = [coordinator.submit("one", i) for i in range(6)]
+        submissions += [coordinator.submit("two", i) for i in range(2)]
+        return await asyncio.gather(*submissions)
+
+    results = asyncio.run(run())
+
+    assert results == [0, 1, 2, 3, 4, 5, 0, 1]
+    assert sorted(batches) == [[0, 1], [0, 1, 2, 3], [4, 5]]
+
+
+def test_failed_batches_are_retried_individually():
+    calls = []
+
+    async def apply_batch(items):
+        calls.append(items)
+        if "bad" in items:
+            raise ValueError("bad item")
+        return items
+
+    async def run():
+        coordinator = CommitCoordinator(apply_batch, window_seconds=0.01)
+        return await asyncio.gather(
+            coordinator.submit("table", "good"),
+            coordinator.submit("table", "bad"),
+            coordinator.submit("table", "fine"),
+            return_exceptions=True,
+        )
+
+    good, bad, fine = asyncio.run(run())
+
+    assert good == "good"
+    assert fine == "fine"
+    assert isinstance(bad, ValueError)
+    # the batch, then each of the items
+    assert len(calls) == 4
+
+
+def test_callers_cancelled_while_applying():
+    """a caller going away doesn't reapply the batch or strand the other callers"""
+    calls = []
+
+    async def apply_batch(items):
+        calls.append(items)
+        await asyncio.sleep(0.05)
+        return items
+
+    async def run():
+        coordinator = CommitCoordinator(apply_batch, window_seconds=0.01)
+        tasks = [asyncio.ensure_future(coordinator.submit("table", i)) for i in (1, 2, 3)]
+        await asyncio.sleep(0.03)  # the batch is being applied
+        tasks[1].cancel()
+        return await asyncio.wait_for(
+            asyncio.gather(*tasks, return_exceptions=True), timeout=1
+        )
+
+    first, second, third = asyncio.run(run())
+
+    assert calls == [[1, 2, 3]]
+    assert (first, third) == (1, 3)
+    assert isinstance(second, asyncio.CancelledError)
+
+
+def test_callers_cancelled_before_applying():
+    calls = []
+
+    async def apply_batch(items):
+        calls.append(items)
+        return items
+
+    async def run():
+        coordinator = CommitCoordinator(apply_batch, window_seconds=0.05)
+        tasks = [asyncio.ensure_future(coordinator.submit("table", i)) for i in (1, 2, 3)]
+        await asyncio.sleep(0.01)  # the batch is still open
+        tasks[1].cancel()
+        return await asyncio.wait_for(
+            asyncio.gather(*tasks, return_exceptions=True), timeout=1
+        )
+
+    first, second, third = asyncio.run(run())
+
+    assert calls == [[1, 3]]
+    assert (first, third) == (1, 3)
+    assert isinstance(second, asyncio.CancelledError)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
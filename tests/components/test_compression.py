@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import os
+import sys
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import brotli
+import orjson
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
+
+from tarchia.api.middlewares import brotli_middleware
+from tarchia.api.middlewares.brotli_middleware import choose_encoding
+from tarchia.api.middlewares.brotli_middleware import parse_accept_encoding
+
+ROWS = [{"file_path": f"data/file-{i}.parquet", "records": i} for i in range(200)]
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/tiny", response_class=ORJSONResponse)
+    async def tiny():
+        return {"ok": True}
+
+    @app.get("/rows", response_class=ORJSONResponse)
+    async def rows():
+        return ROWS
+
+    @app.get("/binary")
+    async def binary():
+        return Response(content=b"\x00" * 4096, media_type="application/octet-stream")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for row in ROWS:
+                yield orjson.dumps(row) + b"\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    brotli_middleware.bind(app)
+    return app
+
+
+APP = build_app()
+
+
+def get(path: str, accept_encoding: str = None):
+    """Call the app directly, so the response isn't decoded by a client"""
+    headers = [(b"host", b"testserver")]
+    if accept_encoding is not None:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = []
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # the client doesn't disconnect
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(APP(scope, receive, send))
+    response_headers = {
+        name.decode(): value.decode() for name, value in messages[0]["headers"]
+    }
+    chunks = [message.get("body", b"") for message in messages[1:]]
+    return response_headers, chunks
+
+
+def decode(encoding, body):
+    if encoding == "br":
+        return brotli.decompress(body)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    return body
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip, br") == {"gzip": 1.0, "br": 1.0}
+    assert parse_accept_encoding("br;q=0.5, gzip;q=0.9, identity") == {"br": 0.5, "gzip": 0.9}
+    assert parse_accept_encoding("*;q=0.2, br;q=0") == {"zstd": 0.2, "gzip": 0.2}
+    assert parse_accept_encoding("deflate, identity") == {}
+    assert parse_accept_encoding("zstd;q=bad, gzip") == {"gzip": 1.0}
+
+
+def test_choose_encoding():
+    # ties are broken by the size of the response
+    assert choose_encoding({"br": 1.0, "zstd": 1.0, "gzip": 1.0}, large=False) == "br"
+    assert choose_encoding({"br": 1.0, "zstd": 1.0, "gzip": 1.0}, large=True) == "zstd"
+    # but the client's preferences come first
+    assert choose_encoding({"br": 0.5, "gzip": 1.0}, large=False) == "gzip"
+
+
+def test_small_responses_are_not_compressed():
+    headers, chunks = get("/tiny", "br, gzip")
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert orjson.loads(b"".join(chunks)) == {"ok": True}
+
+
+def test_binary_responses_are_not_compressed():
+    headers, chunks = get("/binary", "br, gzip")
+    assert "content-encoding" not in headers
+    assert b"".join(chunks) == b"\x00" * 4096
+
+
+def test_no_accepted_encoding():
+    for accept_encoding in (None, "identity", "deflate"):
+        headers, chunks = get("/rows", accept_encoding)
+        assert "content-encoding" not in headers
+        assert orjson.loads(b"".join(chunks)) == ROWS
+
+
+def test_buffered_responses_are_compressed():
+    for accept_encoding, expected in (
+        ("gzip, br, zstd", "br"),
+        ("gzip", "gzip"),
+        ("zstd, gzip;q=0.5", "zstd"),
+    ):
+        headers, chunks = get("/rows", accept_encoding)
+        assert headers["content-encoding"] == expected
+        body = b"".join(chunks)
+        assert int(headers["content-length"]) == len(body)
+        assert orjson.loads(decode(expected, body)) == ROWS
+
+
+def test_streaming_responses_are_compressed_per_chunk():
+    for accept_encoding, expected in (("br, zstd", "zstd"), ("br", "br"), ("gzip", "gzip")):
+        headers, chunks = get("/stream", accept_encoding)
+        assert headers["content-encoding"] == expected
+        assert "content-length" not in headers
+        # each chunk is sent as it's produced, rather than buffering the body
+        assert len(chunks) > len(ROWS) // 2
+        lines = decode(expected, b"".join(chunks)).splitlines()
+        assert [orjson.loads(line) for line in lines] == ROWS
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
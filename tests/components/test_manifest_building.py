@@ -12,6 +12,7 @@ from tarchia.models import Schema, Column
 from tarchia.metadata.manifests import build_manifest_entry
 from tarchia.utils.to_int import to_int
 from tarchia.exceptions import DataError
+from tarchia.exceptions import UnableToReadBlobError
 
 SCHEMA = Schema(
     columns=[
@@ -60,6 +61,82 @@ def test_manifest_missing_column_with_default():
     build_manifest_entry("testdata/planets/planets.parquet", test_schema).as_dict()
 
 
+def test_manifest_null_counts():
+    import shutil
+
+    import pyarrow
+    from pyarrow import parquet
+
+    folder = "_temp_null_counts"
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    schema = Schema(columns=[Column(name="x", type=OrsoTypes.INTEGER)])
+    table = pyarrow.table({"x": [10, 20, None]})
+
+    parquet.write_table(table, f"{folder}/nulls.parquet")
+    entry = build_manifest_entry(f"{folder}/nulls.parquet", schema)
+    assert entry.lower_bounds["x"] == 10
+    assert entry.upper_bounds["x"] == 20
+    assert entry.null_counts == {"x": 1}
+
+    # without statistics the null count isn't known
+    parquet.write_table(table, f"{folder}/no_stats.parquet", write_statistics=False)
+    entry = build_manifest_entry(f"{folder}/no_stats.parquet", schema)
+    assert entry.null_counts == {}
+
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_read_manifest_tree():
+    import asyncio
+    import shutil
+
+    from tarchia.interfaces.storage.local_storage import LocalStorage
+    from tarchia.metadata.manifests import aget_manifest
+    from tarchia.metadata.manifests import get_manifest
+    from tarchia.metadata.manifests import write_manifest
+    from tarchia.models.manifest_models import EntryType
+    from tarchia.models.manifest_models import ManifestEntry
+
+    folder = "_temp_manifests"
+    shutil.rmtree(folder, ignore_errors=True)
+    # not through the cache, we remove one of the manifests later
+    storage = LocalStorage()
+
+    entry = build_manifest_entry("testdata/planets/planets.parquet", SCHEMA)
+    children = []
+    for i in range(3):
+        child = f"{folder}/child-{i}.avro"
+        write_manifest(child, storage, [entry.model_copy(update={"file_path": f"file-{i}"})])
+        children.append(ManifestEntry(file_path=child, file_type=EntryType.Manifest))
+    write_manifest(f"{folder}/root.avro", storage, children + [entry])
+
+    expected = [entry.file_path, "file-0", "file-1", "file-2"]
+    manifest = get_manifest(f"{folder}/root.avro", storage, None)
+    assert [e.file_path for e in manifest] == expected
+    manifest = asyncio.run(aget_manifest(f"{folder}/root.avro", storage, None))
+    assert [e.file_path for e in manifest] == expected
+
+    os.remove(f"{folder}/child-1.avro")
+    with pytest.raises(UnableToReadBlobError):
+        get_manifest(f"{folder}/root.avro", storage, None)
+
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_data_files_are_not_mapped(monkeypatch):
+    from tarchia.interfaces.storage.local_storage import LocalStorage
+
+    # data files may be changed by their owners, a mapped file which is
+    # truncated raises SIGBUS when it's read
+    def fail(*args, **kwargs):
+        raise AssertionError("data file mapped")
+
+    monkeypatch.setattr(LocalStorage, "read_blob_view", fail)
+    entry = build_manifest_entry("testdata/planets/planets.parquet", SCHEMA)
+    assert entry.record_count == 9
+
+
 if __name__ == "__main__":  # pragma: no cover
     from tests.tools import run_tests
 
@@ -7,7 +7,7 @@ os.environ["TARCHIA_DEBUG"] = "TRUE"
 sys.path.insert(1, os.path.join(sys.path[0], "../.."))
 
 from tarchia.models import Schema, Column
-from tarchia.metadata.manifests.pruning import parse_filters, prune
+from tarchia.metadata.manifests.pruning import parse_filters, prune, matches_all
 from tarchia.metadata.manifests import ManifestEntry
 
 def test_basic_parsing():
@@ -17,6 +17,24 @@ def test_basic_parsing():
     assert filters == [('integer', '=', 0)]
 
 
+def test_parsing_inclusive_operators():
+
+    schema = Schema(columns=[Column(name="a", type="INTEGER"), Column(name="b", type="INTEGER")])
+    assert parse_filters("a>=5, b<100", schema) == [("a", ">=", 5), ("b", "<", 100)]
+    assert parse_filters("a<=5, b>100", schema) == [("a", "<=", 5), ("b", ">", 100)]
+
+
+def test_strict_parsing():
+    import pytest
+    from tarchia.exceptions import InvalidFilterError
+
+    schema = Schema(columns=[Column(name="a", type="INTEGER")])
+    assert parse_filters("a>=5, c<100", schema) == [("a", ">=", 5)]
+    for filters in ("a>=5, c<100", "a>=5, a", "a>five"):
+        with pytest.raises(InvalidFilterError):
+            parse_filters(filters, schema, strict=True)
+
+
 def test_basic_pruning():
     manifest = ManifestEntry(file_path="", file_format="", file_type="Data", record_count=0, file_size=0, lower_bounds={"integer": -10}, upper_bounds={"integer": 10})
 
@@ -51,6 +69,39 @@ def test_basic_pruning():
     assert not prune(manifest, [("integer", "<=", -10)])
     assert prune(manifest, [("integer", "<=", -11)])
 
+
+def test_all_records_match():
+    manifest = ManifestEntry(file_path="", file_format="", file_type="Data", record_count=0, file_size=0, lower_bounds={"integer": -10}, upper_bounds={"integer": 10}, null_counts={"integer": 0})
+
+    assert matches_all(manifest, [("integer", ">", -11)])
+    assert not matches_all(manifest, [("integer", ">", -10)])  # the bounds may have been rounded
+    assert not matches_all(manifest, [("integer", ">", 0)])
+    assert matches_all(manifest, [("integer", ">=", -11)])
+    assert not matches_all(manifest, [("integer", ">=", -10)])
+
+    assert matches_all(manifest, [("integer", "<", 11)])
+    assert not matches_all(manifest, [("integer", "<", 10)])
+    assert matches_all(manifest, [("integer", "<=", 11)])
+    assert not matches_all(manifest, [("integer", "<=", 0)])
+
+    assert not matches_all(manifest, [("integer", "=", 0)])
+    assert not matches_all(manifest, [("missing", ">", 0)])
+    assert not matches_all(manifest, [])
+
+    assert matches_all(manifest, [("integer", ">", -11), ("integer", "<", 11)])
+    assert not matches_all(manifest, [("integer", ">", -11), ("integer", "<", 5)])
+
+
+def test_nulls_never_match():
+    # the bounds don't include nulls, and nulls don't match the filter
+    with_nulls = ManifestEntry(file_path="", file_type="Data", lower_bounds={"integer": 10}, upper_bounds={"integer": 20}, null_counts={"integer": 1})
+    assert not matches_all(with_nulls, [("integer", ">", 5)])
+
+    # without complete statistics we don't know if there are nulls
+    unknown = ManifestEntry(file_path="", file_type="Data", lower_bounds={"integer": 10}, upper_bounds={"integer": 20})
+    assert not matches_all(unknown, [("integer", ">", 5)])
+
+
 if __name__ == "__main__":  # pragma: no cover
     from tests.tools import run_tests
 
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from fastapi.testclient import TestClient
+
+from tarchia.api.dependencies import get_catalog
+from tarchia.interfaces.providers import ProviderRegistry
+from tarchia.interfaces.providers import providers
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+
+def test_importing_the_application_creates_no_providers():
+    script = (
+        "import main\n"
+        "from tarchia.interfaces.providers import providers\n"
+        "assert providers._catalog is None\n"
+        "assert providers._storage is None\n"
+        "import sys\n"
+        "assert 'requests' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True)
+
+
+def test_providers_are_created_once_and_shared():
+    registry = ProviderRegistry()
+    catalog = registry.catalog()
+    storage = registry.storage()
+
+    assert registry.catalog() is catalog
+    assert registry.storage() is storage
+
+    registry.reset()
+    assert registry._catalog is None
+    assert registry._storage is None
+
+
+def test_closing_releases_the_providers():
+    class ClosingProvider:
+        def __init__(self):
+            self.closed = 0
+
+        def close(self):
+            self.closed += 1
+
+    registry = ProviderRegistry()
+    registry._catalog = catalog = ClosingProvider()
+    registry._storage = storage = ClosingProvider()
+    registry._data_storage["GCS"] = data_storage = ClosingProvider()
+
+    registry.close()
+    assert (catalog.closed, storage.closed, data_storage.closed) == (1, 1, 1)
+    assert registry._catalog is None
+    assert registry._storage is None
+    assert registry._data_storage == {}
+
+
+def test_lifespan_creates_the_providers():
+    from main import application
+
+    providers.reset()
+    with TestClient(application):
+        assert providers._catalog is not None
+        assert providers._storage is not None
+    assert providers._catalog is None
+
+
+def test_handlers_are_given_the_providers():
+    from main import application
+
+    class EmptyCatalog:
+        def __init__(self):
+            self.calls = []
+
+        def list_tables(self, owner):
+            self.calls.append(owner)
+            return []
+
+    catalog = EmptyCatalog()
+    application.dependency_overrides[get_catalog] = lambda: catalog
+    try:
+        response = TestClient(application).get("/v1/tables/joocer")
+    finally:
+        application.dependency_overrides.clear()
+
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+    assert catalog.calls == ["joocer"]
+
+
+def test_data_storage_is_shared_per_host():
+    registry = ProviderRegistry()
+    assert registry.data_storage("local") is registry.data_storage("LOCAL")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
@@ -6,6 +6,8 @@ os.environ["TARCHIA_DEBUG"] = "TRUE"
 
 sys.path.insert(1, os.path.join(sys.path[0], "../.."))
 
+import time
+
 import pytest
 
 from tarchia.api.v1.data_management import encode_and_sign_transaction
@@ -13,9 +15,12 @@ from tarchia.api.v1.data_management import verify_and_decode_transaction
 from tarchia.exceptions import TransactionError
 from tarchia.models import Transaction, Schema, Column
 
+# a fixed time (2100-01-01), so the signatures are the same on every run
+FUTURE = 4_102_444_800
+
 
 def test_transaction_signing_happy():
-    payload = Transaction(transaction_id="1", expires_at=0, table_id="1", table="1", owner="1", table_schema=Schema(columns=[Column(name="test", type="VARCHAR")]), encryption=None)
+    payload = Transaction(transaction_id="1", expires_at=FUTURE, table_id="1", table="1", owner="1", table_schema=Schema(columns=[Column(name="test", type="VARCHAR")]), encryption=None)
 
     signed_transaction = encode_and_sign_transaction(payload)
     verified_transaction = verify_and_decode_transaction(signed_transaction)
@@ -32,7 +37,7 @@ def test_transaction_signing_very_wrong_transactions():
         verify_and_decode_transaction(None)
 
     signed_transaction = encode_and_sign_transaction(
-        Transaction(transaction_id="1", expires_at=0, table_id="1", table="1", owner="1", table_schema=Schema(columns=[Column(name="test", type="VARCHAR")]), encryption=None)
+        Transaction(transaction_id="1", expires_at=FUTURE, table_id="1", table="1", owner="1", table_schema=Schema(columns=[Column(name="test", type="VARCHAR")]), encryption=None)
     )
     # ensure the transaction is valid
     verify_and_decode_transaction(signed_transaction)
@@ -44,6 +49,41 @@ def test_transaction_signing_very_wrong_transactions():
         verify_and_decode_transaction(str(reversed(signed_transaction)))
 
 
+def test_transaction_signing_tampered_payload():
+    signed_transaction = encode_and_sign_transaction(
+        Transaction(transaction_id="1", expires_at=FUTURE, table_id="1", table="1", owner="1", table_schema=Schema(columns=[Column(name="test", type="VARCHAR")]), encryption=None)
+    )
+    payload, signature = signed_transaction.split(".")
+
+    # changing the payload invalidates the signature, we don't try to decode it
+    tampered = ("A" if payload[0] != "A" else "B") + payload[1:]
+    with pytest.raises(TransactionError):
+        verify_and_decode_transaction(f"{tampered}.{signature}")
+
+    with pytest.raises(TransactionError):
+        verify_and_decode_transaction(f"{payload}.{signature}.{signature}")
+    with pytest.raises(TransactionError):
+        verify_and_decode_transaction(f"{payload}.ŝignature")
+
+
+def test_transaction_token_is_compact():
+    transaction = Transaction(transaction_id="1", expires_at=FUTURE, table_id="1", table="1", owner="1", table_schema=Schema(columns=[Column(name="test", type="VARCHAR")]), encryption=None, additions=[f"data/file-{i:05}.parquet" for i in range(1000)])
+
+    signed_transaction = encode_and_sign_transaction(transaction)
+
+    assert len(signed_transaction) < len(transaction.serialize()) / 4
+    assert verify_and_decode_transaction(signed_transaction) == transaction
+
+
+def test_transaction_signing_expired():
+    signed_transaction = encode_and_sign_transaction(
+        Transaction(transaction_id="1", expires_at=int(time.time()) - 1, table_id="1", table="1", owner="1", table_schema=Schema(columns=[Column(name="test", type="VARCHAR")]), encryption=None)
+    )
+
+    with pytest.raises(TransactionError):
+        verify_and_decode_transaction(signed_transaction)
+
+
 if __name__ == "__main__":  # pragma: no cover
     from tests.tools import run_tests
 
@@ -148,6 +148,64 @@ def test_maintain_table_metadata():
     assert response.status_code == 200, f"{response.status_code} - {response.content}"
 
 
+def test_updates_do_not_revert_commits():
+    """a commit landing while a table's attributes are updated isn't lost"""
+    from tarchia.api.dependencies import get_catalog
+    from tarchia.interfaces.providers import providers
+    from tarchia.models import TableCatalogEntry
+
+    ensure_owner()
+    client = TestClient(application)
+
+    new_table = CreateTableRequest(
+        name="test_dataset_racing_update",
+        location="gs://dataset/",
+        steward="bob",
+        table_schema=Schema(columns=[Column(name="column")]),
+        freshness_life_in_days=0,
+        retention_in_days=0,
+        description="test",
+    )
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}", content=new_table.serialize())
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    catalog = providers.catalog()
+
+    class RacingCatalog:
+        """moves the table's HEAD just after it's first read, as a commit would"""
+
+        def __init__(self):
+            self.raced = False
+
+        def __getattr__(self, name):
+            return getattr(catalog, name)
+
+        def get_table(self, owner, table):
+            entry = catalog.get_table(owner=owner, table=table)
+            if not self.raced:
+                self.raced = True
+                moved = TableCatalogEntry(**{**entry, "current_commit_sha": "f" * 64})
+                catalog.update_table(moved.table_id, moved)
+            return entry
+
+    application.dependency_overrides[get_catalog] = RacingCatalog
+    try:
+        response = client.patch(
+            url=f"/v1/tables/{TEST_OWNER}/test_dataset_racing_update/description",
+            content=orjson.dumps({"value": "updated"}),
+        )
+    finally:
+        application.dependency_overrides.clear()
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    entry = catalog.get_table(owner=TEST_OWNER, table="test_dataset_racing_update")
+    assert entry["current_commit_sha"] == "f" * 64
+    assert entry["description"] == "updated"
+
+    response = client.delete(url=f"/v1/tables/{TEST_OWNER}/test_dataset_racing_update")
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+
 if __name__ == "__main__":  # pragma: no cover
     from tests.tools import run_tests
 
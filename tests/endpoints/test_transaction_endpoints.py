@@ -6,4 +6,607 @@ TESTS TO WRITE
 - after transaction, table GET returns the latest
 - cannot add a file with mismatched columns
 - test updating encryption details
-"""
\ No newline at end of file
+"""
+
+import sys
+import os
+import asyncio
+import shutil
+import threading
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import httpx
+from fastapi.testclient import TestClient
+from orso.types import OrsoTypes
+
+from main import application
+from tarchia.models import Column
+from tarchia.models import CreateTableRequest
+from tarchia.models import Schema
+from tests.common import TEST_OWNER
+from tests.common import ensure_owner
+
+TEMP_FOLDER = "_temp_transactions"
+
+SCHEMA = Schema(
+    columns=[
+        Column(name="id", type=OrsoTypes.INTEGER),
+        Column(name="name", type=OrsoTypes.VARCHAR),
+    ]
+)
+
+
+def create_table(client: TestClient, name: str):
+    client.delete(url=f"/v1/tables/{TEST_OWNER}/{name}")
+    new_table = CreateTableRequest(
+        name=name,
+        location=None,
+        steward="bob",
+        table_schema=SCHEMA,
+        freshness_life_in_days=0,
+        retention_in_days=0,
+        description="test",
+        disposition="CONTINUOUS",
+    )
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}", content=new_table.serialize())
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+
+def make_data_files(count: int):
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+    os.makedirs(TEMP_FOLDER)
+    paths = []
+    for i in range(count):
+        path = f"{TEMP_FOLDER}/planets-{i}.parquet"
+        shutil.copy("testdata/planets/planets.parquet", path)
+        paths.append(path)
+    return paths
+
+
+def start_and_stage(client: TestClient, table: str, paths):
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/{table}/commits/head/pull/start")
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    transaction = response.json()["encoded_transaction"]
+
+    response = client.post(
+        url="/v1/pull/stage", json={"encoded_transaction": transaction, "paths": paths}
+    )
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    return response.json()["encoded_transaction"]
+
+
+def commit(client: TestClient, transaction: str):
+    return client.post(
+        url="/v1/pull/commit",
+        json={"encoded_transaction": transaction, "commit_message": "test"},
+    )
+
+
+def test_commit_transaction():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "transactions")
+    paths = make_data_files(1)
+
+    transaction = start_and_stage(client, "transactions", paths)
+    response = commit(client, transaction)
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    commit_sha = response.json()["commit"]
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/transactions/commits/head")
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    assert response.json()["commit_sha"] == commit_sha
+    assert [b["path"] for b in response.json()["blobs"]] == paths
+    assert response.json()["blobs"][0]["records"] == 9
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_concurrent_commits_are_not_lost():
+    """every commit which reports success must be in the history"""
+    ensure_owner()
+    create_table(TestClient(application), "concurrent")
+    paths = make_data_files(6)
+
+    outcomes = []
+
+    def writer(path):
+        # each client runs its own event loop, so the commits really do race
+        client = TestClient(application)
+        transaction = start_and_stage(client, "concurrent", [path])
+        outcomes.append(commit(client, transaction).status_code)
+
+    threads = [threading.Thread(target=writer, args=(path,)) for path in paths]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # all of the commits are additive so they should all be rebased and succeed
+    assert outcomes == [200] * len(paths), outcomes
+
+    client = TestClient(application)
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/concurrent/commits")
+    # the initial commit plus each of the successful commits
+    assert len(response.json()["commits"]) == outcomes.count(200) + 1
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/concurrent/commits/head")
+    assert len(response.json()["blobs"]) == outcomes.count(200)
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_group_commit():
+    """commits to a CONTINUOUS table arriving together are written as one commit"""
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "grouped")
+    paths = make_data_files(8)
+
+    transactions = [start_and_stage(client, "grouped", [path]) for path in paths]
+
+    async def commit_all():
+        transport = httpx.ASGITransport(app=application)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as aclient:
+            return await asyncio.gather(
+                *(
+                    aclient.post(
+                        url="/v1/pull/commit",
+                        json={"encoded_transaction": t, "commit_message": "grouped"},
+                    )
+                    for t in transactions
+                )
+            )
+
+    responses = asyncio.run(commit_all())
+    assert all(r.status_code == 200 for r in responses), [r.content for r in responses]
+
+    # each caller gets their own transaction back, but they share a commit
+    assert len({r.json()["transaction"] for r in responses}) == len(paths)
+    assert len({r.json()["commit"] for r in responses}) == 1
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/grouped/commits")
+    assert len(response.json()["commits"]) == 2
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/grouped/commits/head")
+    assert sorted(b["path"] for b in response.json()["blobs"]) == sorted(paths)
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_staged_files_are_not_in_the_token():
+    from tarchia.api.v1.data_management import verify_and_decode_transaction
+    from tarchia.interfaces.storage import storage_factory
+    from tarchia.metadata.staging import load_staged_files
+
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "staging")
+
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/staging/commits/head/pull/start")
+    transaction = response.json()["encoded_transaction"]
+    initial_size = len(transaction)
+
+    paths = [f"data/file-{i:05}.parquet" for i in range(10000)]
+    for batch in range(0, len(paths), 2500):
+        response = client.post(
+            url="/v1/pull/stage",
+            json={"encoded_transaction": transaction, "paths": paths[batch : batch + 2500]},
+        )
+        assert response.status_code == 200, f"{response.status_code} - {response.content}"
+        transaction = response.json()["encoded_transaction"]
+
+    # the token only grows by a reference per call to stage
+    assert len(transaction) < initial_size + 500, len(transaction)
+
+    decoded = verify_and_decode_transaction(transaction)
+    assert decoded.additions == []
+    assert asyncio.run(load_staged_files(storage_factory(), decoded)) == paths
+
+
+def test_manifest_entries_are_built_while_staging(monkeypatch):
+    import time
+
+    from tarchia.metadata import manifests
+    from tarchia.metadata import staging
+
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "prebuilt")
+    paths = make_data_files(3)
+
+    transaction = start_and_stage(client, "prebuilt", paths)
+
+    # wait for the background builds to complete
+    for _ in range(100):
+        if not staging._pending:
+            break
+        time.sleep(0.05)
+
+    # the commit shouldn't need to read any of the data files
+    def fail(*args, **kwargs):
+        raise AssertionError("manifest entry built during commit")
+
+    monkeypatch.setattr(manifests, "build_manifest_entry", fail)
+
+    response = commit(client, transaction)
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/prebuilt/commits/head")
+    assert sorted(b["path"] for b in response.json()["blobs"]) == paths
+    assert all(b["records"] == 9 for b in response.json()["blobs"])
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_prebuilt_entries_are_rebuilt_when_the_file_changes():
+    import time
+
+    import pyarrow
+    from pyarrow import parquet
+
+    from tarchia.metadata import staging
+
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "prebuilt_changed")
+    paths = make_data_files(2)
+
+    transaction = start_and_stage(client, "prebuilt_changed", paths)
+    for _ in range(100):
+        if not staging._pending:
+            break
+        time.sleep(0.05)
+
+    # the file is rewritten after its entry was built
+    parquet.write_table(
+        pyarrow.table({"id": [1, 2], "name": ["Mercury", "Venus"]}), paths[0]
+    )
+
+    response = commit(client, transaction)
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/prebuilt_changed/commits/head")
+    records = {b["path"]: b["records"] for b in response.json()["blobs"]}
+    assert records == {paths[0]: 2, paths[1]: 9}
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_stale_transactions():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "stale")
+    paths = make_data_files(3)
+
+    first = start_and_stage(client, "stale", [paths[0]])
+    second = start_and_stage(client, "stale", [paths[1]])
+
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/stale/commits/head/pull/start")
+    truncating = response.json()["encoded_transaction"]
+    response = client.post(url="/v1/pull/truncate", json={"encoded_transaction": truncating})
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    truncating = response.json()["encoded_transaction"]
+
+    response = commit(client, first)
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    # the second transaction is out of date but only adds files, so it's rebased
+    response = commit(client, second)
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/stale/commits/head")
+    assert sorted(b["path"] for b in response.json()["blobs"]) == paths[:2]
+
+    # truncating isn't additive, so it can't be rebased
+    response = commit(client, truncating)
+    assert response.status_code == 400, f"{response.status_code} - {response.content}"
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_truncate_transaction():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "truncating")
+    paths = make_data_files(3)
+
+    response = commit(client, start_and_stage(client, "truncating", paths[:2]))
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    # truncate the table and add a new file in the same transaction
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/truncating/commits/head/pull/start")
+    transaction = response.json()["encoded_transaction"]
+    response = client.post(url="/v1/pull/truncate", json={"encoded_transaction": transaction})
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    transaction = response.json()["encoded_transaction"]
+    response = client.post(
+        url="/v1/pull/stage", json={"encoded_transaction": transaction, "paths": paths[2:]}
+    )
+    transaction = response.json()["encoded_transaction"]
+    response = commit(client, transaction)
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/truncating/commits/head")
+    assert [b["path"] for b in response.json()["blobs"]] == paths[2:]
+
+    # truncating on its own leaves the table empty
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/truncating/commits/head/pull/start")
+    transaction = response.json()["encoded_transaction"]
+    response = client.post(url="/v1/pull/truncate", json={"encoded_transaction": transaction})
+    response = commit(client, response.json()["encoded_transaction"])
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/truncating/commits/head")
+    assert response.json()["blobs"] == []
+    assert response.json()["manifest_path"] is None
+    assert response.json()["data_hash"] == "0" * 64
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def delete(client: TestClient, table: str, **criteria):
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/{table}/commits/head/pull/start")
+    transaction = response.json()["encoded_transaction"]
+    response = client.post(
+        url="/v1/pull/delete", json={"encoded_transaction": transaction, **criteria}
+    )
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    return commit(client, response.json()["encoded_transaction"])
+
+
+def test_delete_files():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "deleting")
+    paths = make_data_files(5)
+
+    response = commit(client, start_and_stage(client, "deleting", paths))
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    response = delete(client, "deleting", paths=[paths[0]])
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/deleting/commits/head")
+    assert [b["path"] for b in response.json()["blobs"]] == paths[1:]
+    assert response.json()["removed_files"] == [paths[0]]
+
+    response = delete(client, "deleting", prefix=f"{TEMP_FOLDER}/planets-1")
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/deleting/commits/head")
+    assert [b["path"] for b in response.json()["blobs"]] == paths[2:]
+
+    # the planet ids are 1 to 9, so only some of the records in each file match
+    response = delete(client, "deleting", filters="id>5")
+    assert response.status_code == 400, f"{response.status_code} - {response.content}"
+
+    response = delete(client, "deleting", filters="id>0")
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/deleting/commits/head")
+    assert response.json()["blobs"] == []
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_delete_requires_criteria():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "deleting")
+
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/deleting/commits/head/pull/start")
+    transaction = response.json()["encoded_transaction"]
+    response = client.post(url="/v1/pull/delete", json={"encoded_transaction": transaction})
+    assert response.status_code == 400, f"{response.status_code} - {response.content}"
+
+
+def test_delete_filters_with_inclusive_operators():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "deleting_inclusive")
+    paths = make_data_files(2)
+
+    response = commit(client, start_and_stage(client, "deleting_inclusive", paths))
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    # 'id>=5' must not be read as 'id<100' alone, which matches every file
+    response = delete(client, "deleting_inclusive", filters="id>=5, id<100")
+    assert response.status_code == 400, f"{response.status_code} - {response.content}"
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/deleting_inclusive/commits/head")
+    assert [b["path"] for b in response.json()["blobs"]] == paths
+
+    response = delete(client, "deleting_inclusive", filters="id>=0, id<=100")
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/deleting_inclusive/commits/head")
+    assert response.json()["blobs"] == []
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_delete_filters_do_not_remove_nulls():
+    import pyarrow
+    from pyarrow import parquet
+
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "deleting_nulls")
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+    os.makedirs(TEMP_FOLDER)
+    path = f"{TEMP_FOLDER}/nulls.parquet"
+    parquet.write_table(pyarrow.table({"id": [10, 20, None], "name": ["a", "b", "c"]}), path)
+
+    response = commit(client, start_and_stage(client, "deleting_nulls", [path]))
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    # the null doesn't match, so only some of the records in the file match
+    response = delete(client, "deleting_nulls", filters="id>5")
+    assert response.status_code == 400, f"{response.status_code} - {response.content}"
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/deleting_nulls/commits/head")
+    assert [b["path"] for b in response.json()["blobs"]] == [path]
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_delete_filters_must_all_be_usable():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "deleting")
+
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}/deleting/commits/head/pull/start")
+    transaction = response.json()["encoded_transaction"]
+    for filters in ("id>0, unknown<100", "id>0, id", "id>zero", ""):
+        response = client.post(
+            url="/v1/pull/delete", json={"encoded_transaction": transaction, "filters": filters}
+        )
+        assert response.status_code == 400, f"{filters} {response.status_code} - {response.content}"
+
+
+def test_commits_use_the_given_providers():
+    """the write path uses the providers given to the handler, not the application's"""
+    from tarchia.api.dependencies import get_catalog
+    from tarchia.api.dependencies import get_storage
+    from tarchia.interfaces.providers import providers
+
+    class RecordingCatalog:
+        def __init__(self, catalog):
+            self.catalog = catalog
+            self.swaps = []
+
+        def __getattr__(self, name):
+            return getattr(self.catalog, name)
+
+        def swap_commit(self, table_id, expected_sha, entry):
+            self.swaps.append(table_id)
+            return self.catalog.swap_commit(table_id, expected_sha, entry)
+
+    class RecordingStorage:
+        def __init__(self, storage):
+            self.storage = storage
+            self.writes = []
+
+        def __getattr__(self, name):
+            return getattr(self.storage, name)
+
+        async def awrite_blob(self, location, content):
+            self.writes.append(location)
+            await self.storage.awrite_blob(location, content)
+
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "given_providers")
+    paths = make_data_files(2)
+    transactions = [start_and_stage(client, "given_providers", [path]) for path in paths]
+
+    catalog = RecordingCatalog(providers.catalog())
+    storage = RecordingStorage(providers.storage())
+    application.dependency_overrides[get_catalog] = lambda: catalog
+    application.dependency_overrides[get_storage] = lambda: storage
+    try:
+        # the table is CONTINUOUS so the commits are grouped
+        for transaction in transactions:
+            response = commit(client, transaction)
+            assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    finally:
+        application.dependency_overrides.clear()
+
+    assert len(catalog.swaps) == len(transactions)
+    assert any("/commits/commit-" in location for location in storage.writes)
+    assert any("/history/history-" in location for location in storage.writes)
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_commits_do_not_revert_updates():
+    """a change to the table made while a commit is being built should be kept"""
+    from tarchia.api.dependencies import get_catalog
+    from tarchia.interfaces.providers import providers
+    from tarchia.utils.catalogs import update_table_entry
+
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "racing_commit")
+    paths = make_data_files(1)
+    transaction = start_and_stage(client, "racing_commit", paths)
+
+    catalog = providers.catalog()
+
+    class RacingCatalog:
+        """changes the table's description just before the commit is swapped in"""
+
+        def __getattr__(self, name):
+            return getattr(catalog, name)
+
+        def swap_commit(self, table_id, expected_sha, entry):
+            update_table_entry(
+                TEST_OWNER,
+                "racing_commit",
+                lambda table: setattr(table, "description", "updated"),
+                catalog_provider=catalog,
+            )
+            return catalog.swap_commit(table_id, expected_sha, entry)
+
+    application.dependency_overrides[get_catalog] = RacingCatalog
+    try:
+        response = commit(client, transaction)
+    finally:
+        application.dependency_overrides.clear()
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+
+    entry = catalog.get_table(owner=TEST_OWNER, table="racing_commit")
+    assert entry["description"] == "updated"
+    assert entry["current_commit_sha"] is not None
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def staging_folder(transaction: str) -> str:
+    from tarchia.api.v1.data_management import verify_and_decode_transaction
+    from tarchia.metadata.staging import _segment_root
+
+    return _segment_root(verify_and_decode_transaction(transaction))
+
+
+def test_staging_is_removed_after_commit():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "staging_commit")
+    paths = make_data_files(2)
+
+    transaction = start_and_stage(client, "staging_commit", paths)
+    folder = staging_folder(transaction)
+    assert os.listdir(folder)
+
+    response = commit(client, transaction)
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    assert not os.path.exists(folder) or os.listdir(folder) == []
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_staging_is_removed_on_abort():
+    ensure_owner()
+    client = TestClient(application)
+    create_table(client, "staging_abort")
+    paths = make_data_files(2)
+
+    transaction = start_and_stage(client, "staging_abort", paths)
+    folder = staging_folder(transaction)
+    assert os.listdir(folder)
+
+    response = client.patch(url="/v1/pull/abort", json={"encoded_transaction": transaction})
+    assert response.status_code == 200, f"{response.status_code} - {response.content}"
+    assert not os.path.exists(folder) or os.listdir(folder) == []
+
+    # nothing was committed
+    response = client.get(url=f"/v1/tables/{TEST_OWNER}/staging_abort/commits/head")
+    assert response.json()["blobs"] == []
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
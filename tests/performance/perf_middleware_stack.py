@@ -0,0 +1,148 @@
+"""
+Benchmark the fixed per-request cost of the middleware stack.
+
+Table lookups are cheap, so for a lookup-heavy workload the cost of the
+middleware wrapping each request matters. This serves the same table lookup
+through the current stack and through the previous stack, where the audit and
+authorization middleware were BaseHTTPMiddleware subclasses.
+
+Requests are sent straight to the ASGI application, rather than through an
+HTTP client, so the client's overhead doesn't hide the difference.
+
+    $ python tests/performance/perf_middleware_stack.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+
+from tarchia.api.middlewares import audit_middleware
+from tarchia.api.middlewares import authorization_middleware
+from tarchia.api.middlewares import brotli_middleware
+from tarchia.api.middlewares import cors_middleware
+from tarchia.api.v1 import v1_router
+from tarchia.models import Column
+from tarchia.models import CreateTableRequest
+from tarchia.models import Schema
+from tests.common import TEST_OWNER
+from tests.common import ensure_owner
+
+TABLE = "perf_middleware"
+REQUESTS = 2000
+
+
+class BaseHTTPAuditMiddleware(BaseHTTPMiddleware):
+    """The audit middleware as a BaseHTTPMiddleware, writing the record inline"""
+
+    async def dispatch(self, request, call_next):
+        record = {"service": "tarchia", "end_point": request.url.path, "method": request.method}
+        start = time.monotonic_ns()
+        try:
+            return await call_next(request)
+        finally:
+            record["duration_ms"] = (time.monotonic_ns() - start) / 1e6
+            audit_middleware._discard([record])
+
+
+class BaseHTTPAuthorizationMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if request.client is None or request.client.host not in ("127.0.0.1", "::1"):
+            return Response(status_code=401)
+        return await call_next(request)
+
+
+def build(pure_asgi: bool) -> FastAPI:
+    app = FastAPI()
+    app.include_router(v1_router)
+    brotli_middleware.bind(app)
+    if pure_asgi:
+        audit_middleware.bind(app)
+        authorization_middleware.bind(app)
+    else:
+        app.add_middleware(BaseHTTPAuditMiddleware)
+        app.add_middleware(BaseHTTPAuthorizationMiddleware)
+    cors_middleware.bind(app)
+    return app
+
+
+async def lookup(app: FastAPI):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/v1/tables/{TEST_OWNER}/{TABLE}",
+        "raw_path": f"/v1/tables/{TEST_OWNER}/{TABLE}".encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver"), (b"accept-encoding", b"br")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def benchmark(app: FastAPI) -> float:
+    async def run():
+        assert await lookup(app) == 200
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await lookup(app)
+        return REQUESTS / (time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from fastapi.testclient import TestClient
+
+    from main import application
+
+    # the audit records aren't what we're measuring
+    audit_middleware.audit_log.writer = audit_middleware._discard
+
+    ensure_owner()
+    TestClient(application).post(
+        url=f"/v1/tables/{TEST_OWNER}",
+        content=CreateTableRequest(
+            name=TABLE,
+            location="gs://dataset/",
+            steward="bob",
+            table_schema=Schema(columns=[Column(name="column")]),
+            freshness_life_in_days=0,
+            retention_in_days=0,
+            description="benchmark",
+        ).serialize(),
+    )
+
+    try:
+        base_http = benchmark(build(pure_asgi=False))
+        pure_asgi = benchmark(build(pure_asgi=True))
+    finally:
+        TestClient(application).delete(url=f"/v1/tables/{TEST_OWNER}/{TABLE}")
+
+    print(f"GET /v1/tables/{{owner}}/{{table}}, {REQUESTS} requests")
+    print(f"{'Stack':<25}{'Requests/s':>12}")
+    print("-" * 37)
+    print(f"{'BaseHTTPMiddleware':<25}{base_http:>12.0f}")
+    print(f"{'Pure ASGI':<25}{pure_asgi:>12.0f}")
@@ -0,0 +1,89 @@
+"""
+Benchmark reading manifests with and without the shared metadata cache.
+
+With more than one worker, each worker would otherwise decode the same hot
+manifests for itself. This reads a manifest tree as a worker which has never
+seen it would, once decoding the Avro manifests and once loading the entries
+another worker has put in the shared cache.
+
+    $ python tests/performance/perf_shared_cache.py
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from tarchia.interfaces.storage.local_storage import LocalStorage
+from tarchia.metadata.manifests import get_manifest
+from tarchia.metadata.manifests import write_manifest
+from tarchia.models.manifest_models import EntryType
+from tarchia.models.manifest_models import ManifestEntry
+from tarchia.utils import config
+from tarchia.utils import shared_cache
+
+ROOT = "_temp_perf_shared_cache"
+CACHE_FOLDER = os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else ROOT, "tarchia-perf-shared-cache"
+)
+MANIFESTS = 8
+ENTRIES = 2000
+RUNS = 10
+
+
+def prepare(storage: LocalStorage) -> str:
+    children = []
+    for manifest in range(MANIFESTS):
+        location = f"{ROOT}/manifest-{manifest}.avro"
+        write_manifest(
+            location,
+            storage,
+            [
+                ManifestEntry(
+                    file_path=f"gs://bucket/data/{manifest}/file-{i}.parquet",
+                    file_type=EntryType.Data,
+                    record_count=20_000,
+                    file_size=64 * 1024 * 1024,
+                    sha256_checksum=f"{i:064}",
+                    lower_bounds={f"column_{c}": i for c in range(8)},
+                    upper_bounds={f"column_{c}": i + 1000 for c in range(8)},
+                )
+                for i in range(ENTRIES)
+            ],
+        )
+        children.append(ManifestEntry(file_path=location, file_type=EntryType.Manifest))
+    write_manifest(f"{ROOT}/root.avro", storage, children)
+    return f"{ROOT}/root.avro"
+
+
+def benchmark(storage: LocalStorage, location: str, shared: bool) -> float:
+    config.SHARED_CACHE_MB = 256 if shared else 0
+    config.SHARED_CACHE_FOLDER = CACHE_FOLDER
+    timings = []
+    for _ in range(RUNS):
+        # a worker which hasn't read the manifests before
+        shared_cache._shared_cache = None
+        start = time.perf_counter()
+        get_manifest(location, storage, None)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    storage = LocalStorage()
+    try:
+        location = prepare(storage)
+        decoding = benchmark(storage, location, shared=False)
+        shared = benchmark(storage, location, shared=True)
+    finally:
+        shutil.rmtree(ROOT, ignore_errors=True)
+        shutil.rmtree(CACHE_FOLDER, ignore_errors=True)
+
+    print(f"Reading {MANIFESTS * ENTRIES} manifest entries in a new worker (median of {RUNS})")
+    print(f"{'':<25}{'Time (ms)':>12}")
+    print("-" * 37)
+    print(f"{'Decoding the manifests':<25}{decoding * 1000:>12.1f}")
+    print(f"{'From the shared cache':<25}{shared * 1000:>12.1f}")
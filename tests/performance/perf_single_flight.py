@@ -0,0 +1,122 @@
+"""
+Benchmark coalescing concurrent reads of the same commit and manifest.
+
+When the HEAD of a busy table moves, every reader asks for the new commit and
+manifest at the same time. This fires bursts of concurrent loads at a storage
+provider with a fixed latency and reports how many reads reach storage.
+
+    $ python tests/performance/perf_single_flight.py
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from tarchia.interfaces.storage.local_storage import LocalStorage
+from tarchia.metadata.manifests import aget_manifest
+from tarchia.metadata.manifests import write_manifest
+from tarchia.models import Commit
+from tarchia.models import Schema
+from tarchia.models.manifest_models import EntryType
+from tarchia.models.manifest_models import ManifestEntry
+from tarchia.utils import catalogs
+from tarchia.utils.single_flight import SingleFlight
+
+LATENCY_SECONDS = 0.02
+BURST_SIZE = 200
+ROOT = "_temp_perf_single_flight"
+
+
+class SlowStorage(LocalStorage):
+    """Local storage with the latency of a remote store, counting the reads"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def read_blob(self, location, bucket_in_path=False):
+        self.reads += 1
+        time.sleep(LATENCY_SECONDS)
+        return super().read_blob(location, bucket_in_path)
+
+    def read_blob_view(self, location, bucket_in_path=False):
+        self.reads += 1
+        time.sleep(LATENCY_SECONDS)
+        return super().read_blob_view(location, bucket_in_path)
+
+
+def prepare(storage: SlowStorage):
+    manifest_path = f"{ROOT}/manifest.avro"
+    write_manifest(
+        location=manifest_path,
+        storage_provider=storage,
+        entries=[
+            ManifestEntry(
+                file_path=f"data/file-{i}.parquet",
+                file_type=EntryType.Data,
+                sha256_checksum=f"{i:064}",
+            )
+            for i in range(1000)
+        ],
+    )
+    commit = Commit(
+        data_hash="0" * 64,
+        user="benchmark",
+        message="benchmark",
+        branch="main",
+        parent_commit_sha=None,
+        last_updated_ms=0,
+        manifest_path=manifest_path,
+        table_schema=Schema(columns=[]),
+        encryption=None,
+        added_files=[],
+        removed_files=[],
+    )
+    storage.write_blob(f"{ROOT}/commit-{commit.commit_sha}.json", commit.serialize())
+    return commit.commit_sha, manifest_path
+
+
+async def burst(storage: SlowStorage, commit_sha: str, manifest_path: str):
+    async def load():
+        commit = await catalogs.aload_commit(storage, ROOT, commit_sha)
+        return await aget_manifest(commit.manifest_path, storage, None)
+
+    await asyncio.gather(*(load() for _ in range(BURST_SIZE)))
+
+
+def benchmark(coalesce: bool):
+    storage = SlowStorage()
+    commit_sha, manifest_path = prepare(storage)
+    storage.reads = 0
+
+    if not coalesce:
+        # a flight which never finds a load in progress
+        class NoFlight(SingleFlight):
+            async def run(self, key, load):
+                return await load()
+
+        from tarchia.metadata import manifests
+
+        catalogs.metadata_loads = manifests.metadata_loads = NoFlight()
+
+    start = time.perf_counter()
+    asyncio.run(burst(storage, commit_sha, manifest_path))
+    return storage.reads, time.perf_counter() - start
+
+
+if __name__ == "__main__":  # pragma: no cover
+    try:
+        with_reads, with_time = benchmark(coalesce=True)
+        without_reads, without_time = benchmark(coalesce=False)
+    finally:
+        shutil.rmtree(ROOT, ignore_errors=True)
+
+    print(f"{BURST_SIZE} concurrent loads of a commit and its manifest")
+    print(f"{'':<20}{'Storage reads':>15}{'Time (ms)':>12}")
+    print("-" * 47)
+    print(f"{'Coalesced':<20}{with_reads:>15}{with_time * 1000:>12.1f}")
+    print(f"{'Not coalesced':<20}{without_reads:>15}{without_time * 1000:>12.1f}")
@@ -1,64 +1,93 @@
-import cProfile
-import pstats
-import sys
+"""
+Benchmark the start-up time of the service.
+
+Workers are started and restarted with the service, so the time to import the
+application is paid on every scale-up. This imports the application in fresh
+interpreters, reports the median time against a budget and the most expensive
+imports, and exits with an error if the budget is exceeded, so it can be run as
+a check.
+
+    $ python tests/performance/perf_start_up.py
+
+The budget, in seconds, can be set with STARTUP_BUDGET_SECONDS.
+"""
+
 import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "1.5"))
+RUNS = 7
+TOP_IMPORTS = 15
+
+
+def time_import(module: str = "main") -> float:
+    """The seconds taken to import a module in a fresh interpreter"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def interpreter_time() -> float:
+    """The seconds taken to start an interpreter which imports nothing"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], cwd=ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def import_costs(module: str = "main"):
+    """The cumulative cost, in microseconds, of each import, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    costs = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        costs.append((int(cumulative), name.rstrip()))
+    return costs
+
+
+if __name__ == "__main__":  # pragma: no cover
+    interpreter_time()  # warm the file system cache
+    time_import()
+
+    baseline = statistics.median(interpreter_time() for _ in range(RUNS))
+    median = statistics.median(time_import() for _ in range(RUNS))
+    elapsed = median - baseline
+
+    costs = import_costs()
+    top_level = sorted(
+        ((cost, name.strip()) for cost, name in costs if name.startswith(" ") and "." not in name),
+        reverse=True,
+    )
+    tarchia = sorted(
+        ((cost, name.strip()) for cost, name in costs if name.strip().startswith("tarchia")),
+        reverse=True,
+    )
 
+    print(f"{'Package':<50}{'Cumulative (ms)':>16}")
+    print("-" * 66)
+    for cost, name in top_level[:TOP_IMPORTS]:
+        print(f"{name:<50}{cost / 1000:>16.1f}")
+    print()
+    print(f"{'Tarchia module':<50}{'Cumulative (ms)':>16}")
+    print("-" * 66)
+    for cost, name in tarchia[:TOP_IMPORTS]:
+        print(f"{name:<50}{cost / 1000:>16.1f}")
+    print()
+    print(f"Importing the application: {elapsed * 1000:.0f}ms (median of {RUNS})")
+    print(f"Budget: {BUDGET_SECONDS * 1000:.0f}ms")
 
-sys.path.insert(1, os.path.join(sys.path[0], "../.."))
-
-
-with cProfile.Profile(subcalls=False) as pr:
-
-    import main
-
-    #    app = tarchia.main.application
-
-    #        suite = open("tests/sql_battery/test_shapes_and_errors_battery.py").read()
-    #        sys.path.insert(1, os.path.join(sys.path[0], ".."))
-    #        exec(suite)
-
-    # stats = pstats.Stats(pr).strip_dirs().sort_stats("tottime")
-    stats = pstats.Stats(pr).sort_stats("tottime")
-
-    func_list = [
-        (k, v)
-        for k, v in stats.stats.items()
-        if "tarchia" in k[0]
-        and "." in k[0]
-        and (not "debugging.py" in k[0] and not "brace.py" in k[0])
-    ]
-    sorted_funcs = sorted(func_list, key=lambda x: x[1][2], reverse=True)  # Sorted by total time
-
-    header = ["Line", "Function", "Calls", "Total (ms)", "Cumulative (ms)"]
-    divider = "-" * 110
-    print(divider)
-    print("{:<45} {:<20} {:>10} {:>12} {:>15}".format(*header))
-    print(divider)
-
-    limit = 25
-    for func, func_stats in sorted_funcs:
-        file_name, line_number, function_name = func
-        total_calls, _, total_time, cumulative_time, _ = func_stats
-        file_name = file_name.split("opteryx")[-1]
-        file_name = "..." + file_name[-37:] if len(file_name) > 40 else file_name
-        function_name = function_name[:17] + "..." if len(function_name) > 20 else function_name
-        row = [
-            f"{file_name}:{line_number}",
-            function_name,
-            total_calls,
-            f"{(total_time * 1000):.6f}",
-            f"{(cumulative_time * 1000):.6f}",
-        ]
-        print("{:<45} {:<20} {:>10} {:>12} {:>15}".format(*row))
-        limit -= 1
-        if limit == 0:
-            break
-    print(divider)
-
-quit()
-import json
-
-from opteryx.third_party import sqloxide
-
-parsed_statements = sqloxide.parse_sql(SQL, dialect="mysql")
-print(json.dumps(parsed_statements))
+    if elapsed > BUDGET_SECONDS:
+        print("Start-up time is over budget")
+        sys.exit(1)
@@ -0,0 +1,71 @@
+"""
+Benchmark signing and verifying transaction tokens.
+
+Tokens are signed on every call to stage and verified on every call to stage and
+commit, so the cost of each grows with the number of files carried in the token.
+
+    $ python tests/performance/perf_transaction_signing.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from tarchia.api.v1.data_management import encode_and_sign_transaction
+from tarchia.api.v1.data_management import verify_and_decode_transaction
+from tarchia.models import Column
+from tarchia.models import Schema
+from tarchia.models import Transaction
+
+CYCLES = {10: 2000, 1_000: 200, 10_000: 20}
+
+
+def make_transaction(file_count: int) -> Transaction:
+    return Transaction(
+        transaction_id="0123456789abcdef",
+        expires_at=int(time.time()) + 3600,
+        table_id="0123456789abcdef",
+        table="planets",
+        owner="tester",
+        table_schema=Schema(columns=[Column(name="id", type="INTEGER")]),
+        encryption=None,
+        additions=[
+            f"gs://bucket/planets/year=2024/month=01/day=01/data-{i:08}.parquet"
+            for i in range(file_count)
+        ],
+    )
+
+
+def benchmark(file_count: int, cycles: int):
+    transaction = make_transaction(file_count)
+
+    start = time.perf_counter()
+    for _ in range(cycles):
+        token = encode_and_sign_transaction(transaction)
+    sign_time = (time.perf_counter() - start) / cycles
+
+    start = time.perf_counter()
+    for _ in range(cycles):
+        verify_and_decode_transaction(token)
+    verify_time = (time.perf_counter() - start) / cycles
+
+    raw_size = len(transaction.serialize())
+    return raw_size, len(token), sign_time, verify_time
+
+
+if __name__ == "__main__":  # pragma: no cover
+    header = ["Files", "Raw (bytes)", "Token (bytes)", "Sign (ops/s)", "Verify (ops/s)"]
+    divider = "-" * 75
+    print(divider)
+    print("{:>8} {:>14} {:>14} {:>16} {:>16}".format(*header))
+    print(divider)
+    for file_count, cycles in CYCLES.items():
+        raw_size, token_size, sign_time, verify_time = benchmark(file_count, cycles)
+        print(
+            "{:>8} {:>14} {:>14} {:>16.1f} {:>16.1f}".format(
+                file_count, raw_size, token_size, 1 / sign_time, 1 / verify_time
+            )
+        )
+    print(divider)
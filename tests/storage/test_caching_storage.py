@@ -0,0 +1,209 @@
+import sys
+import os
+import shutil
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+
+from tarchia.interfaces.storage import caching_storage
+from tarchia.interfaces.storage.caching_storage import CachingStorage
+from tarchia.interfaces.storage.storage_provider import StorageProvider
+from tarchia.utils import config
+
+CACHE_FOLDER = "_temp_cache"
+
+
+class CountingStorage(StorageProvider):
+    """In-memory storage which counts the reads made to it"""
+
+    def __init__(self):
+        self.blobs = {}
+        self.reads = 0
+
+    def write_blob(self, location, content):
+        self.blobs[location] = bytes(content)
+
+    def read_blob(self, location, bucket_in_path=False):
+        self.reads += 1
+        return self.blobs.get(location)
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    def configure(memory_mb=1, disk_mb=1):
+        monkeypatch.setattr(config, "STORAGE_CACHE_MEMORY_MB", memory_mb)
+        monkeypatch.setattr(config, "STORAGE_CACHE_DISK_MB", disk_mb)
+        monkeypatch.setattr(config, "STORAGE_CACHE_FOLDER", CACHE_FOLDER)
+        monkeypatch.setattr(config, "STORAGE_CACHE_EXCLUDE", r"/mutable/")
+        # start the process again, with empty memory caches
+        caching_storage._memory_cache = None
+        caching_storage._disk_cache = None
+        caching_storage.statistics.reset()
+
+    shutil.rmtree(CACHE_FOLDER, ignore_errors=True)
+    yield configure
+    caching_storage._memory_cache = None
+    caching_storage._disk_cache = None
+    shutil.rmtree(CACHE_FOLDER, ignore_errors=True)
+
+
+def test_memory_cache(caches):
+    caches(disk_mb=0)
+    inner = CountingStorage()
+    inner.write_blob("commits/commit-1.json", b"commit")
+    storage = CachingStorage(inner)
+
+    for _ in range(5):
+        assert storage.read_blob("commits/commit-1.json") == b"commit"
+    assert inner.reads == 1
+
+    statistics = caching_storage.statistics.as_dict()
+    assert statistics["misses"] == 1
+    assert statistics["memory_hits"] == 4
+    assert statistics["hit_ratio"] == 0.8
+
+
+def test_disk_cache_survives_restart(caches):
+    caches()
+    inner = CountingStorage()
+    inner.write_blob("manifests/manifest-1.avro", b"manifest")
+    assert CachingStorage(inner).read_blob("manifests/manifest-1.avro") == b"manifest"
+
+    # a new process has an empty memory cache but the disk cache is still there
+    caches()
+    storage = CachingStorage(inner)
+    assert storage.read_blob("manifests/manifest-1.avro") == b"manifest"
+    assert storage.read_blob("manifests/manifest-1.avro") == b"manifest"
+    assert inner.reads == 1
+
+    statistics = caching_storage.statistics.as_dict()
+    assert statistics["disk_hits"] == 1
+    assert statistics["memory_hits"] == 1
+
+
+def test_caches_are_bounded(caches):
+    caches()
+    inner = CountingStorage()
+    storage = CachingStorage(inner)
+
+    blob = b"x" * (256 * 1024)
+    for i in range(10):
+        inner.write_blob(f"history/history-{i}.avro", blob)
+        storage.read_blob(f"history/history-{i}.avro")
+
+    assert caching_storage._memory_cache.current_bytes <= 1024 * 1024
+    assert caching_storage._disk_cache.current_bytes <= 1024 * 1024
+    # the folder also holds the lock and the recorded size
+    cached_files = [name for name in os.listdir(CACHE_FOLDER) if not name.startswith(".")]
+    assert len(cached_files) == 4, cached_files
+
+    # the most recent blobs are still cached, the oldest have been evicted
+    reads = inner.reads
+    storage.read_blob("history/history-9.avro")
+    assert inner.reads == reads
+    storage.read_blob("history/history-0.avro")
+    assert inner.reads == reads + 1
+
+
+def test_disk_cache_is_shared_by_live_processes(caches):
+    # two caches on one folder, as two running workers would have
+    first = caching_storage._DiskCache(CACHE_FOLDER, 1024 * 1024)
+    second = caching_storage._DiskCache(CACHE_FOLDER, 1024 * 1024)
+
+    first.set("manifests/manifest-1.avro", b"manifest")
+    assert second.get("manifests/manifest-1.avro") == b"manifest"
+
+    second.discard("manifests/manifest-1.avro")
+    assert first.get("manifests/manifest-1.avro") is None
+
+
+def test_disk_cache_is_bounded_across_processes(caches):
+    workers = [caching_storage._DiskCache(CACHE_FOLDER, 1024 * 1024) for _ in range(4)]
+
+    blob = b"x" * (256 * 1024)
+    for i in range(12):
+        workers[i % len(workers)].set(f"history/history-{i}.avro", blob)
+
+    cached_files = [name for name in os.listdir(CACHE_FOLDER) if not name.startswith(".")]
+    assert len(cached_files) == 4, cached_files
+    assert all(worker.current_bytes == 4 * len(blob) for worker in workers)
+
+    # a file read by any worker is recently used for all of them
+    assert workers[0].get("history/history-8.avro") == blob
+    workers[1].set("history/history-12.avro", blob)
+    assert workers[2].get("history/history-8.avro") == blob
+    assert workers[3].get("history/history-9.avro") is None
+
+
+def test_uncached_reads(caches):
+    caches()
+    inner = CountingStorage()
+    inner.write_blob("owner/table/mutable/state.json", b"state")
+    inner.write_blob("owner/table/deleted.json", b"deleted")
+    inner.write_blob("bucket/data/planets.parquet", b"planets")
+    storage = CachingStorage(inner)
+
+    for _ in range(2):
+        storage.read_blob("owner/table/mutable/state.json")
+        storage.read_blob("owner/table/deleted.json")
+        storage.read_blob("bucket/data/planets.parquet", bucket_in_path=True)
+        # missing blobs aren't cached, they may be written later
+        assert storage.read_blob("commits/commit-2.json") is None
+
+    assert inner.reads == 8
+    assert caching_storage.statistics.as_dict()["bypassed"] == 6
+
+    inner.write_blob("commits/commit-2.json", b"commit")
+    assert storage.read_blob("commits/commit-2.json") == b"commit"
+
+
+def test_writes_populate_the_cache(caches):
+    caches(disk_mb=0)
+    inner = CountingStorage()
+    storage = CachingStorage(inner)
+
+    storage.write_blob("commits/commit-3.json", b"commit")
+    assert storage.read_blob("commits/commit-3.json") == b"commit"
+    assert storage.read_blob_view("commits/commit-3.json") == b"commit"
+    assert inner.reads == 0
+
+
+def test_disk_cache_write_errors_are_not_raised(caches, monkeypatch):
+    caches(memory_mb=0)
+    inner = CountingStorage()
+    inner.write_blob("commits/commit-4.json", b"commit")
+    storage = CachingStorage(inner)
+
+    def full(self, key, value):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(caching_storage._DiskCache, "set", full)
+    assert storage.read_blob("commits/commit-4.json") == b"commit"
+    storage.write_blob("commits/commit-5.json", b"commit")
+    assert inner.blobs["commits/commit-5.json"] == b"commit"
+    assert caching_storage.statistics.as_dict()["write_errors"] == 2
+
+
+def test_disk_cache_evicts_to_the_low_water_mark(caches):
+    cache = caching_storage._DiskCache(CACHE_FOLDER, 1024 * 1024)
+
+    blob = b"x" * (128 * 1024)
+    for i in range(9):
+        cache.set(f"history/history-{i}.avro", blob)
+
+    # going over the limit trims the cache to below 90% of it, so the next
+    # writes don't each need to evict
+    assert cache.current_bytes == 7 * len(blob)
+    assert cache.get("history/history-0.avro") is None
+    assert cache.get("history/history-1.avro") is None
+    assert cache.get("history/history-8.avro") == blob
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
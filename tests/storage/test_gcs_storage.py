@@ -0,0 +1,106 @@
+"""
+Test the Google Cloud Storage provider against an in-memory fake of the client,
+counting the requests which would be made to GCS.
+"""
+
+import sys
+import os
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from tarchia.interfaces.storage import google_cloud_storage
+from tarchia.interfaces.storage.google_cloud_storage import GoogleCloudStorage
+
+
+class FakeNotFound(Exception):
+    pass
+
+
+class FakeBlob:
+    def __init__(self, client, bucket, name):
+        self.client = client
+        self.bucket = bucket
+        self.name = name
+
+    def upload_from_string(self, content, content_type=None):
+        self.client.requests += 1
+        self.client.blobs[(self.bucket, self.name)] = content
+
+    def download_as_bytes(self):
+        self.client.requests += 1
+        if (self.bucket, self.name) not in self.client.blobs:
+            raise FakeNotFound(self.name)
+        return self.client.blobs[(self.bucket, self.name)]
+
+
+class FakeBucket:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def blob(self, name):
+        return FakeBlob(self.client, self.name, name)
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = 0
+        self.blobs = {}
+
+    def bucket(self, name):
+        # creating a bucket handle doesn't make a request
+        return FakeBucket(self, name)
+
+    def get_bucket(self, name):
+        self.requests += 1
+        return FakeBucket(self, name)
+
+
+def make_storage(client):
+    google_cloud_storage._buckets.clear()
+    storage = GoogleCloudStorage.__new__(GoogleCloudStorage)
+    storage.client = client
+    storage.retry = lambda func: func
+    storage.not_found = FakeNotFound
+    storage.bucket_name = "metadata"
+    return storage
+
+
+def test_one_request_per_blob():
+    client = FakeClient()
+    storage = make_storage(client)
+
+    for i in range(10):
+        storage.write_blob(f"commits/commit-{i}.json", str(i).encode())
+    assert client.requests == 10, client.requests
+
+    for i in range(10):
+        assert storage.read_blob(f"commits/commit-{i}.json") == str(i).encode()
+    assert client.requests == 20, client.requests
+
+
+def test_missing_blob():
+    client = FakeClient()
+    storage = make_storage(client)
+
+    assert storage.read_blob("commits/missing.json") is None
+    assert client.requests == 1, client.requests
+
+
+def test_bucket_in_path():
+    client = FakeClient()
+    storage = make_storage(client)
+    client.blobs[("data", "planets.parquet")] = b"planets"
+
+    assert storage.read_blob("data/planets.parquet", bucket_in_path=True) == b"planets"
+    assert storage.read_blob("planets.parquet") is None
+    assert set(google_cloud_storage._buckets) == {"data", "metadata"}
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
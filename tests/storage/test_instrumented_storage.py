@@ -0,0 +1,168 @@
+import asyncio
+import os
+import sys
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+
+from tarchia.interfaces.storage import instrumented_storage
+from tarchia.interfaces.storage.instrumented_storage import InstrumentedStorage
+from tarchia.interfaces.storage.instrumented_storage import path_class
+from tarchia.interfaces.storage.instrumented_storage import start_request_io
+from tarchia.interfaces.storage.storage_provider import StorageProvider
+
+COMMIT = "warehouse/tester/1234/metadata/commits/commit-abc.json"
+MANIFEST = "warehouse/tester/1234/metadata/manifests/manifest-abc.avro"
+
+
+class MemoryStorage(StorageProvider):
+    def __init__(self):
+        self.blobs = {}
+
+    def write_blob(self, location, content):
+        if "fail" in location:
+            raise OSError("unavailable")
+        self.blobs[location] = bytes(content)
+
+    def read_blob(self, location, bucket_in_path=False):
+        return self.blobs.get(location)
+
+
+@pytest.fixture
+def metrics():
+    instrumented_storage.metrics.reset()
+    yield instrumented_storage.metrics
+    instrumented_storage.metrics.reset()
+
+
+def test_path_class():
+    assert path_class(COMMIT) == "commit"
+    assert path_class(MANIFEST) == "manifest"
+    assert path_class("warehouse/tester/1234/metadata/history/history-abc.avro") == "history"
+    assert path_class("warehouse/tester/1234/metadata/staging/1/segment-2.json") == "staging"
+    assert path_class("bucket/planets/data.parquet", bucket_in_path=True) == "data"
+    assert path_class("somewhere/else.json") == "other"
+
+
+def test_counts_calls_and_bytes(metrics):
+    storage = InstrumentedStorage(MemoryStorage())
+    storage.write_blob(COMMIT, b"0123456789")
+    for _ in range(3):
+        assert storage.read_blob(COMMIT) == b"0123456789"
+    assert bytes(storage.read_blob_view(COMMIT)) == b"0123456789"
+    assert storage.read_blob(MANIFEST) is None
+    with pytest.raises(OSError):
+        storage.write_blob(f"{COMMIT}.fail", b"x")
+
+    series = metrics.series
+    assert series[("write", "commit")].calls == 2
+    assert series[("write", "commit")].errors == 1
+    assert series[("write", "commit")].bytes == 10
+    assert series[("read", "commit")].calls == 4
+    assert series[("read", "commit")].bytes == 40
+    assert series[("read", "manifest")].calls == 1
+    assert series[("read", "manifest")].bytes == 0
+    assert sum(series[("read", "commit")].buckets) == 4
+
+
+def test_prometheus_format(metrics):
+    storage = InstrumentedStorage(MemoryStorage())
+    storage.write_blob(COMMIT, b"commit")
+    storage.read_blob(COMMIT)
+
+    lines = metrics.to_prometheus()
+    labels = 'operation="read",path_class="commit"'
+    assert f"tarchia_storage_requests_total{{{labels}}} 1" in lines
+    assert f"tarchia_storage_bytes_total{{{labels}}} 6" in lines
+    assert f'tarchia_storage_request_seconds_bucket{{{labels},le="+Inf"}} 1' in lines
+    assert f"tarchia_storage_request_seconds_count{{{labels}}} 1" in lines
+
+    # each family is one group, its HELP and TYPE lines then all of its samples
+    families = []
+    for line in lines:
+        name = line.split()[2] if line.startswith("#") else line.split("{")[0]
+        for suffix in ("_bucket", "_sum", "_count"):
+            if name.startswith("tarchia_storage_request_seconds") and name.endswith(suffix):
+                name = name[: -len(suffix)]
+        if not families or families[-1] != name:
+            families.append(name)
+    assert len(families) == len(set(families)) == 4, families
+    assert lines[0].startswith("# HELP tarchia_storage_requests_total")
+    assert lines[1] == "# TYPE tarchia_storage_requests_total counter"
+
+
+def test_request_io_follows_the_request(metrics):
+    inner = MemoryStorage()
+    storage = InstrumentedStorage(inner)
+    storage.write_blob(COMMIT, b"commit")
+    storage.write_blob(MANIFEST, b"manifest")
+
+    async def serve():
+        request_io = start_request_io()
+        # reads made on the thread pool and in batches are attributed to the request
+        await storage.aread_blob(COMMIT)
+        await storage.aread_many([COMMIT, MANIFEST])
+        return request_io.as_dict()
+
+    async def concurrent_requests():
+        return await asyncio.gather(serve(), serve())
+
+    for totals in asyncio.run(concurrent_requests()):
+        assert totals["commit"]["calls"] == 2
+        assert totals["commit"]["bytes"] == 12
+        assert totals["manifest"]["calls"] == 1
+        assert totals["manifest"]["bytes"] == 8
+
+
+def test_metrics_endpoint_and_audit_record(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from main import application
+    from tarchia.api.middlewares.audit_middleware import audit_log
+    from tarchia.models import Column
+    from tarchia.models import CreateTableRequest
+    from tarchia.models import Schema
+    from tests.common import TEST_OWNER
+    from tests.common import ensure_owner
+
+    ensure_owner()
+    client = TestClient(application)
+
+    new_table = CreateTableRequest(
+        name="test_instrumented",
+        location="gs://dataset/",
+        steward="bob",
+        table_schema=Schema(columns=[Column(name="column")]),
+        freshness_life_in_days=0,
+        retention_in_days=0,
+        description="test",
+    )
+    audit_log.flush()
+    audit_records = []
+    monkeypatch.setattr(audit_log, "writer", audit_records.extend)
+
+    response = client.post(url=f"/v1/tables/{TEST_OWNER}", content=new_table.serialize())
+    assert response.status_code in {200, 409}, response.content
+    audit_log.flush()
+
+    if response.status_code == 200:
+        assert audit_records[-1]["storage"]["commit"]["calls"] >= 1
+        assert audit_records[-1]["storage"]["history"]["calls"] >= 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE tarchia_storage_request_seconds histogram" in response.text
+    assert "tarchia_storage_cache_reads_total" in response.text
+
+    client.delete(url=f"/v1/tables/{TEST_OWNER}/test_instrumented")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
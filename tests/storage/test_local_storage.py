@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 import shutil
 import time
 
@@ -55,6 +56,169 @@ def test_local_storage():
     shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
 
 
+def test_local_storage_async():
+    """
+    The async interface shouldn't block the event loop, other tasks keep running
+    while the blobs are read and written.
+    """
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+    planets = ["mercury", "venus", "earth", "mars"]
+    paths = [f"{TEMP_FOLDER}/{planet}" for planet in planets]
+
+    async def ticker(ticks):
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def run():
+        ticks = []
+        task = asyncio.create_task(ticker(ticks))
+        await asyncio.gather(
+            *(local_storage.awrite_blob(path, planet.encode()) for path, planet in zip(paths, planets))
+        )
+        single = await local_storage.aread_blob(paths[0])
+        many = await local_storage.aread_many(paths + [f"{TEMP_FOLDER}/pluto"])
+        task.cancel()
+        return single, many, ticks
+
+    single, many, ticks = asyncio.run(run())
+
+    assert single == b"mercury", single
+    assert many == [planet.encode() for planet in planets] + [None], many
+    assert len(ticks) > 0
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_local_storage_batches():
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+    planets = ["mercury", "venus", "earth", "mars"]
+    blobs = {f"{TEMP_FOLDER}/{planet}": planet.encode() for planet in planets}
+    # the parent of this blob is a file, so it can't be written
+    local_storage.write_blob(f"{TEMP_FOLDER}/sun", b"sun")
+    blobs[f"{TEMP_FOLDER}/sun/moon"] = b"none"
+
+    errors = local_storage.write_blobs(blobs)
+    assert errors[:4] == [None] * 4, errors
+    assert isinstance(errors[4], Exception), errors
+
+    results = local_storage.read_blobs(list(blobs)[:4] + [f"{TEMP_FOLDER}/pluto"])
+    assert results == [planet.encode() for planet in planets] + [None], results
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_concurrent_batches_share_the_batch_pool(monkeypatch):
+    import threading
+
+    from tarchia.interfaces.storage import storage_provider as module
+    from tarchia.utils import config
+
+    monkeypatch.setattr(config, "STORAGE_IO_THREADS", 4)
+    monkeypatch.setattr(module, "_batch_executor", None)
+
+    threads = set()
+
+    class SlowStorage(module.StorageProvider):
+        def read_blob(self, location, bucket_in_path=False):
+            threads.add(threading.get_ident())
+            time.sleep(0.001)
+            return location.encode()
+
+    storage = SlowStorage()
+    paths = [f"blob-{i}" for i in range(16)]
+
+    async def read_batches():
+        return await asyncio.gather(*(storage.aread_many(paths) for _ in range(8)))
+
+    results = asyncio.run(read_batches())
+    assert all(result == [path.encode() for path in paths] for result in results)
+    # every batch ran on the one bounded pool, rather than a pool per batch
+    assert len(threads) <= config.STORAGE_IO_THREADS, len(threads)
+
+    module.batch_executor().shutdown()
+    monkeypatch.setattr(module, "_batch_executor", None)
+
+
+def test_local_storage_views():
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+    local_storage.write_blob(f"{TEMP_FOLDER}/mercury", b"mercury")
+    local_storage.write_blob(f"{TEMP_FOLDER}/empty", b"")
+
+    view = local_storage.read_blob_view(f"{TEMP_FOLDER}/mercury")
+    assert isinstance(view, memoryview)
+    assert view == b"mercury"
+    assert view[1:4] == b"erc"
+
+    assert local_storage.read_blob_view(f"{TEMP_FOLDER}/empty") == b""
+    assert local_storage.read_blob_view(f"{TEMP_FOLDER}/pluto") is None
+
+    views = local_storage.read_blobs([f"{TEMP_FOLDER}/mercury", f"{TEMP_FOLDER}/empty"], views=True)
+    assert all(isinstance(v, memoryview) for v in views)
+    assert views == [b"mercury", b""]
+
+    del view, views
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_local_storage_writes_are_atomic(monkeypatch):
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+    path = f"{TEMP_FOLDER}/commit.json"
+    local_storage.write_blob(path, b"original")
+
+    def crash(file_descriptor):
+        raise OSError("disk failure")
+
+    monkeypatch.setattr(os, "fsync", crash)
+    try:
+        local_storage.write_blob(path, b"replacement")
+        assert False, "write should have failed"
+    except OSError:
+        pass
+
+    # the original is intact and the partial write has been removed
+    assert local_storage.read_blob(path) == b"original"
+    assert os.listdir(TEMP_FOLDER) == ["commit.json"]
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+
+def test_local_storage_group_sync(monkeypatch):
+    import threading
+
+    from tarchia.interfaces.storage import local_storage as module
+    from tarchia.utils import config
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
+    syncs = []
+
+    def slow_sync(directory):
+        syncs.append(directory)
+        time.sleep(0.01)
+
+    monkeypatch.setattr(config, "LOCAL_STORAGE_GROUP_SYNC", True)
+    monkeypatch.setattr(module, "_sync_directory", slow_sync)
+
+    paths = [f"{TEMP_FOLDER}/blob-{i}" for i in range(32)]
+    threads = [
+        threading.Thread(target=local_storage.write_blob, args=(path, path.encode()))
+        for path in paths
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert local_storage.read_blobs(paths) == [path.encode() for path in paths]
+    # concurrent writes share the directory syncs
+    assert 0 < len(syncs) < len(paths), len(syncs)
+
+    shutil.rmtree(TEMP_FOLDER, ignore_errors=True)
+
 
 if __name__ == "__main__":  # pragma: no cover
     from tests.tools import run_tests
@@ -0,0 +1,72 @@
+"""
+Test the S3 storage provider against moto's in-process stand-in for S3.
+"""
+
+import sys
+import os
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from tarchia.interfaces.storage import s3_storage
+
+BUCKET = "metadata"
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setattr(s3_storage, "BUCKET_NAME", BUCKET)
+
+    with moto.mock_aws():
+        s3_storage._client = None
+        provider = s3_storage.S3Storage()
+        provider.client.create_bucket(Bucket=BUCKET)
+        yield provider
+    s3_storage._client = None
+
+
+def test_read_and_write(storage):
+    storage.write_blob("commits/commit-1.json", b"commit")
+    assert storage.read_blob("commits/commit-1.json") == b"commit"
+    assert storage.read_blob(f"{BUCKET}/commits/commit-1.json", bucket_in_path=True) == b"commit"
+    assert storage.read_blob("commits/missing.json") is None
+
+
+def test_multipart_upload(storage, monkeypatch):
+    # parts must be at least 5MB
+    monkeypatch.setattr(s3_storage, "MULTIPART_THRESHOLD", 5 * 1024 * 1024)
+    storage.transfer_config.multipart_threshold = 5 * 1024 * 1024
+    storage.transfer_config.multipart_chunksize = 5 * 1024 * 1024
+    content = os.urandom(12 * 1024 * 1024)
+
+    storage.write_blob("data/large.parquet", content)
+    assert storage.read_blob("data/large.parquet") == content
+
+    head = storage.client.head_object(Bucket=BUCKET, Key="data/large.parquet")
+    # multipart uploads have an ETag with the number of parts
+    assert "-" in head["ETag"], head["ETag"]
+
+
+def test_async_interface(storage):
+    import asyncio
+
+    async def run():
+        await storage.awrite_blob("history/history-1.avro", b"history")
+        return await storage.aread_many(["history/history-1.avro", "history/missing.avro"])
+
+    assert asyncio.run(run()) == [b"history", None]
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
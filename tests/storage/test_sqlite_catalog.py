@@ -0,0 +1,218 @@
+import sys
+import os
+import threading
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from tarchia.interfaces.catalog.sqlite_catalog import SqliteCatalogProvider
+from tarchia.models import Column
+from tarchia.models import DatasetPermissions
+from tarchia.models import OwnerEntry
+from tarchia.models import OwnerType
+from tarchia.models import RolePermission
+from tarchia.models import TableCatalogEntry
+from tarchia.models import ViewCatalogEntry
+
+DB_PATH = "_test_catalog.db"
+
+
+def setup_catalog() -> SqliteCatalogProvider:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    return SqliteCatalogProvider(DB_PATH)
+
+
+def teardown_catalog():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+
+def make_table(table_id: str, name: str, commit_sha: str = None) -> TableCatalogEntry:
+    return TableCatalogEntry(
+        name=name,
+        steward="bob",
+        owner="tester",
+        table_id=table_id,
+        location=None,
+        partitioning=None,
+        last_updated_ms=0,
+        freshness_life_in_days=0,
+        retention_in_days=0,
+        permissions=[DatasetPermissions(role="*", permission=RolePermission.READ)],
+        visibility="PRIVATE",
+        current_commit_sha=commit_sha,
+    )
+
+
+def test_sqlite_tables():
+    catalog = setup_catalog()
+
+    catalog.update_table("1", make_table("1", "alpha", "a" * 64))
+    catalog.update_table("2", make_table("2", "beta"))
+
+    assert catalog.get_table("tester", "alpha")["table_id"] == "1"
+    assert catalog.get_table("tester", "gamma") is None
+    assert [t["name"] for t in catalog.list_tables("tester")] == ["alpha", "beta"]
+    assert catalog.list_tables("nobody") == []
+
+    # updates replace the existing document
+    entry = make_table("1", "alpha", "b" * 64)
+    entry.description = "updated"
+    catalog.update_table("1", entry)
+    assert catalog.get_table("tester", "alpha")["description"] == "updated"
+    assert len(catalog.list_tables("tester")) == 2
+
+    catalog.delete_table("2")
+    assert catalog.get_table("tester", "beta") is None
+
+    teardown_catalog()
+
+
+def test_sqlite_swap_commit():
+    catalog = setup_catalog()
+
+    catalog.update_table("1", make_table("1", "alpha", "a" * 64))
+
+    # we're not at the expected commit, so this should not be written
+    assert not catalog.swap_commit("1", "c" * 64, make_table("1", "alpha", "b" * 64))
+    assert catalog.get_table("tester", "alpha")["current_commit_sha"] == "a" * 64
+
+    assert catalog.swap_commit("1", "a" * 64, make_table("1", "alpha", "b" * 64))
+    assert catalog.get_table("tester", "alpha")["current_commit_sha"] == "b" * 64
+
+    # can't swap a table which doesn't exist
+    assert not catalog.swap_commit("9", None, make_table("9", "omega", "b" * 64))
+
+    teardown_catalog()
+
+
+def test_sqlite_swap_commit_keeps_other_changes():
+    """swapping a commit in shouldn't revert changes made since the entry was read"""
+    catalog = setup_catalog()
+
+    stale = make_table("1", "alpha", "a" * 64)
+    catalog.update_table("1", stale)
+
+    changed = make_table("1", "alpha", "a" * 64)
+    changed.description = "changed"
+    changed.visibility = "PUBLIC"
+    catalog.update_table("1", changed)
+
+    stale.current_commit_sha = "b" * 64
+    assert catalog.swap_commit("1", "a" * 64, stale)
+    entry = catalog.get_table("tester", "alpha")
+    assert entry["current_commit_sha"] == "b" * 64
+    assert entry["description"] == "changed"
+    assert entry["visibility"] == "PUBLIC"
+
+    teardown_catalog()
+
+
+def test_sqlite_swap_table():
+    catalog = setup_catalog()
+    catalog.update_table("1", make_table("1", "alpha", "a" * 64))
+
+    read = catalog.get_table("tester", "alpha")
+    catalog.swap_commit("1", "a" * 64, make_table("1", "alpha", "b" * 64))
+
+    # the table has changed since it was read, so this should not be written
+    updated = make_table("1", "alpha", "a" * 64)
+    updated.description = "updated"
+    assert not catalog.swap_table("1", read, updated)
+    assert catalog.get_table("tester", "alpha")["current_commit_sha"] == "b" * 64
+
+    read = catalog.get_table("tester", "alpha")
+    updated = make_table("1", "alpha", "b" * 64)
+    updated.description = "updated"
+    assert catalog.swap_table("1", read, updated)
+    assert catalog.get_table("tester", "alpha")["description"] == "updated"
+
+    teardown_catalog()
+
+
+def test_sqlite_swap_commit_concurrent():
+    """only one of many writers racing from the same commit should win"""
+    catalog = setup_catalog()
+    catalog.update_table("1", make_table("1", "alpha", "0" * 64))
+
+    results = []
+
+    def writer(index):
+        # each thread uses its own connection
+        results.append(
+            catalog.swap_commit("1", "0" * 64, make_table("1", "alpha", f"{index:064}"))
+        )
+
+    threads = [threading.Thread(target=writer, args=(i + 1,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1, results
+    teardown_catalog()
+
+
+def test_sqlite_owners_and_views():
+    catalog = setup_catalog()
+
+    owner = OwnerEntry(
+        name="tester", owner_id="o1", type=OwnerType.INDIVIDUAL, steward="bob", memberships=[]
+    )
+    catalog.update_owner(owner)
+    assert catalog.get_owner("tester")["owner_id"] == "o1"
+    catalog.delete_owner("o1")
+    assert catalog.get_owner("tester") is None
+
+    view = ViewCatalogEntry(
+        name="view", owner="tester", view_id="v1", statement="SELECT 1", last_updated_ms=0
+    )
+    catalog.update_view("v1", view)
+    assert catalog.get_view("tester", "view")["statement"] == "SELECT 1"
+    assert len(catalog.list_views("tester")) == 1
+    catalog.delete_view("v1")
+    assert catalog.get_view("tester", "view") is None
+
+    # the catalog is durable
+    catalog.update_view("v1", view)
+    reopened = SqliteCatalogProvider(DB_PATH)
+    assert reopened.get_view("tester", "view")["view_id"] == "v1"
+
+    teardown_catalog()
+
+
+def test_sqlite_close():
+    import sqlite3
+
+    import pytest
+
+    catalog = setup_catalog()
+    catalog.update_table("t1", make_table("t1", "one"))
+
+    # connections opened by other threads are closed too
+    thread = threading.Thread(target=catalog.get_table, args=("tester", "one"))
+    thread.start()
+    thread.join()
+    connections = list(catalog._connections)
+    assert len(connections) == 2
+
+    catalog.close()
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+
+    # a closed catalog opens a new connection if it's used again
+    assert catalog.get_table("tester", "one")["name"] == "one"
+    catalog.close()
+    teardown_catalog()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
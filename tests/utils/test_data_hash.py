@@ -0,0 +1,74 @@
+import sys
+import os
+import hashlib
+import random
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+from tarchia.api.v1.data_management import update_data_hash
+from tarchia.api.v1.data_management import xor_hex_strings
+from tarchia.models.manifest_models import EntryType
+from tarchia.models.manifest_models import ManifestEntry
+
+
+def naive_xor(hex_strings):
+    result = bytes(32)
+    for hex_str in hex_strings:
+        result = bytes(a ^ b for a, b in zip(result, bytes.fromhex(hex_str)))
+    return result.hex()
+
+
+def make_entries(count: int, seed: int = 0):
+    return [
+        ManifestEntry(
+            file_path=f"data/file-{seed}-{i}.parquet",
+            file_type=EntryType.Data,
+            sha256_checksum=hashlib.sha256(f"{seed}-{i}".encode()).hexdigest(),
+        )
+        for i in range(count)
+    ]
+
+
+def test_xor_matches_naive_implementation():
+    for count in (1, 2, 3, 100, 1001):
+        hashes = [hashlib.sha256(str(random.random()).encode()).hexdigest() for _ in range(count)]
+        assert xor_hex_strings(hashes) == naive_xor(hashes)
+
+
+def test_xor_empty():
+    assert xor_hex_strings([]) == "0" * 64
+    assert xor_hex_strings([None]) == "0" * 64
+
+
+def test_xor_self_inverse():
+    hashes = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(10)]
+    assert xor_hex_strings(hashes + hashes) == "0" * 64
+
+
+def test_incremental_data_hash_matches_full_hash():
+    original = make_entries(50, seed=1)
+    added = make_entries(20, seed=2)
+    removed = original[10:25]
+
+    parent_hash = xor_hex_strings([e.sha256_checksum for e in original])
+    new_manifest = [e for e in original if e not in removed] + added
+
+    incremental = update_data_hash(parent_hash, added, removed)
+    assert incremental == xor_hex_strings([e.sha256_checksum for e in new_manifest])
+
+
+def test_incremental_data_hash_from_empty():
+    added = make_entries(5)
+    assert update_data_hash("0" * 64, added, []) == xor_hex_strings(
+        [e.sha256_checksum for e in added]
+    )
+    assert update_data_hash(None, [], []) == "0" * 64
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+
+from tarchia.interfaces.storage.storage_provider import StorageProvider
+from tarchia.metadata.manifests import aget_manifest
+from tarchia.metadata.manifests import get_manifest
+from tarchia.metadata.manifests import write_manifest
+from tarchia.models import Commit
+from tarchia.models import Schema
+from tarchia.models.manifest_models import EntryType
+from tarchia.models.manifest_models import ManifestEntry
+from tarchia.utils import catalogs
+from tarchia.utils import config
+from tarchia.utils import shared_cache
+
+CACHE_FOLDER = "_temp_shared_cache"
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+
+class CountingStorage(StorageProvider):
+    """In-memory storage which counts the reads made to it"""
+
+    def __init__(self):
+        self.blobs = {}
+        self.reads = 0
+
+    def write_blob(self, location, content):
+        self.blobs[location] = bytes(content)
+
+    def read_blob(self, location, bucket_in_path=False):
+        self.reads += 1
+        return self.blobs.get(location)
+
+
+def restart_worker():
+    """Forget the cache, as a new (or another) worker would start without it"""
+    shared_cache._shared_cache = None
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(config, "SHARED_CACHE_MB", 1)
+    monkeypatch.setattr(config, "SHARED_CACHE_FOLDER", CACHE_FOLDER)
+    shutil.rmtree(CACHE_FOLDER, ignore_errors=True)
+    restart_worker()
+    yield
+    restart_worker()
+    shutil.rmtree(CACHE_FOLDER, ignore_errors=True)
+
+
+def write_test_manifest(storage: StorageProvider) -> str:
+    entries = [
+        ManifestEntry(
+            file_path=f"data/file-{i}.parquet",
+            file_type=EntryType.Data,
+            record_count=i,
+            lower_bounds={"id": i},
+            upper_bounds={"id": i + 10},
+        )
+        for i in range(100)
+    ]
+    write_manifest("manifests/manifest-1.avro", storage, entries)
+    return "manifests/manifest-1.avro"
+
+
+def test_disabled_by_default_for_one_worker(monkeypatch):
+    monkeypatch.setattr(config, "SHARED_CACHE_MB", 0)
+    restart_worker()
+    assert shared_cache.shared_cache() is None
+
+
+def test_manifests_are_shared_between_workers(cache):
+    storage = CountingStorage()
+    location = write_test_manifest(storage)
+
+    first = get_manifest(location, storage, None)
+    assert storage.reads == 1
+
+    # another worker reads the decoded entries rather than the manifest
+    restart_worker()
+    second = get_manifest(location, storage, None)
+    assert storage.reads == 1
+    assert second == first
+    assert second[5].file_type == EntryType.Data
+    assert second[5].lower_bounds == {"id": 5}
+    assert shared_cache.shared_cache().as_dict() == {"hits": 1, "misses": 0}
+
+    # and filters are applied to the cached entries
+    pruned = asyncio.run(aget_manifest(location, storage, [("id", "<", 3)]))
+    assert storage.reads == 1
+    assert 0 < len(pruned) < len(first)
+    assert all(entry.lower_bounds["id"] <= 3 for entry in pruned)
+
+
+def test_missing_manifests_are_not_cached(cache):
+    storage = CountingStorage()
+    with pytest.raises(Exception):
+        get_manifest("manifests/missing.avro", storage, None)
+    assert shared_cache.shared_cache().get("manifest", "manifests/missing.avro") is None
+
+
+def test_commits_are_shared_between_workers(cache):
+    storage = CountingStorage()
+    commit = Commit(
+        data_hash="0" * 64,
+        user="user",
+        message="message",
+        branch="main",
+        parent_commit_sha=None,
+        last_updated_ms=0,
+        manifest_path=None,
+        table_schema=Schema(columns=[]),
+        encryption=None,
+        added_files=[],
+        removed_files=[],
+    )
+    storage.write_blob(f"commits/commit-{commit.commit_sha}.json", commit.serialize())
+
+    asyncio.run(catalogs.aload_commit(storage, "commits", commit.commit_sha))
+    restart_worker()
+    loaded = asyncio.run(catalogs.aload_commit(storage, "commits", commit.commit_sha))
+
+    assert storage.reads == 1
+    assert loaded.commit_sha == commit.commit_sha
+
+
+def test_entries_are_readable_by_other_processes(cache):
+    shared_cache.shared_cache().set("manifest", "manifests/manifest-2.avro", [{"file_path": "a"}])
+
+    script = (
+        "from tarchia.utils import config\n"
+        "config.SHARED_CACHE_MB = 1\n"
+        f"config.SHARED_CACHE_FOLDER = {os.path.abspath(CACHE_FOLDER)!r}\n"
+        "from tarchia.utils.shared_cache import shared_cache\n"
+        "assert shared_cache().get('manifest', 'manifests/manifest-2.avro') == [{'file_path': 'a'}]\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True)
+
+
+def test_entries_are_shared_by_running_workers(cache):
+    # two workers which have both started before either has cached anything
+    first = shared_cache.SharedMetadataCache(CACHE_FOLDER, 1024 * 1024)
+    second = shared_cache.SharedMetadataCache(CACHE_FOLDER, 1024 * 1024)
+
+    assert second.get("manifest", "manifests/manifest-3.avro") is None
+    first.set("manifest", "manifests/manifest-3.avro", [{"file_path": "a"}])
+    assert second.get("manifest", "manifests/manifest-3.avro") == [{"file_path": "a"}]
+    assert second.as_dict() == {"hits": 1, "misses": 1}
+
+
+def test_running_workers_share_the_size_limit(cache):
+    workers = [shared_cache.SharedMetadataCache(CACHE_FOLDER, 64 * 1024) for _ in range(4)]
+
+    value = ["x" * 1024] * 8
+    for i in range(64):
+        workers[i % len(workers)].set("manifest", f"manifests/manifest-{i}.avro", value)
+
+    cached = sum(
+        os.path.getsize(os.path.join(CACHE_FOLDER, name))
+        for name in os.listdir(CACHE_FOLDER)
+        if not name.startswith(".")
+    )
+    assert cached <= 64 * 1024, cached
+    # the most recent entries are kept, whichever worker wrote them
+    assert all(worker.get("manifest", "manifests/manifest-63.avro") for worker in workers)
+    assert not any(worker.get("manifest", "manifests/manifest-0.avro") for worker in workers)
+
+
+def test_write_errors_are_not_raised(cache, monkeypatch):
+    worker = shared_cache.SharedMetadataCache(CACHE_FOLDER, 1024 * 1024)
+
+    def full(key, value):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(worker.files, "set", full)
+    worker.set("manifest", "manifests/manifest-4.avro", [{"file_path": "a"}])
+    assert worker.write_errors == 1
+    assert worker.get("manifest", "manifests/manifest-4.avro") is None
+
+
+def test_size_is_capped_at_the_free_space(cache, monkeypatch):
+    usage = shutil.disk_usage(".")
+    monkeypatch.setattr(
+        shared_cache.shutil, "disk_usage", lambda folder: usage._replace(free=32 * 1024)
+    )
+    worker = shared_cache.SharedMetadataCache(CACHE_FOLDER, 1024 * 1024)
+    assert worker.files.maximum_bytes == 32 * 1024
+
+
+def test_manifests_are_decoded_off_the_event_loop(cache, monkeypatch):
+    import threading
+
+    from tarchia.metadata import manifests
+
+    storage = CountingStorage()
+    location = write_test_manifest(storage)
+
+    threads = []
+    for name in ("_cached_manifests", "_add_decoded"):
+
+        def record(*args, _function=getattr(manifests, name)):
+            threads.append(threading.current_thread())
+            return _function(*args)
+
+        monkeypatch.setattr(manifests, name, record)
+
+    assert len(asyncio.run(aget_manifest(location, storage, None))) == 100
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+
+from tarchia.utils.single_flight import SingleFlight
+
+
+def test_concurrent_loads_are_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def burst():
+        return await asyncio.gather(*(flight.run("commit", load) for _ in range(50)))
+
+    results = asyncio.run(burst())
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    async def load(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def burst():
+        return await asyncio.gather(
+            *(flight.run(key, lambda key=key: load(key)) for key in ("a", "b", "a", "b"))
+        )
+
+    assert asyncio.run(burst()) == ["a", "b", "a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_sequential_loads_are_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    async def twice():
+        return [await flight.run("commit", load), await flight.run("commit", load)]
+
+    assert asyncio.run(twice()) == [1, 2]
+
+
+def test_errors_are_shared_and_not_remembered():
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("missing")
+
+    async def burst():
+        return await asyncio.gather(
+            *(flight.run("commit", failing) for _ in range(5)), return_exceptions=True
+        )
+
+    results = asyncio.run(burst())
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeeding():
+        return "ok"
+
+    assert asyncio.run(flight.run("commit", succeeding)) == "ok"
+
+
+def test_cancelled_caller_does_not_cancel_load():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.05)
+        return "loaded"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("commit", load))
+        second = asyncio.ensure_future(flight.run("commit", load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "loaded"
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()
@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+
+os.environ["CATALOG_NAME"] = "test_catalog.json"
+os.environ["TARCHIA_DEBUG"] = "TRUE"
+
+sys.path.insert(1, os.path.join(sys.path[0], "../.."))
+
+import pytest
+
+from tarchia.exceptions import InvalidTokenError
+from tarchia.utils import config
+from tarchia.utils.tokens import key_set
+from tarchia.utils.tokens import sign_token
+from tarchia.utils.tokens import verify_token
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    monkeypatch.setattr(config, "AUTH_JWT_KEYS", "current=s3cret, previous=0ld")
+
+
+def test_key_set(monkeypatch):
+    monkeypatch.setattr(config, "AUTH_JWT_KEYS", "just-one")
+    assert key_set() == {"": b"just-one"}
+    monkeypatch.setattr(config, "AUTH_JWT_KEYS", "a=1,b=2")
+    assert key_set() == {"a": b"1", "b": b"2"}
+    # the key set is parsed once
+    assert key_set() is key_set()
+
+
+def test_verify_token(keys):
+    claims = {"sub": "bob", "roles": ["analysts"], "exp": time.time() + 60}
+    assert verify_token(sign_token(claims, b"s3cret", kid="current")) == claims
+    assert verify_token(sign_token(claims, b"0ld", kid="previous")) == claims
+
+
+def test_rejected_tokens(keys):
+    claims = {"sub": "bob"}
+    rejected = [
+        "not.a.token",
+        sign_token(claims, b"wrong", kid="current"),
+        sign_token(claims, b"s3cret", kid="unknown"),
+        # signed with the right key, but no kid and there's no default key
+        sign_token(claims, b"s3cret"),
+        sign_token({"sub": "bob", "exp": time.time() - 3600}, b"s3cret", kid="current"),
+        sign_token({"sub": "bob", "nbf": time.time() + 3600}, b"s3cret", kid="current"),
+        # claims and headers of the wrong type are rejected, rather than failing
+        sign_token(claims, b"s3cret", kid=["current"]),
+        sign_token(claims, b"s3cret", kid={"current": 1}),
+        sign_token({"sub": "bob", "exp": "tomorrow"}, b"s3cret", kid="current"),
+        sign_token({"sub": "bob", "exp": None}, b"s3cret", kid="current"),
+        sign_token({"sub": "bob", "exp": True}, b"s3cret", kid="current"),
+        sign_token({"sub": "bob", "nbf": [0]}, b"s3cret", kid="current"),
+    ]
+    # tampering with the claims breaks the signature
+    header, _, signature = sign_token(claims, b"s3cret", kid="current").split(".")
+    _, forged, _ = sign_token({"sub": "admin"}, b"s3cret", kid="current").split(".")
+    rejected.append(f"{header}.{forged}.{signature}")
+    # unsigned tokens are never accepted
+    unsigned = sign_token(claims, b"s3cret", kid="current").split(".")
+    rejected.append(f"eyJhbGciOiJub25lIn0.{unsigned[1]}.")
+
+    for token in rejected:
+        with pytest.raises(InvalidTokenError):
+            verify_token(token)
+
+
+def test_tokens_disabled(monkeypatch):
+    monkeypatch.setattr(config, "AUTH_JWT_KEYS", None)
+    with pytest.raises(InvalidTokenError):
+        verify_token(sign_token({"sub": "bob"}, b"s3cret"))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    from tests.tools import run_tests
+
+    run_tests()